@@ -1,23 +1,44 @@
 #app.py
+# .env first: earthpulse_ml modules (startup budgets included) read the environment at import
 from dotenv import load_dotenv
 load_dotenv()
+from earthpulse_ml.startup import STARTUP
 import sys
 import os
-from pywebpush import webpush, WebPushException
+import threading
 from flask import Flask
 from flask_cors import CORS
 from flask import Flask, request, jsonify
 import json
-import requests
+import hashlib
 import importlib
 
-import tensorflow as tf
 import pandas as pd
 import numpy as np
 import os
-from earthpulse_ml.openmeteo_client import fetch_realtime
+from earthpulse_ml.weather_cache import GRID_DEG, fetch_realtime_cached, WEATHER_CACHE, snap_to_grid, hour_bucket, next_hour_boundary
+from earthpulse_ml.singleflight import SingleFlight
+from earthpulse_ml.ttl_cache import TTLCache
 from earthpulse_ml.feature_engineering import add_lagged_aggregates, select_features
-from datetime import datetime, timezone, timedelta
+from earthpulse_ml.model_runtime import get_runtime
+from earthpulse_ml.geocode import geocode_city, GEOCODER
+from earthpulse_ml.http_transport import HTTP
+from earthpulse_ml.batcher import MicroBatcher
+from earthpulse_ml.tiles import TILE_CACHE, tile_bounds, sample_res, pixel_lattice, render_png
+from earthpulse_ml.mvt import TileLayer as MVTLayer, encode_tile, EXTENT as MVT_EXTENT, BUFFER as MVT_BUFFER
+from earthpulse_ml.hotspots import HOTSPOTS
+from earthpulse_ml.waterways import WATERWAYS
+from earthpulse_ml.flood_zones import FLOOD_ZONES
+from earthpulse_ml.places import PLACES, PlacesUpstreamError
+from earthpulse_ml.weather_history import WEATHER_HISTORY
+from earthpulse_ml.alerts import AlertEngine
+from earthpulse_ml.locations import TRACKED_LOCATIONS
+from datetime import date, datetime, timezone, timedelta
+from concurrent.futures import ThreadPoolExecutor, wait
+
+# Report-only (matplotlib, fpdf) and push/scheduler-only (pywebpush, apscheduler)
+# dependencies are imported on first use so they stay off the cold-start path.
+STARTUP.checkpoint("imports")
 
 
 app = Flask("earthpulse_api")
@@ -41,25 +62,33 @@ OPENWEATHER_API_KEY = os.environ.get("WEATHER_API_KEY", "")
 OPENWEATHER_ONECALL = "https://api.openweathermap.org/data/2.5/onecall"
 OPENWEATHER_GEOCODE = "https://api.openweathermap.org/geo/1.0/direct"
 
-GEOCODE_URL = "https://geocoding-api.open-meteo.com/v1/search"
-DEFAULT_FLOOD_MODEL = os.path.join(os.path.dirname(__file__), "models/flood_model.keras")
-DEFAULT_WILDFIRE_MODEL = os.path.join(os.path.dirname(__file__), "models/wildfire_model.keras")
+# eager: load + warm up models at import (before gunicorn serves traffic)
+# lazy:  load on the first request that needs them
+STARTUP_MODE = os.environ.get("STARTUP_MODE", "eager")
 
-FLOOD_MODEL = None
-FLOOD_FEATS = None
-WILDFIRE_MODEL = None
-WILDFIRE_FEATS = None
+RUNTIME = None
+BATCHER = None
+_MODELS_LOCK = threading.Lock()
 
 def get_models():
-    global FLOOD_MODEL, FLOOD_FEATS, WILDFIRE_MODEL, WILDFIRE_FEATS
-
-    if FLOOD_MODEL is None:
-        FLOOD_MODEL, FLOOD_FEATS = load_model_and_features(DEFAULT_FLOOD_MODEL)
-
-    if WILDFIRE_MODEL is None:
-        WILDFIRE_MODEL, WILDFIRE_FEATS = load_model_and_features(DEFAULT_WILDFIRE_MODEL)
-
-    return FLOOD_MODEL, FLOOD_FEATS, WILDFIRE_MODEL, WILDFIRE_FEATS
+    """Fused hazard runtime (flood + wildfire), loaded and warmed up exactly once."""
+    global RUNTIME, BATCHER
+    if RUNTIME is None:
+        with _MODELS_LOCK:
+            if RUNTIME is None:
+                with STARTUP.phase("model_load"):
+                    runtime = get_runtime()
+                with STARTUP.phase("warmup"):
+                    runtime.predict(np.zeros((1, len(runtime.features)), dtype="float32"))
+                # request threads share forward passes through the micro-batcher
+                BATCHER = MicroBatcher(runtime.predict)
+                RUNTIME = runtime
+    return RUNTIME
+
+def infer(X):
+    """Score aligned feature rows via the micro-batching worker."""
+    get_models()
+    return BATCHER.predict(X)
 
 
 
@@ -93,39 +122,87 @@ def deg_to_compass(deg: float) -> str:
     ix = int((deg/22.5)+0.5) % 16
     return dirs[ix]
 
-def geocode_city(city: str, country: str|None = "India"):
-    q = f"{city}, {country}" if country else city
-    r = requests.get(GEOCODE_URL, params={"name": q, "count": 1, "language": "en", "format": "json"}, timeout=10)
-    r.raise_for_status()
-    data = r.json()
-    if "results" not in data or not data["results"]:
-        raise ValueError(f"Could not geocode '{city}'")
-    res = data["results"][0]
-    return float(res["latitude"]), float(res["longitude"])
-
-def load_model_and_features(model_path: str):
-    model = tf.keras.models.load_model(model_path)
-    feat_file = model_path + ".features.txt"
-    if os.path.exists(feat_file):
-        with open(feat_file, "r") as f:
-            feat_cols = [l.strip() for l in f if l.strip()]
-    else:
-        feat_cols = []
-    return model, feat_cols
+def is_floodville(city) -> bool:
+    """Test city that always returns a canned high-flood result."""
+    return bool(city) and city.strip().lower() == "floodville"
 
-def prepare_features_for_model(lat, lon, model_feats):
-    # fetch realtime hourly data (pandas.DataFrame indexed by time)
-    wx = fetch_realtime(lat, lon, timezone_name="auto")
-    wx_eng = add_lagged_aggregates(wx)
+def latest_weather_snapshot(lat, lon, city=None) -> dict:
+    if is_floodville(city):
+        return {
+            "time": datetime.now(timezone.utc).isoformat(),
+            "temp_c": 25.0,
+            "humidity": 95.0,
+            "precip": 20.0,
+            "wind_kph": 10.0
+        }
+    try:
+        wx = fetch_realtime_cached(lat, lon, timezone_name="UTC")
+        return wx.iloc[-1].to_dict() if wx.shape[0] else {}
+    except Exception as e:
+        print("⚠ Weather fetch failed:", e)
+        return {"error": "weather_unavailable"}
+
+# Model inputs only change when Open-Meteo publishes a new hourly value, so the
+# per-cell response body is cached until the next hour boundary.
+PREDICT_CACHE = TTLCache(max_entries=int(os.environ.get("PREDICT_CACHE_MAX_ENTRIES", "4096")))
+# Concurrent /predict calls for the same cell and hour share one computation
+PREDICT_FLIGHTS = SingleFlight("predict")
+
+def risk_label(prob: float) -> str:
+    return "High" if prob >= 0.5 else "Low"
+
+def prediction_body(lat, lon, flood_prob, fire_prob, city=None) -> dict:
+    """Cell-level part of a /predict response (everything except the location echo)."""
+    return {
+        "weather": latest_weather_snapshot(lat, lon, city),
+        "wildfire": {"probability": fire_prob, "label": risk_label(fire_prob)},
+        "flood": {"probability": flood_prob, "label": risk_label(flood_prob)}
+    }
+
+def predict_cache_key(lat, lon):
+    """(grid cell, model version, feature-source hour)"""
+    return (snap_to_grid(lat, lon), get_models().version, hour_bucket())
+
+def _predict_cell(key, lat, lon):
+    runtime = get_models()
+    # one shared feature row, one forward pass for every hazard
+    X = runtime.align(prepare_features_for_model(lat, lon, runtime.features))
+    probs = infer(X)
+    body = prediction_body(lat, lon, float(probs["flood"][0]), float(probs["wildfire"][0]))
+    PREDICT_CACHE.set(key, body, expires_at=next_hour_boundary())
+    return body
+
+def predict_location(lat, lon) -> dict:
+    """Cached, coalesced prediction body for a location."""
+    key = predict_cache_key(lat, lon)
+    body = PREDICT_CACHE.get(key)
+    if body is None:
+        body = PREDICT_FLIGHTS.do(key, _predict_cell, key, lat, lon)
+    return body
+
+def engineer_features(wx, model_feats):
+    """Engineered feature rows for a realtime frame, aligned to model_feats."""
+    # select_features keeps raw variables only, so skip the rolling windows
+    wx_eng = add_lagged_aggregates(wx, windows=())
     feats = select_features(wx_eng).fillna(0.0)
+    # ensure all required features exist
+    return feats.reindex(columns=model_feats, fill_value=0.0)
+
+def feature_frame(lat, lon, model_feats, forecast_days=1, timezone_name="auto"):
+    """Every hourly row of the realtime frame, engineered and aligned to model_feats."""
+    # fetch realtime hourly data (pandas.DataFrame indexed by time, shared via cache)
+    wx = fetch_realtime_cached(lat, lon, timezone_name=timezone_name, forecast_days=forecast_days)
+    return engineer_features(wx, model_feats)
+
+def latest_feature_row(feats, model_feats):
     # final row only (latest)
     if feats.shape[0] == 0:
         # no features available -> return zeros for model_feats
         return pd.DataFrame([ {c: 0.0 for c in model_feats} ])
-    last = feats.iloc[[-1]].copy()
-    # ensure all required features exist
-    aligned = last.reindex(columns=model_feats, fill_value=0.0)
-    return aligned
+    return feats.iloc[[-1]].copy()
+
+def prepare_features_for_model(lat, lon, model_feats):
+    return latest_feature_row(feature_frame(lat, lon, model_feats), model_feats)
 
 
 
@@ -183,23 +260,29 @@ def push_subscriptions():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-@app.post('/push/test')
-def push_test():
-    payload = request.get_json() or {}
-    title = payload.get('title', 'Test Alert')
-    body = payload.get('body', 'This is a test push')
-    sent = 0
-    errors = []
+class PushUnavailable(RuntimeError):
+    def __init__(self, error, details=None):
+        super().__init__(error)
+        self.error, self.details = error, details
+
+
+def send_push(title: str, body: str, tag: str = None) -> dict:
+    """Web-push a notification to every subscription; {"sent", "errors"}."""
+    ensure_push()
     if not PUSH_AVAILABLE:
-        return jsonify({"error": "pywebpush not available", "details": PUSH_IMPORT_ERROR}), 500
+        raise PushUnavailable("pywebpush not available", PUSH_IMPORT_ERROR)
     if not VAPID_PRIVATE_KEY:
-        return jsonify({"error": "VAPID_PRIVATE_KEY not set"}), 500
+        raise PushUnavailable("VAPID_PRIVATE_KEY not set")
+    data = {"title": title, "body": body}
+    if tag:
+        data["tag"] = tag
+    sent = 0
+    errors = []
     for sub in list(SUBSCRIPTIONS):
         try:
-            ensure_push()
             PUSH_MODULE.webpush(
                 subscription_info=sub,
-                data=json.dumps({"title": title, "body": body}),
+                data=json.dumps(data),
                 vapid_private_key=VAPID_PRIVATE_KEY,
                 vapid_claims=VAPID_CLAIMS
             )
@@ -207,88 +290,284 @@ def push_test():
         except Exception as ex:
             # Use a generic exception because WebPushException may not be available until import
             errors.append(str(ex))
-    return jsonify({"sent": sent, "errors": errors})
+    return {"sent": sent, "errors": errors}
 
-# Load models once
-FLOOD_MODEL, FLOOD_FEATS = load_model_and_features(DEFAULT_FLOOD_MODEL)
-WILDFIRE_MODEL, WILDFIRE_FEATS = load_model_and_features(DEFAULT_WILDFIRE_MODEL)
+@app.post('/push/test')
+def push_test():
+    payload = request.get_json() or {}
+    try:
+        result = send_push(payload.get('title', 'Test Alert'), payload.get('body', 'This is a test push'),
+                           payload.get('tag'))
+    except PushUnavailable as e:
+        err = {"error": e.error}
+        if e.details is not None:
+            err["details"] = e.details
+        return jsonify(err), 500
+    return jsonify(result)
 
 @app.get("/health")
 def health():
-    return {"status": "ok", "flood_model_loaded": bool(FLOOD_FEATS), "wildfire_model_loaded": bool(WILDFIRE_FEATS)}
+    hazards = RUNTIME.hazards if RUNTIME is not None else []
+    return {
+        "status": "ok",
+        "flood_model_loaded": "flood" in hazards,
+        "wildfire_model_loaded": "wildfire" in hazards,
+        "hazards": hazards
+    }
+
+@app.get("/metrics")
+def metrics():
+    """Operational counters: startup, caches, coalescing, upstream latency, inference batching."""
+    return jsonify({
+        "startup": STARTUP.snapshot(),
+        "weather_cache": WEATHER_CACHE.stats(),
+        "geocode": GEOCODER.stats(),
+        "predict_cache": PREDICT_CACHE.stats(),
+        "timeline_cache": TIMELINE_CACHE.stats(),
+        "grid_cache": GRID_CACHE.stats(),
+        "tile_cache": TILE_CACHE.stats(),
+        "mvt_cache": MVT_CACHE.stats(),
+        "hotspots": HOTSPOTS.stats(),
+        "waterways": WATERWAYS.stats(),
+        "flood_zones": FLOOD_ZONES.stats(),
+        "places": PLACES.stats(),
+        "weather_payload_cache": WEATHER_PAYLOAD_CACHE.stats(),
+        "weather_history": WEATHER_HISTORY.stats(),
+        "report_cache": REPORT_CACHE.stats(),
+        "report_fonts": REPORT_FONTS.stats(),
+        "bulk_reports": BULK_REPORTS.stats(),
+        "alerts": ALERTS.stats(),
+        "predict_coalesced": PREDICT_FLIGHTS.stats(),
+        "http": HTTP.stats(),
+        "inference": BATCHER.stats() if BATCHER is not None else None
+    })
+
+def locate(city=None, lat=None, lon=None):
+    """(lat, lon) for a city name (geocoded) or the given coordinates."""
+    if city:
+        if is_floodville(city):
+            return 12.9716, 77.5946
+        return geocode_city(city)
+    return lat, lon
+
+def predict_response(lat, lon, city=None) -> dict:
+    """The /predict response body for a resolved location."""
+    # --- Predictions (cached per grid cell, model version and hour) ---
+    if is_floodville(city):
+        body = prediction_body(lat, lon, 0.95, 0.05, city)
+    else:
+        body = predict_location(lat, lon)
+    return {
+        "city": city or f"{lat},{lon}",
+        "coordinates": {"latitude": lat, "longitude": lon},
+        **body
+    }
+
+def predict_city(city: str) -> dict:
+    """In-process equivalent of GET /predict?city= (raises on geocode or model failure)."""
+    lat, lon = locate(city)
+    return predict_response(lat, lon, city)
 
 @app.get("/predict")
 def predict():
-    FLOOD_MODEL, FLOOD_FEATS, WILDFIRE_MODEL, WILDFIRE_FEATS = get_models()
-
     # --- Parse location ---
     city = request.args.get("city")
-    lat = request.args.get("lat", type=float)
-    lon = request.args.get("lon", type=float)
-
-    # Geocode city
-    if city:
-        if city.strip().lower() == "floodville":
-            lat, lon = 12.9716, 77.5946
-        else:
-            try:
-                lat, lon = geocode_city(city)
-            except Exception as e:
-                return jsonify({"error": str(e)}), 400
+    try:
+        lat, lon = locate(city, request.args.get("lat", type=float), request.args.get("lon", type=float))
+    except Exception as e:
+        return jsonify({"error": str(e)}), 400
 
     # Validate coordinates
     if lat is None or lon is None:
         return jsonify({"error": "Provide a valid city or coordinates"}), 400
 
-    # --- Predictions ---
-    if city and city.strip().lower() == "floodville":
-        flood_prob = 0.95
-        fire_prob = 0.05
-    else:
-        try:
-            X_flood = prepare_features_for_model(lat, lon, FLOOD_FEATS).values.astype("float32")
-            flood_prob = float(FLOOD_MODEL.predict(X_flood, verbose=0)[0][0])
-        except Exception as e:
-            print("❌ Flood model failure:", e)
-            return jsonify({"error": "flood_model_failure"}), 500
+    try:
+        return jsonify(predict_response(lat, lon, city))
+    except Exception as e:
+        print("❌ Hazard model failure:", e)
+        return jsonify({"error": "model_failure"}), 500
+
+
+# --- Hourly risk timeline ---
+TIMELINE_MAX_HOURS = 168   # 7 days, the horizon ml_service/fetch_weather.py requests
+TIMELINE_CACHE = TTLCache(max_entries=int(os.environ.get("TIMELINE_CACHE_MAX_ENTRIES", "512")))
+
+
+def _timeline_cell(key, lat, lon):
+    """Score every hour from now to the max horizon in one forward pass."""
+    runtime = get_models()
+    # the frame starts at UTC midnight, so the full horizon from now needs one more day
+    feats = feature_frame(lat, lon, runtime.features, forecast_days=TIMELINE_MAX_HOURS // 24 + 1,
+                          timezone_name="UTC")
+    now = pd.Timestamp.now(tz="UTC").tz_localize(None).floor("h")
+    upcoming = feats[feats.index >= now].iloc[:TIMELINE_MAX_HOURS]
+    if upcoming.empty:
+        raise RuntimeError("weather_data_missing")
+
+    probs = infer(runtime.align(upcoming))
+    timeline = {
+        "time": [t.strftime("%Y-%m-%dT%H:%M") for t in upcoming.index],
+        "flood": np.round(probs["flood"].astype(float), 4).tolist(),
+        "wildfire": np.round(probs["wildfire"].astype(float), 4).tolist(),
+    }
+    TIMELINE_CACHE.set(key, timeline, expires_at=next_hour_boundary())
+    return timeline
 
-        try:
-            X_fire = prepare_features_for_model(lat, lon, WILDFIRE_FEATS).values.astype("float32")
-            fire_prob = float(WILDFIRE_MODEL.predict(X_fire, verbose=0)[0][0])
-        except Exception as e:
-            print("❌ Fire model failure:", e)
-            return jsonify({"error": "wildfire_model_failure"}), 500
 
-    flood_label = "High" if flood_prob >= 0.5 else "Low"
-    fire_label = "High" if fire_prob >= 0.5 else "Low"
+@app.get("/predict/timeline")
+def predict_timeline():
+    """Hourly flood / wildfire probabilities as columnar arrays.
 
-    # --- Weather snapshot ---
-    if city and city.strip().lower() == "floodville":
-        latest_weather = {
-            "time": datetime.now(timezone.utc).isoformat(),
-            "temp_c": 25.0,
-            "humidity": 95.0,
-            "precip": 20.0,
-            "wind_kph": 10.0
-        }
-    else:
+    Query: city or lat/lon, plus hours (1-168, default 48). Times are UTC.
+    """
+    city = request.args.get("city")
+    lat = request.args.get("lat", type=float)
+    lon = request.args.get("lon", type=float)
+    hours = request.args.get("hours", default=48, type=int)
+    if not 1 <= hours <= TIMELINE_MAX_HOURS:
+        return jsonify({"error": f"hours must be between 1 and {TIMELINE_MAX_HOURS}"}), 400
+
+    try:
+        lat, lon = locate(city, lat, lon)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 400
+    if lat is None or lon is None:
+        return jsonify({"error": "Provide a valid city or coordinates"}), 400
+
+    # the full horizon is cached per cell and sliced per request
+    key = ("timeline",) + predict_cache_key(lat, lon)
+    timeline = TIMELINE_CACHE.get(key)
+    if timeline is None:
         try:
-            wx = fetch_realtime(lat, lon, timezone_name="UTC")
-            latest_weather = wx.iloc[-1].to_dict() if wx.shape[0] else {}
+            timeline = PREDICT_FLIGHTS.do(key, _timeline_cell, key, lat, lon)
         except Exception as e:
-            print("⚠ Weather fetch failed:", e)
-            latest_weather = {"error": "weather_unavailable"}
+            print("❌ Hazard model failure:", e)
+            return jsonify({"error": "model_failure"}), 500
 
-    # --- Response ---
     return jsonify({
         "city": city or f"{lat},{lon}",
         "coordinates": {"latitude": lat, "longitude": lon},
-        "weather": latest_weather,
-        "wildfire": {"probability": fire_prob, "label": fire_label},
-        "flood": {"probability": flood_prob, "label": flood_label}
+        "hours": len(timeline["time"][:hours]),
+        "time": timeline["time"][:hours],
+        "flood": timeline["flood"][:hours],
+        "wildfire": timeline["wildfire"][:hours]
     })
 
 
+# --- Batch prediction ---
+BATCH_MAX_ITEMS = int(os.environ.get("BATCH_MAX_ITEMS", "100"))
+BATCH_FETCH_WORKERS = int(os.environ.get("BATCH_FETCH_WORKERS", "16"))
+_batch_pool = ThreadPoolExecutor(max_workers=BATCH_FETCH_WORKERS, thread_name_prefix="predict-batch")
+
+
+def _resolve_batch_item(item, feature_cols):
+    """Geocode one batch entry and look it up in the prediction cache.
+
+    Returns (city, lat, lon, body, feature_row): body is set for cache hits and
+    the Floodville test city, feature_row otherwise. Raises on any per-item failure.
+    """
+    if isinstance(item, str):
+        item = {"city": item}
+    if not isinstance(item, dict):
+        raise ValueError("Each location must be a city name or an object with city or lat/lon")
+
+    city = item.get("city")
+    if city:
+        lat, lon = (12.9716, 77.5946) if is_floodville(city) else geocode_city(city)
+    else:
+        if item.get("lat") is None or item.get("lon") is None:
+            raise ValueError("Provide a valid city or coordinates")
+        lat, lon = float(item["lat"]), float(item["lon"])
+
+    if is_floodville(city):
+        return city, lat, lon, prediction_body(lat, lon, 0.95, 0.05, city), None
+    body = PREDICT_CACHE.get(predict_cache_key(lat, lon))
+    if body is not None:
+        return city, lat, lon, body, None
+    return city, lat, lon, None, prepare_features_for_model(lat, lon, feature_cols)
+
+
+def score_feature_rows(locs) -> list:
+    """Prediction bodies for [(lat, lon, feature_row)] from one stacked forward pass (cached)."""
+    runtime = get_models()
+    probs = infer(runtime.align(pd.concat([row for _, _, row in locs], ignore_index=True)))
+    expires_at = next_hour_boundary()
+    bodies = []
+    for r, (lat, lon, _) in enumerate(locs):
+        body = prediction_body(lat, lon, float(probs["flood"][r]), float(probs["wildfire"][r]))
+        PREDICT_CACHE.set(predict_cache_key(lat, lon), body, expires_at=expires_at)
+        bodies.append(body)
+    return bodies
+
+
+def predict_many(items) -> list:
+    """Per-item /predict bodies (or {"index", "error"}) for a list of locations.
+
+    Items are city names or {"city"} / {"lat", "lon"} objects. They are resolved
+    and fetched concurrently, and every uncached feature row is scored in one
+    stacked forward pass.
+    """
+    runtime = get_models()
+    futures = [_batch_pool.submit(_resolve_batch_item, item, runtime.features) for item in items]
+
+    results = [None] * len(items)
+    resolved = []   # (index, city, lat, lon, body)
+    pending = []    # (index into resolved, feature row) for cache misses
+    for i, fut in enumerate(futures):
+        try:
+            city, lat, lon, body, row = fut.result()
+        except Exception as e:
+            results[i] = {"index": i, "error": str(e)}
+            continue
+        if body is None:
+            pending.append((len(resolved), row))
+        resolved.append([i, city, lat, lon, body])
+
+    # --- One stacked forward pass for every uncached location ---
+    if pending:
+        try:
+            bodies = score_feature_rows([(resolved[j][2], resolved[j][3], row) for j, row in pending])
+            for (j, _), body in zip(pending, bodies):
+                resolved[j][4] = body
+        except Exception as e:
+            print("❌ Hazard model failure:", e)
+            for j, _ in pending:
+                resolved[j][4] = {"error": "model_failure"}
+
+    for i, city, lat, lon, body in resolved:
+        if "error" in body:
+            results[i] = {"index": i, **body}
+            continue
+        results[i] = {
+            "index": i,
+            "city": city or f"{lat},{lon}",
+            "coordinates": {"latitude": lat, "longitude": lon},
+            **body
+        }
+    return results
+
+
+@app.post("/predict/batch")
+def predict_batch():
+    """Predict many locations in one call.
+
+    Body: {"locations": ["Delhi", {"city": "Mumbai"}, {"lat": 12.97, "lon": 77.59}]}
+    Locations are resolved and fetched concurrently, all uncached feature rows
+    are scored in one forward pass, and failures are reported per item.
+    """
+    data = request.get_json(silent=True) or {}
+    items = data.get("locations")
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "Provide a non-empty 'locations' list"}), 400
+    if len(items) > BATCH_MAX_ITEMS:
+        return jsonify({"error": f"At most {BATCH_MAX_ITEMS} locations per batch"}), 400
+
+    results = predict_many(items)
+    return jsonify({"count": len(results), "results": results})
+
+
+_openweather_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="openweather")
+
 def fetch_openweather(city: str):
     if not OPENWEATHER_API_KEY:
         raise RuntimeError("WEATHER_API_KEY is not set")
@@ -299,11 +578,15 @@ def fetch_openweather(city: str):
 
     params = {"q": city, "appid": OPENWEATHER_API_KEY, "units": "metric"}
 
-    cur = requests.get(current_url, params=params, timeout=10)
+    # both upstream calls in flight at once
+    cur_f = _openweather_pool.submit(HTTP.get, current_url, params=params, timeout=10)
+    fc_f = _openweather_pool.submit(HTTP.get, forecast_url, params=params, timeout=10)
+
+    cur = cur_f.result()
     cur.raise_for_status()
     current = cur.json()
 
-    fc = requests.get(forecast_url, params=params, timeout=10)
+    fc = fc_f.result()
     fc.raise_for_status()
     forecast = fc.json()
 
@@ -414,194 +697,225 @@ def map_openweather_to_frontend(city: str, lat: float, lon: float, ow: dict):
     return payload
 
 
-@app.route("/weather", methods=["GET"])
-def weather():
-    city = request.args.get("city")
-    if not city:
-        return jsonify({"error": "Provide ?city=Name"}), 400
+# --- OpenWeather payload assembly (cached per city and hour) ---
+WEATHER_PAYLOAD_CACHE = TTLCache(max_entries=int(os.environ.get("WEATHER_PAYLOAD_CACHE_MAX_ENTRIES", "1024")))
+WEATHER_FLIGHTS = SingleFlight("openweather")
+
+
+def _ow_icon(code):
+    return f"http://openweathermap.org/img/wn/{code}@2x.png"
+
+
+def openweather_forecastdays(fc: dict) -> list:
+    """Group the 3-hourly forecast list into up to 7 days with true daily aggregates."""
+    entries = fc.get("list") or []
+    if not entries:
+        return []
+    df = pd.DataFrame({
+        "dt": pd.to_datetime([e["dt"] for e in entries], unit="s", utc=True),
+        "temp": [e["main"]["temp"] for e in entries],
+        "temp_min": [e["main"]["temp_min"] for e in entries],
+        "temp_max": [e["main"]["temp_max"] for e in entries],
+        "feels_like": [e["main"]["feels_like"] for e in entries],
+        "pressure": [e["main"]["pressure"] for e in entries],
+        "humidity": [e["main"]["humidity"] for e in entries],
+        "wind_kph": [e["wind"]["speed"] * 3.6 for e in entries],
+        "wind_deg": [e["wind"]["deg"] for e in entries],
+        "cloud": [e["clouds"]["all"] for e in entries],
+        "rain_prob": [e.get("pop", 0.0) for e in entries],
+        "rain": [e.get("rain", {}).get("3h", 0.0) for e in entries],
+        "snow": [e.get("snow", {}).get("3h", 0.0) for e in entries],
+        "vis_km": [e.get("visibility", 10000) / 1000.0 for e in entries],
+        "desc": [e["weather"][0]["description"].title() for e in entries],
+        "icon": [e["weather"][0]["icon"] for e in entries],
+    })
+    df["day"] = df["dt"].dt.strftime("%Y-%m-%d")
+    df["precip"] = df["rain"] + df["snow"]
+
+    days = df.groupby("day", sort=True).agg(
+        maxtemp_c=("temp_max", "max"),
+        mintemp_c=("temp_min", "min"),
+        maxwind_kph=("wind_kph", "max"),
+        totalprecip_mm=("precip", "sum"),
+        avghumidity=("humidity", "mean"),
+        rain_prob=("rain_prob", "max"),
+        avgvis_km=("vis_km", "mean"),
+        desc=("desc", "first"),
+        icon=("icon", "first"),
+    ).head(7)
+
+    forecastdays = []
+    for day, d in days.iterrows():
+        rows = df[df["day"] == day]
+        forecastdays.append({
+            "date": day,
+            "day": {
+                "maxtemp_c": float(d.maxtemp_c),
+                "mintemp_c": float(d.mintemp_c),
+                "condition": {"text": d.desc, "icon": _ow_icon(d.icon)},
+                "maxwind_kph": float(d.maxwind_kph),
+                "totalprecip_mm": round(float(d.totalprecip_mm), 2),
+                "avghumidity": int(round(d.avghumidity)),
+                "daily_chance_of_rain": int(d.rain_prob * 100),
+                "avgvis_km": round(float(d.avgvis_km), 2),
+                "uv": None,
+            },
+            "hour": [{
+                "time": h.dt.isoformat(sep=" ", timespec="minutes"),
+                "temp_c": float(h.temp),
+                "condition": {"text": h.desc, "icon": _ow_icon(h.icon)},
+                "wind_kph": float(h.wind_kph),
+                "wind_dir": deg_to_compass(h.wind_deg),
+                "pressure_mb": int(h.pressure),
+                "precip_mm": float(h.rain),
+                "humidity": int(h.humidity),
+                "cloud": int(h.cloud),
+                "feelslike_c": float(h.feels_like),
+                "will_it_rain": 1 if h.rain_prob >= 0.5 else 0,
+                "chance_of_rain": int(h.rain_prob * 100)
+            } for h in rows.itertuples()]
+        })
+    return forecastdays
 
-    try:
-        # Test city bypass: Floodville -> return canned high-flood weather payload
-        if city.strip().lower() == 'floodville':
-            now = datetime.now(timezone.utc)
-            hourly = []
-            for h in range(24):
-                t = now + timedelta(hours=h)
-                hourly.append({
-                    "time": t.isoformat(sep=' ', timespec='minutes'),
-                    "temp_c": 24 + (h % 6),
-                    "condition": {"text": "Heavy rain", "icon": ""},
-                    "wind_kph": 12.0,
-                    "wind_dir": deg_to_compass(180),
-                    "pressure_mb": 1005,
-                    "precip_mm": 8.0 + (h % 3),
-                    "humidity": 90,
-                    "cloud": 100,
-                    "feelslike_c": 24.0
-                })
-
-            forecastdays = []
-            for d in range(7):
-                day = (now.date() + timedelta(days=d)).isoformat()
-                forecastdays.append({
-                    "date": day,
-                    "day": {
-                        "maxtemp_c": 28 + d,
-                        "mintemp_c": 20 + d,
-                        "condition": {"text": "Heavy rain", "icon": ""},
-                        "maxwind_kph": 20.0,
-                        "totalprecip_mm": 50.0 + d*5,
-                        "avghumidity": 88,
-                        "daily_chance_of_rain": 90,
-                        "avgvis_km": 2.0,
-                        "uv": 1
-                    },
-                    "hour": []
-                })
-
-            # attach hourly to first day
-            if forecastdays:
-                forecastdays[0]["hour"] = hourly
-
-            payload = {
-                "location": {"name": city, "country": "TX"},
-                "current": {
-                    "temp_c": 25.0,
-                    "temp_f": 77.0,
-                    "condition": {"text": "Heavy rain", "icon": ""},
-                    "wind_kph": 12.0,
-                    "wind_dir": "S",
-                    "pressure_mb": 1005,
-                    "humidity": 95,
-                    "cloud": 100,
-                    "feelslike_c": 25.0,
-                    "vis_km": 1.5,
-                },
-                "forecast": {"forecastday": forecastdays}
-            }
-            return jsonify(payload)
 
-        cur, fc = fetch_openweather(city)
+def _assemble_weather(key, city):
+    cur, fc = fetch_openweather(city)
 
-        # Current
-        cur_data = {
-            "temp_c": cur["main"]["temp"],
-            "temp_f": cur["main"]["temp"] * 9/5 + 32,
-            "condition": {
-                "text": cur["weather"][0]["description"].title(),
-                "icon": f"http://openweathermap.org/img/wn/{cur['weather'][0]['icon']}@2x.png"
+    # Current
+    cur_data = {
+        "temp_c": cur["main"]["temp"],
+        "temp_f": cur["main"]["temp"] * 9/5 + 32,
+        "condition": {
+            "text": cur["weather"][0]["description"].title(),
+            "icon": _ow_icon(cur["weather"][0]["icon"])
+        },
+        "wind_kph": cur["wind"]["speed"] * 3.6,
+        "wind_dir": deg_to_compass(cur["wind"]["deg"]),
+        "pressure_mb": cur["main"]["pressure"],
+        "humidity": cur["main"]["humidity"],
+        "cloud": cur["clouds"]["all"],
+        "feelslike_c": cur["main"]["feels_like"],
+        "vis_km": cur.get("visibility", 10000) / 1000.0,
+    }
+
+    payload = {
+        "location": {"name": city, "country": cur["sys"]["country"]},
+        "current": cur_data,
+        "forecast": {"forecastday": openweather_forecastdays(fc)}
+    }
+    WEATHER_PAYLOAD_CACHE.set(key, payload, expires_at=next_hour_boundary())
+    return payload
+
+
+def floodville_weather(city: str) -> dict:
+    """Canned high-flood weather payload for the Floodville test city."""
+    now = datetime.now(timezone.utc)
+    hourly = []
+    for h in range(24):
+        t = now + timedelta(hours=h)
+        hourly.append({
+            "time": t.isoformat(sep=' ', timespec='minutes'),
+            "temp_c": 24 + (h % 6),
+            "condition": {"text": "Heavy rain", "icon": ""},
+            "wind_kph": 12.0,
+            "wind_dir": deg_to_compass(180),
+            "pressure_mb": 1005,
+            "precip_mm": 8.0 + (h % 3),
+            "humidity": 90,
+            "cloud": 100,
+            "feelslike_c": 24.0
+        })
+
+    forecastdays = []
+    for d in range(7):
+        day = (now.date() + timedelta(days=d)).isoformat()
+        forecastdays.append({
+            "date": day,
+            "day": {
+                "maxtemp_c": 28 + d,
+                "mintemp_c": 20 + d,
+                "condition": {"text": "Heavy rain", "icon": ""},
+                "maxwind_kph": 20.0,
+                "totalprecip_mm": 50.0 + d*5,
+                "avghumidity": 88,
+                "daily_chance_of_rain": 90,
+                "avgvis_km": 2.0,
+                "uv": 1
             },
-            "wind_kph": cur["wind"]["speed"] * 3.6,
-            "wind_dir": deg_to_compass(cur["wind"]["deg"]),
-            "pressure_mb": cur["main"]["pressure"],
-            "humidity": cur["main"]["humidity"],
-            "cloud": cur["clouds"]["all"],
-            "feelslike_c": cur["main"]["feels_like"],
-            "vis_km": cur.get("visibility", 10000) / 1000.0,
-        }
+            "hour": []
+        })
 
-        # Forecast → group by day
-        daily = {}
-        for entry in fc["list"]:
-            dt = datetime.fromtimestamp(entry["dt"], tz=timezone.utc)
-            day = dt.date().isoformat()
-            if day not in daily:
-                daily[day] = {
-                    "date": day,
-                    "day": {
-                        "maxtemp_c": entry["main"]["temp_max"],
-                        "mintemp_c": entry["main"]["temp_min"],
-                        "condition": {
-                            "text": entry["weather"][0]["description"].title(),
-                            "icon": f"http://openweathermap.org/img/wn/{entry['weather'][0]['icon']}@2x.png"
-                        },
-                        "maxwind_kph": entry["wind"]["speed"] * 3.6,
-                        "totalprecip_mm": entry.get("rain", {}).get("3h", 0.0),
-                        "avghumidity": entry["main"]["humidity"],
-                        "daily_chance_of_rain": int(entry.get("pop", 0.0) * 100),
-                        "avgvis_km": entry.get("visibility", 10000) / 1000.0,
-                        "uv": None,
-                    },
-                    "hour": []
-                }
+    # attach hourly to first day
+    if forecastdays:
+        forecastdays[0]["hour"] = hourly
 
-            daily[day]["hour"].append({
-                "time": dt.isoformat(sep=" ", timespec="minutes"),
-                "temp_c": entry["main"]["temp"],
-                "condition": {
-                    "text": entry["weather"][0]["description"].title(),
-                    "icon": f"http://openweathermap.org/img/wn/{entry['weather'][0]['icon']}@2x.png"
-                },
-                "wind_kph": entry["wind"]["speed"] * 3.6,
-                "wind_dir": deg_to_compass(entry["wind"]["deg"]),
-                "pressure_mb": entry["main"]["pressure"],
-                "precip_mm": entry.get("rain", {}).get("3h", 0.0),
-                "humidity": entry["main"]["humidity"],
-                "cloud": entry["clouds"]["all"],
-                "feelslike_c": entry["main"]["feels_like"],
-                "will_it_rain": 1 if entry.get("pop", 0.0) >= 0.5 else 0,
-                "chance_of_rain": int(entry.get("pop", 0.0) * 100)
-            })
-
-        forecastdays = list(daily.values())[:7]
-
-        payload = {
-            "location": {"name": city, "country": cur["sys"]["country"]},
-            "current": cur_data,
-            "forecast": {"forecastday": forecastdays}
-        }
+    payload = {
+        "location": {"name": city, "country": "TX"},
+        "current": {
+            "temp_c": 25.0,
+            "temp_f": 77.0,
+            "condition": {"text": "Heavy rain", "icon": ""},
+            "wind_kph": 12.0,
+            "wind_dir": "S",
+            "pressure_mb": 1005,
+            "humidity": 95,
+            "cloud": 100,
+            "feelslike_c": 25.0,
+            "vis_km": 1.5,
+        },
+        "forecast": {"forecastday": forecastdays}
+    }
+    return payload
 
-        return jsonify(payload)
+
+def weather_for_city(city: str) -> dict:
+    """In-process equivalent of GET /weather?city= (cached per city and hour)."""
+    # Test city bypass: Floodville -> return canned high-flood weather payload
+    if city.strip().lower() == 'floodville':
+        return floodville_weather(city)
+    key = (" ".join(city.split()).casefold(), hour_bucket())
+    payload = WEATHER_PAYLOAD_CACHE.get(key)
+    if payload is None:
+        payload = WEATHER_FLIGHTS.do(key, _assemble_weather, key, city)
+    # the cached payload is shared by every spelling of the city; echo this caller's
+    return {**payload, "location": {**payload["location"], "name": city}}
+
+
+@app.route("/weather", methods=["GET"])
+def weather():
+    city = request.args.get("city")
+    if not city:
+        return jsonify({"error": "Provide ?city=Name"}), 400
+
+    try:
+        return jsonify(weather_for_city(city))
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     
 
 @app.route("/weather/history", methods=["GET"])
 def weather_history():
+    """Daily summaries for ?city= over ?start=&end= (ISO dates, default the last two days)."""
     city = request.args.get("city")
     if not city:
         return jsonify({"error": "Provide ?city=Name"}), 400
 
     try:
-        api_key = os.environ.get("WEATHER_API_KEY_HISTORY", "")
-        if not api_key:
-            return jsonify({"error": "WEATHER_API_KEY_HISTORY not set"}), 500
-
-        # yesterday and day before yesterday
-        end_date = datetime.now(timezone.utc).date() - timedelta(days=1)
-        start_date = end_date - timedelta(days=1)
-
-        history = []
-
-        for d in [start_date, end_date]:
-            url = "http://api.weatherapi.com/v1/history.json"
-            params = {
-                "key": api_key,
-                "q": city,
-                "dt": d.isoformat()
-            }
-            r = requests.get(url, params=params, timeout=10)
-            r.raise_for_status()
-            data = r.json()
-
-            if "forecast" not in data or not data["forecast"]["forecastday"]:
-                continue
-
-            day_data = data["forecast"]["forecastday"][0]["day"]
-
-            history.append({
-                "date": d.isoformat(),
-                "maxTemp": day_data.get("maxtemp_c"),
-                "minTemp": day_data.get("mintemp_c"),
-                "humidity": day_data.get("avghumidity"),
-                "precipitation": day_data.get("totalprecip_mm"),
-                "windSpeed": day_data.get("maxwind_kph"),
-            })
-
-        return jsonify({"city": city, "history": history})
+        yesterday = datetime.now(timezone.utc).date() - timedelta(days=1)
+        end_date = date.fromisoformat(request.args["end"]) if request.args.get("end") else yesterday
+        start_date = date.fromisoformat(request.args["start"]) if request.args.get("start") else end_date - timedelta(days=1)
+    except ValueError:
+        return jsonify({"error": "start and end must be YYYY-MM-DD dates"}), 400
+    if start_date > end_date:
+        return jsonify({"error": "start must not be after end"}), 400
 
+    try:
+        history = WEATHER_HISTORY.get_range(city, start_date, end_date)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+    return jsonify({"city": city, "history": history})
 
 
 # Temporary route to manually trigger the background alert job
@@ -609,8 +923,8 @@ def weather_history():
 def run_auto_check():
     try:
         app.logger.info("Manual trigger: running periodic risk check...")
-        periodic_risk_check()
-        return jsonify({"status": "ok"})
+        summary = periodic_risk_check()
+        return jsonify({"status": "ok" if summary is not None else "skipped", "summary": summary})
     except Exception as e:
         app.logger.exception("run_auto_check failed: %s", e)
         return jsonify({"status": "error", "error": str(e)}), 500
@@ -618,7 +932,6 @@ def run_auto_check():
 
 
 # --- automatic alert scheduler (add near bottom of app.py) ---
-from apscheduler.schedulers.background import BackgroundScheduler
 from datetime import datetime
 import time
 import os
@@ -629,24 +942,9 @@ ALERT_INTERVAL_MINUTES = float(os.environ.get("ALERT_INTERVAL_MINUTES", "1"))
 COOLDOWN_MINUTES = int(os.environ.get("ALERT_COOLDOWN_MINUTES", "1"))
 ALERT_FLOOD_THRESHOLD = float(os.environ.get("ALERT_FLOOD_THRESHOLD", "0.7"))
 ALERT_FIRE_THRESHOLD = float(os.environ.get("ALERT_FIRE_THRESHOLD", "0.7"))
-INTERNAL_BASE_URL = os.environ.get("INTERNAL_BASE_URL", "https://earthpulse-backend-48598371636.asia-south1.run.app").rstrip("/")
-
-_last_alert_sent = {}
-
-def _should_send_alert(key: str) -> bool:
-    last = _last_alert_sent.get(key)
-    if not last:
-        return True
-    return (time.time() - last) >= (COOLDOWN_MINUTES * 60)
-
-def _mark_alert_sent(key: str):
-    _last_alert_sent[key] = time.time()
-
-
-
-from requests.utils import quote
 
 def send_alert_sms(alert_msg: str):
+    """Send an SMS through Fast2SMS; raises when the message was not accepted."""
     url = "https://www.fast2sms.com/dev/bulkV2"
 
     payload = {
@@ -662,70 +960,97 @@ def send_alert_sms(alert_msg: str):
     }
 
     try:
-        response = requests.post(url, data=payload, headers=headers)
-        print("FAST2SMS STATUS:", response.status_code)
-        print("FAST2SMS RAW:", response.text)   # 👈 ALWAYS LOG RAW RESPONSE
-        return response.json()
+        response = HTTP.post(url, data=payload, headers=headers)
     except Exception as e:
         print("FAST2SMS ERROR:", str(e))
-        return {"error": str(e)}
-
-
+        raise
+    print("FAST2SMS STATUS:", response.status_code)
+    print("FAST2SMS RAW:", response.text)   # 👈 ALWAYS LOG RAW RESPONSE
+    if not 200 <= response.status_code < 300:
+        raise RuntimeError(f"Fast2SMS returned {response.status_code}")
+    try:
+        result = response.json()
+    except ValueError:
+        raise RuntimeError("Fast2SMS returned a non-JSON response")
+    # Fast2SMS reports rejected messages with "return": false
+    if result.get("return") is False:
+        raise RuntimeError(f"Fast2SMS rejected the message: {result.get('message')}")
+    return result
+
+
+
+
+def _push_alert(title, body, tag):
+    """Alert notifier; raises (PushUnavailable included) when no subscriber was reached."""
+    result = send_push(title, body, tag)
+    if result["errors"] and not result["sent"]:
+        raise RuntimeError(f"web push failed for all subscriptions: {result['errors'][0]}")
+
+
+def _sms_alert(title, body, tag):
+    send_alert_sms(body)
+
+
+def _observe_alert_city(city, model_feats, version):
+    """(fingerprint, (lat, lon, feature_row)) of a city's latest weather frame and features."""
+    lat, lon = locate(city)
+    if is_floodville(city):
+        # canned risk; a new fingerprint each hour so the test alert keeps firing
+        return f"floodville:{hour_bucket()}", (lat, lon, None)
+    wx = fetch_realtime_cached(lat, lon, timezone_name="auto")
+    row = latest_feature_row(engineer_features(wx, model_feats), model_feats)
+    h = hashlib.blake2b(str(version).encode(), digest_size=16)
+    h.update(pd.util.hash_pandas_object(wx, index=True).to_numpy().tobytes())
+    h.update(row.to_numpy(dtype="float64").tobytes())
+    return h.hexdigest(), (lat, lon, row)
+
+
+def _observe_alert_cities(cities, timeout):
+    """{city: (fingerprint, payload) | Exception} for the cities observed within timeout."""
+    runtime = get_models()
+    futures = {city: _batch_pool.submit(_observe_alert_city, city, runtime.features, runtime.version)
+               for city in cities}
+    wait(futures.values(), timeout=timeout)
+    out = {}
+    for city, fut in futures.items():
+        if fut.done():
+            out[city] = fut.exception() or fut.result()
+    return out
+
+
+def _score_alert_cities(payloads):
+    """{city: (flood, fire)} for the changed cities, one forward pass for all of them."""
+    out = {city: (0.95, 0.05) for city, (_, _, row) in payloads.items() if row is None}   # Floodville
+    rows = [(city, loc) for city, loc in payloads.items() if loc[2] is not None]
+    if rows:
+        bodies = score_feature_rows([loc for _, loc in rows])
+        for (city, _), body in zip(rows, bodies):
+            out[city] = (body["flood"]["probability"], body["wildfire"]["probability"])
+    return out
+
+
+ALERTS = AlertEngine(
+    observe=_observe_alert_cities,
+    score=_score_alert_cities,
+    notifiers=[_push_alert, _sms_alert],
+    flood_threshold=ALERT_FLOOD_THRESHOLD,
+    fire_threshold=ALERT_FIRE_THRESHOLD,
+    cooldown_s=COOLDOWN_MINUTES * 60,
+    log=app.logger.warning
+)
 
 
 def periodic_risk_check():
     app.logger.info("💡 Scheduler heartbeat: checking risk at %s", datetime.now().strftime("%H:%M:%S"))
-    app.logger.info("Periodic risk check started")
-    for city in ALERT_CITIES:
-        try:
-            url = f"{INTERNAL_BASE_URL}/predict"
-            r = requests.get(url, params={"city": city}, timeout=30)
-            r.raise_for_status()
-            res = r.json()
-            # extract flood/fire probability resiliently
-            flood_prob = (res.get("flood") or {}).get("probability") if isinstance(res.get("flood"), dict) else res.get("flood")
-            fire_prob  = (res.get("wildfire") or {}).get("probability") if isinstance(res.get("wildfire"), dict) else res.get("wildfire")
-
-            # flood alert
-            if flood_prob is not None and float(flood_prob) >= ALERT_FLOOD_THRESHOLD:
-                key = f"{city}:flood"
-                if _should_send_alert(key):
-                    title = f"{city}: HIGH Flood Risk"
-                    body = (
-                        f"[EarthPulse Alert]\n"
-                        f"City: {city}\n"
-                        f"Flood Risk: {(float(flood_prob)*100):.0f}%\n"
-                        f"Stay alert and avoid low-lying areas."
-                    )
-                    tag = f"earthpulse:{city}:flood:{int(time.time())}"
-                    requests.post(f"{INTERNAL_BASE_URL}/push/test", json={"title": title, "body": body, "tag": tag}, timeout=30)
-                    send_alert_sms(body)
-                    _mark_alert_sent(key)
-                    app.logger.info(f"Auto-alert flood for {city} sent")
-
-            # fire alert
-            if fire_prob is not None and float(fire_prob) >= ALERT_FIRE_THRESHOLD:
-                key = f"{city}:fire"
-                if _should_send_alert(key):
-                    title = f"{city}: HIGH Fire Risk"
-                    body = (
-                        f"[EarthPulse Alert]\n"
-                        f"City: {city}\n"
-                        f"Wildfire Risk: {(float(fire_prob)*100):.0f}%\n"
-                        f"Exercise caution and avoid dry vegetation."
-                    )
-                    tag = f"earthpulse:{city}:fire:{int(time.time())}"
-                    requests.post(f"{INTERNAL_BASE_URL}/push/test", json={"title": title, "body": body, "tag": tag}, timeout=30)
-                    send_alert_sms(body)
-                    _mark_alert_sent(key)
-                    app.logger.info(f"Auto-alert fire for {city} sent")
-
-        except Exception as e:
-            app.logger.exception(f"Auto-alert error for {city}: {e}")
+    summary = ALERTS.run(ALERT_CITIES)
+    if summary is not None:
+        app.logger.info("Periodic risk check: %s", summary)
+    return summary
 
 # Start scheduler only when running main (prevents double-start with debug reloader)
 def start_alert_scheduler():
     try:
+        from apscheduler.schedulers.background import BackgroundScheduler
         scheduler = BackgroundScheduler()
         # Delay first check by 10 seconds to ensure Flask server is ready
         from datetime import datetime, timedelta
@@ -733,6 +1058,8 @@ def start_alert_scheduler():
             periodic_risk_check,
             "interval",
             minutes=ALERT_INTERVAL_MINUTES,
+            max_instances=1,
+            coalesce=True,
             next_run_time=datetime.now() + timedelta(seconds=10)
         )
         app.logger.info("⚙️  Starting background alert scheduler ... (first run delayed 10s)")
@@ -746,50 +1073,13 @@ def start_alert_scheduler():
 
 @app.get("/api/hotspots")
 def api_hotspots():
+    """NASA FIRMS VIIRS active fires (last 24h) within radius_km, from the in-memory index."""
     try:
         lat = float(request.args.get("lat"))
         lon = float(request.args.get("lon"))
         radius_km = float(request.args.get("radius_km", 200))
 
-        # NASA FIRMS VIIRS Active Fire Data (last 24h)
-        url = (
-            "https://firms.modaps.eosdis.nasa.gov/"
-            "api/area/csv/?country=india&source=viirs&timeWindow=24"
-        )
-
-        try:
-            df = pd.read_csv(url)
-        except Exception as e:
-            app.logger.error("Hotspot CSV load error: %s", e)
-            return jsonify([])
-
-        if df.empty:
-            return jsonify([])
-
-        # Required columns check
-        if not {"latitude", "longitude", "confidence"}.issubset(df.columns):
-            return jsonify([])
-
-        # Haversine filter
-        def haversine(lat1, lon1, lat2, lon2):
-            from math import radians, sin, cos, atan2, sqrt
-            R = 6371
-            dlat = radians(lat2 - lat1)
-            dlon = radians(lon2 - lon1)
-            a = sin(dlat/2)**2 + cos(radians(lat1))*cos(radians(lat2))*sin(dlon/2)**2
-            return R * 2 * atan2(sqrt(a), sqrt(1 - a))
-
-        hotspots = []
-        for _, row in df.iterrows():
-            dist = haversine(lat, lon, row["latitude"], row["longitude"])
-            if dist <= radius_km:
-                hotspots.append({
-                    "lat": float(row["latitude"]),
-                    "lon": float(row["longitude"]),
-                    "confidence": float(row["confidence"]),
-                })
-
-        return jsonify(hotspots)
+        return jsonify(HOTSPOTS.query(lat, lon, radius_km))
 
     except Exception as e:
         app.logger.exception("Hotspot API error: %s", e)
@@ -802,97 +1092,293 @@ def api_hotspots():
 
 @app.get("/api/flood_zones")
 def api_flood_zones():
+    """Flood zones (buffered waterways) within 15 km, with severity = current flood probability of each zone's cell."""
     try:
         lat = float(request.args.get("lat"))
         lon = float(request.args.get("lon"))
     except:
         return jsonify({"error": "lat/lon required"}), 400
 
-    size = 0.07  # degrees ~7km
-
-    polygon = {
-        "type": "FeatureCollection",
-        "features": [
-            {
-                "type": "Feature",
-                "properties": {"zone": "Flood Risk", "severity": 0.7},
-                "geometry": {
-                    "type": "Polygon",
-                    "coordinates": [[
-                        [lon - size, lat - size],
-                        [lon + size, lat - size],
-                        [lon + size, lat + size],
-                        [lon - size, lat + size],
-                        [lon - size, lat - size],
-                    ]]
-                }
-            }
-        ]
-    }
+    dlat = 15.0 / 111.0
+    dlon = 15.0 / (111.0 * max(np.cos(np.radians(lat)), 1e-6))
+    try:
+        zones = FLOOD_ZONES.zones_in_bbox(lat - dlat, lon - dlon, lat + dlat, lon + dlon)
+    except Exception as e:
+        print("❌ Flood zone lookup failure:", e)
+        return jsonify({"error": "flood_zones_unavailable"}), 502
 
-    return jsonify(polygon)
+    try:
+        probs = _cell_probs(list(dict.fromkeys(cell for cell, _ in zones)))
+    except Exception as e:
+        print("❌ Flood zone severity failure:", e)
+        probs = {}
+
+    from shapely.geometry import mapping as shapely_mapping  # only this route needs GeoJSON output
+
+    features = []
+    for cell, poly in zones:
+        flood = probs[cell][0] if cell in probs else None
+        features.append({
+            "type": "Feature",
+            "properties": {"zone": "Flood Risk",
+                           "severity": round(flood, 3) if flood is not None else None,
+                           "label": risk_label(flood) if flood is not None else None},
+            "geometry": shapely_mapping(poly)
+        })
 
+    return jsonify({"type": "FeatureCollection", "features": features})
+
+
+# --- Risk lattice over a bounding box ---
+# a grid's frames must fit in WEATHER_CACHE next to other traffic, or it evicts itself
+RISK_GRID_MAX_CELLS = min(int(os.environ.get("RISK_GRID_MAX_CELLS", "1024")), WEATHER_CACHE.max_entries // 2)
+GRID_CACHE = TTLCache(max_entries=int(os.environ.get("GRID_CACHE_MAX_ENTRIES", "20000")))
+
+
+def _cell_probs(cells):
+    """(flood, wildfire) per grid cell; misses are fetched in bulk and scored in one pass."""
+    runtime = get_models()
+    version, hour = runtime.version, hour_bucket()
+    out = {}
+    misses = []
+    for cell in cells:
+        key = (cell, version, hour)
+        hit = GRID_CACHE.get(key)
+        if hit is None:
+            # a /predict for the same cell this hour already holds the answer
+            body = PREDICT_CACHE.get(key)
+            if body is not None:
+                hit = (body["flood"]["probability"], body["wildfire"]["probability"])
+        if hit is not None:
+            out[cell] = hit
+        else:
+            misses.append(cell)
 
+    if misses:
+        frames = WEATHER_CACHE.get_many(misses, timezone_name="auto")
+        rows, scored = [], []
+        for cell, wx in zip(misses, frames):
+            if wx is None:
+                continue
+            feats = engineer_features(wx, runtime.features)
+            if feats.shape[0]:
+                rows.append(feats.iloc[[-1]])
+                scored.append(cell)
+        if rows:
+            probs = infer(runtime.align(pd.concat(rows, ignore_index=True)))
+            expires_at = next_hour_boundary()
+            for r, cell in enumerate(scored):
+                out[cell] = (float(probs["flood"][r]), float(probs["wildfire"][r]))
+                GRID_CACHE.set((cell, version, hour), out[cell], expires_at=expires_at)
+    return out
+
+
+@app.get("/api/risk_grid")
+def api_risk_grid():
+    """Flood / wildfire probabilities on a regular lattice.
+
+    Query: bbox=west,south,east,north (Leaflet's toBBoxString order) and
+    res in degrees (default and minimum: the weather grid, 0.1).
+    Values are row-major [lat][lon], null where weather was unavailable.
+    """
+    try:
+        west, south, east, north = (float(v) for v in request.args.get("bbox", "").split(","))
+        res = float(request.args.get("res", GRID_DEG))
+    except ValueError:
+        return jsonify({"error": "bbox=west,south,east,north required"}), 400
+    if not (west < east and south < north and -90 <= south and north <= 90
+            and -180 <= west and east <= 180):
+        return jsonify({"error": "Invalid bbox"}), 400
+    if not np.isfinite(res):
+        return jsonify({"error": "res must be a finite number of degrees"}), 400
+    res = max(res, GRID_DEG)
+
+    # lattice points sit on multiples of res, so each one snaps to its own weather cell
+    lats = np.arange(np.ceil(south / res) * res, north, res)
+    lons = np.arange(np.ceil(west / res) * res, east, res)
+    if len(lats) * len(lons) > RISK_GRID_MAX_CELLS:
+        return jsonify({"error": f"At most {RISK_GRID_MAX_CELLS} cells; increase res or shrink bbox"}), 400
+
+    cells = [[snap_to_grid(la, lo) for lo in lons] for la in lats]
+    try:
+        probs = _cell_probs(list(dict.fromkeys(c for row in cells for c in row)))
+    except Exception as e:
+        print("❌ Risk grid failure:", e)
+        return jsonify({"error": "model_failure"}), 500
 
+    def layer(i):
+        return [[round(probs[c][i], 4) if c in probs else None for c in row] for row in cells]
 
+    return jsonify({
+        "bbox": [west, south, east, north],
+        "res": res,
+        "lats": [round(float(v), 4) for v in lats],
+        "lons": [round(float(v), 4) for v in lons],
+        "flood": layer(0),
+        "wildfire": layer(1)
+    })
 
 
+# --- Risk heatmap tiles: /tiles/<hazard>/<z>/<x>/<y>.png ---
+TILE_MIN_ZOOM = int(os.environ.get("TILE_MIN_ZOOM", "4"))
+TILE_MAX_ZOOM = int(os.environ.get("TILE_MAX_ZOOM", "18"))
+TILE_FLIGHTS = SingleFlight("tiles")
 
 
+def _render_tile(generation, hazard, z, x, y):
+    png = TILE_CACHE.get(generation, hazard, z, x, y)
+    if png is not None:
+        return png
 
+    res = sample_res(z, GRID_DEG)
+    lat_idx, lon_idx = pixel_lattice(z, x, y, res)
+    lat_cells, lat_inv = np.unique(lat_idx, return_inverse=True)
+    lon_cells, lon_inv = np.unique(lon_idx, return_inverse=True)
+    cells = [snap_to_grid(i * res, j * res) for i in lat_cells for j in lon_cells]
 
-import requests
-@app.get("/api/waterways")
-def get_waterways():
-    lat = float(request.args.get("lat"))
-    lon = float(request.args.get("lon"))
-    radius = 25000  # 25 km
+    # shared with /api/risk_grid and neighbouring tiles via GRID_CACHE / WEATHER_CACHE
+    probs = _cell_probs(list(dict.fromkeys(cells)))
+    h = 0 if hazard == "flood" else 1
+    lattice = np.array([probs[c][h] if c in probs else np.nan for c in cells], dtype="float32")
+    lattice = lattice.reshape(len(lat_cells), len(lon_cells))
 
-    query = f"""
-    [out:json][timeout:25];
-(
-  way["waterway"](around:15000, {lat}, {lon});
-  way["waterway"~"river|stream|canal|ditch|drain"](around:15000, {lat}, {lon});
-  relation["waterway"](around:15000, {lat}, {lon});
+    png = render_png(lattice[lat_inv][:, lon_inv], hazard)
+    TILE_CACHE.put(generation, hazard, z, x, y, png)
+    return png
 
-  way["natural"="water"](around:15000, {lat}, {lon});
-  relation["natural"="water"](around:15000, {lat}, {lon});
 
-  way["landuse"="reservoir"](around:15000, {lat}, {lon});
-  way["waterway"](around:15000, {lat}, {lon});
+@app.get("/tiles/<hazard>/<int:z>/<int:x>/<int:y>.png")
+def risk_tile(hazard, z, x, y):
+    if hazard not in ("flood", "wildfire"):
+        return jsonify({"error": "hazard must be flood or wildfire"}), 404
+    if not (TILE_MIN_ZOOM <= z <= TILE_MAX_ZOOM and 0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        return jsonify({"error": f"Tile out of range (zoom {TILE_MIN_ZOOM}-{TILE_MAX_ZOOM})"}), 400
 
-);
-out geom;
+    generation = f"{hour_bucket()}-{get_models().version}"
+    try:
+        png = TILE_FLIGHTS.do((generation, hazard, z, x, y), _render_tile, generation, hazard, z, x, y)
+    except Exception as e:
+        print("❌ Tile render failure:", e)
+        return jsonify({"error": "model_failure"}), 500
 
-    """
+    resp = app.response_class(png, mimetype="image/png")
+    resp.headers["Cache-Control"] = f"public, max-age={max(0, int(next_hour_boundary() - time.time()))}"
+    return resp
 
-    overpass_url = "https://overpass-api.de/api/interpreter"
+
+# --- Vector tiles: /mvt/<layer>/<z>/<x>/<y>.pbf ---
+# waterways from z10: a tile (~0.35°) then spans at most 4 Overpass fetch tiles
+MVT_MIN_ZOOM = {"waterways": 10, "hotspots": 3, "flood_zones": TILE_MIN_ZOOM}
+MVT_CACHE = TTLCache(max_entries=int(os.environ.get("MVT_CACHE_MAX_ENTRIES", "4096")))
+FLOOD_ZONE_MIN_PROB = float(os.environ.get("FLOOD_ZONE_MIN_PROB", "0.5"))
+# from this zoom the layer draws the precomputed waterway-buffer zones
+FLOOD_ZONE_POLYGON_ZOOM = 10
+
+
+def _mvt_waterways(layer, south, west, north, east, z):
+    for osm_id, kind, coords in WATERWAYS.ways_in_bbox(south, west, north, east, zoom=z):
+        layer.add_line(coords, {"type": kind}, fid=osm_id)
+
+
+def _mvt_hotspots(layer, south, west, north, east, z):
+    snap = HOTSPOTS.current()
+    if snap is None:
+        return
+    lats, lons, conf = snap.in_bbox(south, west, north, east)
+    layer.add_points(lons, lats, [{"confidence": None if np.isnan(c) else float(c)} for c in conf.tolist()])
+
+
+def _mvt_flood_zones(layer, south, west, north, east, z):
+    """Buffered-waterway zones when zoomed in, otherwise lattice cells whose flood probability is high."""
+    if z >= FLOOD_ZONE_POLYGON_ZOOM:
+        zones = FLOOD_ZONES.zones_in_bbox(south, west, north, east)
+        probs = _cell_probs(list(dict.fromkeys(cell for cell, _ in zones)))
+        for cell, poly in zones:
+            if cell in probs:
+                rings = [poly.exterior.coords] + [r.coords for r in poly.interiors]
+                layer.add_polygon(rings, {"zone": "Flood Risk", "severity": round(probs[cell][0], 3)})
+        return
+
+    res = sample_res(z, GRID_DEG)
+    cells = [snap_to_grid(i * res, j * res)
+             for i in range(int(np.floor(south / res)), int(np.ceil(north / res)) + 1)
+             for j in range(int(np.floor(west / res)), int(np.ceil(east / res)) + 1)]
+    probs = _cell_probs(list(dict.fromkeys(cells)))
+    h = res / 2
+    for (clat, clon), (flood, _) in probs.items():
+        if flood >= FLOOD_ZONE_MIN_PROB:
+            ring = [[clon - h, clat - h], [clon + h, clat - h], [clon + h, clat + h], [clon - h, clat + h]]
+            layer.add_polygon([ring], {"zone": "Flood Risk", "severity": round(flood, 3)})
+
+
+MVT_SOURCES = {"waterways": _mvt_waterways, "hotspots": _mvt_hotspots, "flood_zones": _mvt_flood_zones}
+
+
+def _mvt_generation(name):
+    """(cache generation, seconds until the layer's data may change)"""
+    if name == "waterways":
+        return "osm", 86400
+    if name == "hotspots":
+        snap = HOTSPOTS.current()
+        fetched_at = snap.fetched_at if snap is not None else 0.0
+        return str(int(fetched_at)), int(HOTSPOTS.refresh_seconds)
+    return f"{hour_bucket()}-{get_models().version}", max(0, int(next_hour_boundary() - time.time()))
+
+
+def _render_mvt(name, z, x, y):
+    west, south, east, north = tile_bounds(z, x, y)
+    # include the clip buffer so features just outside the tile still reach its edge
+    pad_x, pad_y = (east - west) * MVT_BUFFER / MVT_EXTENT, (north - south) * MVT_BUFFER / MVT_EXTENT
+    layer = MVTLayer(name, z, x, y)
+    MVT_SOURCES[name](layer, south - pad_y, west - pad_x, north + pad_y, east + pad_x, z)
+    return encode_tile([layer])
+
+
+@app.get("/mvt/<layer>/<int:z>/<int:x>/<int:y>.pbf")
+def vector_tile(layer, z, x, y):
+    if layer not in MVT_SOURCES:
+        return jsonify({"error": f"layer must be one of {sorted(MVT_SOURCES)}"}), 404
+    if not (0 <= z <= TILE_MAX_ZOOM and 0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        return jsonify({"error": "Tile out of range"}), 400
 
     try:
-        r = requests.post(overpass_url, data=query, headers={"Content-Type":"application/x-www-form-urlencoded"})
-        data = r.json()
-
-        features = []
-        for el in data.get("elements", []):
-            if el.get("geometry"):
-                coords = [[p["lon"], p["lat"]] for p in el["geometry"]]
-                features.append({
-                    "type": "Feature",
-                    "geometry": {
-                        "type": "LineString",
-                        "coordinates": coords
-                    },
-                    "properties": {
-                        "id": el.get("id"),
-                        "type": el.get("tags", {}).get("waterway")
-                    }
-                })
-
-        return jsonify({
-            "type": "FeatureCollection",
-            "features": features
-        })
-        
+        if z < MVT_MIN_ZOOM[layer]:
+            # too coarse for this layer: an empty (zero-layer) tile
+            data, max_age = b"", 86400
+        else:
+            generation, max_age = _mvt_generation(layer)
+            key = (layer, z, x, y, generation)
+            data = MVT_CACHE.get(key)
+            if data is None:
+                data = TILE_FLIGHTS.do(key, _render_mvt, layer, z, x, y)
+                MVT_CACHE.set(key, data, expires_at=time.time() + max_age)
+    except Exception:
+        app.logger.exception("Vector tile failure: %s/%s/%s/%s", layer, z, x, y)
+        return jsonify({"error": "tile_render_failure"}), 500
+
+    resp = app.response_class(data, mimetype="application/vnd.mapbox-vector-tile")
+    resp.headers["Cache-Control"] = f"public, max-age={max_age}"
+    resp.set_etag(hashlib.sha1(data).hexdigest()[:16])
+    return resp.make_conditional(request)
+
+
+
+
+
+
+
+
+
+
+@app.get("/api/waterways")
+def get_waterways():
+    """Waterways within 15 km, from the persistent tile store, simplified for ?zoom= (default 12)."""
+    lat = float(request.args.get("lat"))
+    lon = float(request.args.get("lon"))
+    zoom = max(0, min(18, request.args.get("zoom", default=12, type=int)))
+
+    try:
+        return jsonify(WATERWAYS.features(lat, lon, radius_km=15.0, zoom=zoom))
     except Exception as e:
         return jsonify({"error": str(e)})
 
@@ -903,32 +1389,20 @@ def google_nearby_ngos():
     lon = float(request.args.get("lon"))
     radius = 5000
 
-    url = "https://places.googleapis.com/v1/places:searchNearby"
-
-    payload = {
-        "includedTypes": ["non_profit", "point_of_interest", "foundation"],
-        "locationRestriction": {
-            "circle": {
-                "center": {"latitude": lat, "longitude": lon},
-                "radius": radius
-            }
-        }
-    }
-
-    headers = {
-        "Content-Type": "application/json",
-        "X-Goog-Api-Key": GOOGLE_API_KEY,
-        "X-Goog-FieldMask":
+    # cached per geohash cell; also seeds the place store used by /google/details
+    try:
+        places = PLACES.nearby(
+            lat, lon, ["non_profit", "point_of_interest", "foundation"],
             "places.id,places.displayName,places.location,"
             "places.formattedAddress,places.websiteUri,"
-            "places.internationalPhoneNumber"
-    }
-
-    r = requests.post(url, json=payload, headers=headers)
-    data = r.json()
+            "places.internationalPhoneNumber",
+            radius=radius
+        )
+    except PlacesUpstreamError as e:
+        return jsonify(e.body), e.status
 
     results = []
-    for p in data.get("places", []):
+    for p in places:
         results.append({
             "place_id": p.get("id"),
             "name": p.get("displayName", {}).get("text"),
@@ -959,34 +1433,20 @@ def google_nearby():
     if lat is None or lon is None:
         return jsonify({"error": "lat & lon required"}), 400
 
-    url = "https://places.googleapis.com/v1/places:searchNearby"
-
-    payload = {
-        "includedTypes": ["non_profit"],
-        "locationRestriction": {
-            "circle": {
-                "center": {"latitude": lat, "longitude": lon},
-                "radius": 5000
-            }
-        }
-    }
-
-    headers = {
-        "Content-Type": "application/json",
-        "X-Goog-Api-Key": GOOGLE_API_KEY,
-        "X-Goog-FieldMask": (
+    try:
+        places = PLACES.nearby(
+            lat, lon, ["non_profit"],
             "places.id,places.displayName,places.formattedAddress,"
             "places.location,places.websiteUri,places.rating,"
-            "places.internationalPhoneNumber"
+            "places.internationalPhoneNumber",
+            radius=5000
         )
-    }
-
-    resp = requests.post(url, json=payload, headers=headers)
-    data = resp.json()
+    except PlacesUpstreamError as e:
+        return jsonify(e.body), e.status
 
     # ⭐ Convert to old format
     results = []
-    for p in data.get("places", []):
+    for p in places:
         results.append({
             "place_id": p.get("id"),
             "name": p.get("displayName", {}).get("text"),
@@ -1008,21 +1468,14 @@ def google_nearby():
 @app.get("/google/details")
 def google_details():
     place_id = request.args.get("place_id")
-    key = GOOGLE_API_KEY
 
     if not place_id:
         return jsonify({"error": "place_id required"}), 400
 
-    url = f"https://places.googleapis.com/v1/places/{place_id}"
-
-    headers = {
-        "X-Goog-Api-Key": key,
-        "X-Goog-FieldMask":
-            "id,displayName,formattedAddress,websiteUri,internationalPhoneNumber"
-    }
-
-    r = requests.get(url, headers=headers)
-    p = r.json()
+    # long-lived per place id; usually already known from a nearby search
+    status, p = PLACES.details(place_id, "id,displayName,formattedAddress,websiteUri,internationalPhoneNumber")
+    if status != 200:
+        return jsonify(p), status
 
     # ⭐ Convert to the old Places JSON format your frontend expects
     return jsonify({
@@ -1041,406 +1494,149 @@ def google_search():
     query = request.args.get("name")
     lat = request.args.get("lat", type=float)
     lon = request.args.get("lon", type=float)
-    key = GOOGLE_API_KEY
 
-    print("SEARCH lat:", lat, "lon:", lon)
-
-    url = "https://places.googleapis.com/v1/places:searchText"
-
-    payload = {
-        "textQuery": query,
-        "locationBias": {
-            "circle": {
-                "center": {"latitude": lat, "longitude": lon},
-                "radius": 5000
-            }
-        }
-    }
-    print("PAYLOAD:", payload)
-    headers = {
-        "Content-Type": "application/json",
-        "X-Goog-Api-Key": key,
-        "X-Goog-FieldMask":
+    try:
+        places = PLACES.search_text(
+            query, lat, lon,
             "places.id,places.displayName,"
             "places.formattedAddress,places.websiteUri,"
-            "places.internationalPhoneNumber,places.location"
-    }
-
-    r = requests.post(url, json=payload, headers=headers)
-    return jsonify(r.json())
+            "places.internationalPhoneNumber,places.location",
+            radius=5000
+        )
+    except PlacesUpstreamError as e:
+        return jsonify(e.body), e.status
+    return jsonify({"places": places})
 
 
 
-import os
-import uuid
-import tempfile
-import traceback
 from io import BytesIO
 from datetime import datetime
-import matplotlib.pyplot as plt
-
-from fpdf import FPDF
-from flask import send_file, request, current_app
-import requests
-from PIL import Image
-
-
-@app.get("/download_report")
-def download_report():
-    """
-    EarthPulse — Professional Graphical PDF Report
-    """
-
-    # -------------------------------
-    # 1. FETCH DATA
-    # -------------------------------
-    city = request.args.get("city")
-    if not city:
-        return {"error": "City is required"}, 400
-
-    try:
-        pred = requests.get(f"{INTERNAL_BASE_URL}/predict", params={"city": city}, timeout=10).json()
-        weather = requests.get(f"{INTERNAL_BASE_URL}/weather", params={"city": city}, timeout=10).json()
-    except Exception as e:
-        return {"error": str(e)}, 500
 
-    cur = weather.get("current", {})
-    forecast = weather.get("forecast", {}).get("forecastday", [])
+from flask import send_file, request
 
-    flood = pred.get("flood", {"probability": 0, "label": "N/A"})
-    wildfire = pred.get("wildfire", {"probability": 0, "label": "N/A"})
+from earthpulse_ml.report import REPORT_FONTS, render_report
+from earthpulse_ml.bulk_reports import BulkReportRunner, REPORT_BULK_MAX_CITIES
 
-    # -------------------------------
-    # 2. GENERATE CHART IMAGES
-    # -------------------------------
-    tmp_files = []
+# finished PDFs per (city, data hour, model version); the inputs only change hourly
+REPORT_CACHE = TTLCache(max_entries=int(os.environ.get("REPORT_CACHE_MAX_ENTRIES", "128")))
+REPORT_FLIGHTS = SingleFlight("report")
 
-    def temp_file():
-        fd, path = tempfile.mkstemp(suffix=".png")
-        os.close(fd)
-        tmp_files.append(path)
-        return path
 
-    # Temperature chart
-    temp_chart = None
-    try:
-        dates = [d.get("date", "") for d in forecast]
-        tmin = [d["day"].get("mintemp_c", 0) for d in forecast]
-        tmax = [d["day"].get("maxtemp_c", 0) for d in forecast]
-
-        if dates:
-            fig, ax = plt.subplots(figsize=(6, 3.2))
-            ax.plot(dates, tmin, marker="o", label="Min Temp")
-            ax.plot(dates, tmax, marker="o", label="Max Temp")
-            ax.set_title("7-Day Temperature Trend")
-            ax.set_ylabel("°C")
-            ax.grid(True, linewidth=0.3)
-            ax.legend()
-
-            plt.xticks(rotation=45, fontsize=8)
-            ax.tick_params(axis="y", labelsize=8)
-
-            fig.tight_layout()
-
-            temp_chart = temp_file()
-            fig.savefig(temp_chart, dpi=150)
-            plt.close(fig)
-    except:
-        pass
+def report_cache_key(city: str):
+    return (" ".join(city.split()).casefold(), hour_bucket(), get_models().version)
 
-    # Rain chart
-    rain_chart = None
-    try:
-        rain = [d["day"].get("daily_chance_of_rain", 0) for d in forecast]
-        if dates:
-            fig, ax = plt.subplots(figsize=(6, 3.2))
-            ax.bar(dates, rain, color="#4A90E2")
-            ax.set_title("7-Day Rain Probability")
-            ax.set_ylabel("%")
-            ax.set_ylim(0, 100)
-            ax.grid(axis="y", linewidth=0.3)
-
-            plt.xticks(rotation=45, fontsize=8)
-            ax.tick_params(axis="y", labelsize=8)
-
-            fig.tight_layout()
-
-            rain_chart = temp_file()
-            fig.savefig(rain_chart, dpi=150)
-            plt.close(fig)
-    except:
-        pass
 
-    # -------------------------------
-    # 3. BUILD PDF
-    # -------------------------------
-    pdf = FPDF("P", "mm", "A4")
-    pdf.set_auto_page_break(auto=True, margin=12)
+def _build_report(key, city):
+    pred = predict_city(city)
+    weather = weather_for_city(city)
+    pdf = render_report(city, pred, weather)
+    REPORT_CACHE.set(key, pdf, expires_at=next_hour_boundary())
+    return pdf
 
-    
-    def draw_page_border():
-        pdf.set_draw_color(180, 180, 180)   # light grey
-        pdf.set_line_width(0.8)
-        pdf.rect(5, 5, 200, 287)            # (x, y, width, height)
 
+def report_pdf(city: str) -> bytes:
+    """Cached, coalesced PDF report for a city."""
+    key = report_cache_key(city)
+    pdf = REPORT_CACHE.get(key)
+    if pdf is None:
+        pdf = REPORT_FLIGHTS.do(key, _build_report, key, city)
+    return pdf
 
-    pdf.add_page()
-    draw_page_border()
 
+@app.get("/download_report")
+def download_report():
+    """EarthPulse — Professional Graphical PDF Report"""
+    city = request.args.get("city")
+    if not city:
+        return {"error": "City is required"}, 400
 
-    # Load fonts
-    # Load fonts
     try:
-        pdf.add_font("DejaVu", "", "fonts/DejaVuSans.ttf", uni=True)
-        pdf.add_font("DejaVu", "B", "fonts/DejaVuSans-Bold.ttf", uni=True)
-        pdf.add_font("DejaVu", "I", "fonts/DejaVuSans-Oblique.ttf", uni=True)  # <-- REQUIRED
-        pdf.set_font("DejaVu", "", 11)
-    except:
-        pdf.set_font("Arial", "", 11)
-
-
-    # Title
-    pdf.set_font("DejaVu", "B", 18)
-    pdf.set_text_color(30, 144, 255)
-    pdf.cell(0, 10, f"🌍 EarthPulse Disaster Report — {city}", ln=True)
-    pdf.ln(2)
-
-    pdf.set_font("DejaVu", "", 11)
-    pdf.set_text_color(0, 0, 0)
-    pdf.cell(0, 6, f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M')}", ln=True)
-    pdf.ln(4)
-
-    # -------------------------------
-    # Section helper
-    # -------------------------------
-    def section(title, fill=(160, 30, 30)):
-        pdf.set_font("DejaVu", "B", 14)
-        pdf.set_fill_color(*fill)
-        pdf.set_text_color(255, 255, 255)
-        pdf.cell(0, 10, f"  {title}", ln=True, fill=True)
-        pdf.set_text_color(0, 0, 0)
-        pdf.ln(3)
-
-    # -------------------------------
-    # RISK BAR
-    # -------------------------------
-    def draw_risk(label, prob):
-        pct = int(prob * 100)
-        bar_w = 120
-        bar_h = 8
-
-        # color scale
-        if pct < 30:
-            color = (0, 200, 0)
-        elif pct < 60:
-            color = (255, 215, 0)
-        elif pct < 80:
-            color = (255, 165, 0)
-        else:
-            color = (255, 60, 60)
-
-        pdf.set_font("DejaVu", "B", 11)
-        pdf.cell(0, 6, f"{label}: {pct}%", ln=True)
-
-        x = pdf.get_x()
-        y = pdf.get_y()
-
-        # background
-        pdf.set_fill_color(230, 230, 230)
-        pdf.rect(x, y, bar_w, bar_h, "F")
-
-        # bar
-        pdf.set_fill_color(*color)
-        pdf.rect(x, y, bar_w * pct / 100, bar_h, "F")
-
-        pdf.ln(bar_h + 4)
-
-    # -------------------------------
-    # CURRENT WEATHER
-    # -------------------------------
-    section("Current Weather", (30, 100, 160))
-    pdf.set_font("DejaVu", "", 11)
-    pdf.multi_cell(0, 6,
-        f"Temperature: {cur.get('temp_c')}°C (Feels like {cur.get('feelslike_c')}°C)\n"
-        f"Humidity: {cur.get('humidity')}%\n"
-        f"Wind: {cur.get('wind_kph')} km/h ({cur.get('wind_dir')})\n"
-        f"Visibility: {cur.get('vis_km')} km\n"
-        f"Pressure: {cur.get('pressure_mb')} mb"
-    )
-    pdf.ln(2)
-
-    # -------------------------------
-    # RISK SECTION
-    # -------------------------------
-    section("Disaster Risk Assessment")
-
-    draw_risk("Flood Risk", flood["probability"])
-    draw_risk("Wildfire Risk", wildfire["probability"])
-
-    # -------------------------------
-    # 24-HOUR SNAPSHOT
-    # -------------------------------
-    section("24-Hour Snapshot", (80, 80, 80))
-
-    hours = forecast[0].get("hour", [])[:12] if forecast else []
+        pdf = report_pdf(city)
+    except Exception as e:
+        return {"error": str(e)}, 500
 
-    pdf.set_font("DejaVu", "B", 10)
-    pdf.set_fill_color(230, 230, 230)
-    pdf.cell(45, 7, "Time", 1, 0, "C", True)
-    pdf.cell(40, 7, "Temp", 1, 0, "C", True)
-    pdf.cell(30, 7, "Rain%", 1, 1, "C", True)
+    return send_file(
+        BytesIO(pdf),
+        download_name=f"EarthPulse_Report_{city}.pdf",
+        as_attachment=True,
+        mimetype="application/pdf"
+    )
 
-    pdf.set_font("DejaVu", "", 10)
 
-    for h in hours:
-        # Clean and safe timestamp
-        t = h.get("time", "").replace("T", " ").replace("+00:00", "")
+# --- Bulk report packs (rendered on worker processes) ---
+def _report_inputs(city):
+    return predict_city(city), weather_for_city(city)
 
-        temp = f"{h.get('temp_c', 'N/A')}°C"
-        rain = f"{h.get('chance_of_rain', 'N/A')}%"
 
-        pdf.set_font("DejaVu", "", 10)
+def _store_report(city, pdf):
+    REPORT_CACHE.set(report_cache_key(city), pdf, expires_at=next_hour_boundary())
 
-        pdf.cell(45, 7, t, border=1)
-        pdf.cell(40, 7, temp, border=1)
-        pdf.cell(30, 7, rain, border=1)
-        pdf.ln(7)
 
-# *** IMPORTANT: add spacing before next section ***
-    pdf.ln(5)
+BULK_REPORTS = BulkReportRunner(load=_report_inputs,
+                                lookup=lambda city: REPORT_CACHE.get(report_cache_key(city)),
+                                store=_store_report)
 
 
-    # -------------------------------
-    # 7-DAY TABLE
-    # -------------------------------
-    section("7-Day Forecast", (50, 50, 50))
-
-    pdf.set_font("DejaVu", "B", 10)
-    pdf.set_fill_color(235, 235, 235)
-    pdf.cell(30, 8, "Date", 1, 0, "C", True)
-    pdf.cell(65, 8, "Condition", 1, 0, "C", True)
-    pdf.cell(25, 8, "Min°", 1, 0, "C", True)
-    pdf.cell(25, 8, "Max°", 1, 0, "C", True)
-    pdf.cell(25, 8, "Rain%", 1, 1, "C", True)
-
-    pdf.set_font("DejaVu", "", 10)
-
-    for d in forecast:
-        day = d["day"]
-        pdf.cell(30, 8, d["date"], 1)
-        pdf.cell(65, 8, day["condition"]["text"][:30], 1)
-        pdf.cell(25, 8, str(day["mintemp_c"]), 1)
-        pdf.cell(25, 8, str(day["maxtemp_c"]), 1)
-        pdf.cell(25, 8, str(day["daily_chance_of_rain"]), 1)
-        pdf.ln()
-
-    # -------------------------------
-    # INSERT CHARTS
-    # -------------------------------
-    def insert_chart(path, title):
-        if not os.path.exists(path):
-            return
-
-        # --- If space is low, add new page + border ---
-        if pdf.get_y() > 180:   # 200 is too late, 180 is safer
-            pdf.add_page()
-            draw_page_border()
-
-        # --- Section Title ---
-        pdf.set_font("DejaVu", "B", 14)
-        pdf.cell(0, 8, title, ln=True)
-
-        img_w, img_h = 170, 90
-        x = (210 - img_w) / 2
-        y = pdf.get_y() + 3
-
-        # Chart border box
-        pdf.set_draw_color(120, 120, 120)
-        pdf.rect(x - 2, y - 2, img_w + 4, img_h + 4)
-
-        # Insert chart
-        pdf.image(path, x=x, y=y, w=img_w, h=img_h)
-
-        # Move down BELOW chart
-        pdf.ln(img_h + 16)
-
-        # ⭐ IMPORTANT:
-        # If auto-page-break occurred during chart insert,
-        # the cursor will jump to the top of the new page (small Y value).
-        # That means we MUST draw a border on that new page.
-        if pdf.get_y() < 20:  
-            draw_page_border()
-
-
-    insert_chart(temp_chart, "7-Day Temperature Trend")
-    insert_chart(rain_chart, "7-Day Rain Probability")
-
-
-    def add_footer():
-        # Always disable auto-page break during footer creation
-        auto_break = pdf.auto_page_break
-        pdf.set_auto_page_break(False)
+@app.post("/reports/bulk")
+def bulk_reports():
+    """Start a report pack job.
 
-        # Move cursor to safe bottom position INSIDE border
-        pdf.set_y(265)   # ~275 is too close; 265 is safer
-
-        # Draw footer text as a single block
-        pdf.set_font("DejaVu", "I", 10)
-        pdf.set_text_color(90, 90, 90)
-        pdf.cell(0, 6, '"Preparedness today ensures safety tomorrow."', ln=True, align="C")
+    Body (optional): {"cities": ["Delhi", "Mumbai", ...]}; defaults to the alert
+    cities plus every tracked location. Poll /reports/bulk/<id> for progress.
+    """
+    data = request.get_json(silent=True) or {}
+    cities = data.get("cities") or ALERT_CITIES + [loc["name"] for loc in TRACKED_LOCATIONS]
+    if not isinstance(cities, list) or not all(isinstance(c, str) for c in cities):
+        return jsonify({"error": "'cities' must be a list of names"}), 400
+    if len(cities) > REPORT_BULK_MAX_CITIES:
+        return jsonify({"error": f"At most {REPORT_BULK_MAX_CITIES} cities per job"}), 400
 
-        pdf.set_font("DejaVu", "B", 11)
-        pdf.set_text_color(60, 60, 60)
-        pdf.cell(0, 6, "— Team EarthPulse", ln=True, align="C")
-
-        # Restore page-break setting
-        pdf.set_auto_page_break(auto_break, margin=12)
-
-
-
-    # -------------------------------
-    # ACTION PLAN
-    # -------------------------------
-    pdf.add_page()
-    draw_page_border()
-    section("Preparedness & Action Plan", (30, 144, 255))
-    pdf.set_font("DejaVu", "", 11)
-    pdf.multi_cell(0, 6,
-        "• Prepare emergency kit: water, flashlight, medicines.\n"
-        "• Avoid low-lying areas during heavy rainfall.\n"
-        "• Keep communication devices charged.\n"
-        "• Follow official alerts from authorities.\n"
-        "• Avoid dry vegetation during wildfire warnings."
-    )
-    add_footer()
+    job = BULK_REPORTS.submit(cities)
+    return jsonify({**job.snapshot(), "status_url": f"/reports/bulk/{job.id}",
+                    "download_url": f"/reports/bulk/{job.id}/download"}), 202
 
 
-    # -------------------------------
-    # RETURN PDF
-    # -------------------------------
-    out = BytesIO()
-    pdf.output(out)
-    out.seek(0)
+@app.get("/reports/bulk/<job_id>")
+def bulk_report_status(job_id):
+    job = BULK_REPORTS.get(job_id)
+    if job is None:
+        return jsonify({"error": "unknown job"}), 404
+    return jsonify(job.snapshot())
 
-    for f in tmp_files:
-        try:
-            os.remove(f)
-        except:
-            pass
 
-    return send_file(
-        out,
-        download_name=f"EarthPulse_Report_{city}.pdf",
-        as_attachment=True,
-        mimetype="application/pdf"
-    )
+@app.get("/reports/bulk/<job_id>/download")
+def bulk_report_download(job_id):
+    job = BULK_REPORTS.get(job_id)
+    if job is None:
+        return jsonify({"error": "unknown job"}), 404
+    if job.status != "done":
+        return jsonify({"error": f"job is {job.status}"}), 409
+    return send_file(job.path, download_name=f"EarthPulse_Reports_{job.id}.zip",
+                     as_attachment=True, mimetype="application/zip")
 
 
 @app.get("/run_scheduler")
 def run_scheduler():
-    periodic_risk_check()
-    return {"status": "job executed"}
-
+    summary = periodic_risk_check()
+    return {"status": "job executed" if summary is not None else "skipped", "summary": summary}
+
+
+
+# --- Startup ---
+STARTUP.checkpoint("routes")
+# report worker processes (spawn) re-import the entry script as __mp_main__
+if STARTUP_MODE == "eager" and __name__ != "__mp_main__":
+    get_models()
+    HOTSPOTS.start()
+    # finished days never change; store yesterday once, shortly after UTC midnight
+    WEATHER_HISTORY.start_daily(dict.fromkeys(
+        [loc["name"] for loc in TRACKED_LOCATIONS] + [c for c in ALERT_CITIES if not is_floodville(c)]))
+    # opt-in: a fresh instance would otherwise send a few hundred Overpass queries at boot
+    if os.environ.get("FLOOD_ZONE_PREBUILD") == "1":
+        threading.Thread(target=FLOOD_ZONES.prebuild, args=(TRACKED_LOCATIONS,),
+                         name="flood-zone-prebuild", daemon=True).start()
+STARTUP.mark_ready()
+app.logger.info("Startup (%s mode): %s", STARTUP_MODE, STARTUP.snapshot())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,201 @@
+"""
+Change-driven, concurrent alert evaluation for the scheduler.
+
+A run first observes every watched city concurrently: its latest weather
+frame and model feature row, reduced to a fingerprint. Cities whose
+fingerprint matches the one already evaluated are skipped, since the model
+inputs only change when Open-Meteo publishes new hourly data. Only changed
+cities are scored, all in one `score` call (a single forward pass in the
+app), then thresholded against the flood / wildfire limits and per-city
+cooldowns. Notifications are queued on a small thread pool so a slow push or
+SMS provider never holds up evaluation. A hazard's cooldown is claimed when
+its alert is queued and released again if no notifier delivers it. A city's
+fingerprint is only recorded once it needed no alert or all of its alerts
+were delivered, so a failed send is retried on the next run. Notifiers
+signal failure by raising.
+
+Observation is bounded by a per-run deadline: cities not observed in time
+are reported as timed out and are picked up by the next run. Runs never
+overlap; a tick that finds the previous run still active is skipped.
+
+Env:
+  ALERT_RUN_DEADLINE_SECONDS  observation budget of one run
+  ALERT_NOTIFY_WORKERS        threads delivering notifications
+"""
+from __future__ import annotations
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+ALERT_RUN_DEADLINE_SECONDS = float(os.environ.get("ALERT_RUN_DEADLINE_SECONDS", "45"))
+ALERT_NOTIFY_WORKERS = int(os.environ.get("ALERT_NOTIFY_WORKERS", "4"))
+
+# hazard -> (title word, risk line label, advice)
+HAZARD_TEXT = {
+    "flood": ("Flood", "Flood Risk", "Stay alert and avoid low-lying areas."),
+    "fire": ("Fire", "Wildfire Risk", "Exercise caution and avoid dry vegetation."),
+}
+
+# observe(cities, timeout) -> {city: (fingerprint, payload) | Exception}; cities left out timed out
+ObserveFn = Callable[[List[str], float], Dict[str, Union[Tuple[str, Any], Exception]]]
+# score({city: payload}) -> {city: (flood_prob, fire_prob) | Exception}
+ScoreFn = Callable[[Dict[str, Any]], Dict[str, Union[Tuple[float, float], Exception]]]
+Notifier = Callable[[str, str, str], object]
+
+
+class AlertEngine:
+    def __init__(self, observe: ObserveFn, score: ScoreFn, notifiers: Iterable[Notifier],
+                 flood_threshold: float, fire_threshold: float, cooldown_s: float,
+                 deadline_s: float = ALERT_RUN_DEADLINE_SECONDS, notify_workers: int = ALERT_NOTIFY_WORKERS,
+                 log: Callable[[str], None] = print):
+        self._observe = observe
+        self._score = score
+        self.notifiers = list(notifiers)
+        self.thresholds = {"flood": flood_threshold, "fire": fire_threshold}
+        self.cooldown_s = cooldown_s
+        self.deadline_s = deadline_s
+        self._log = log
+        self._run_lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        self._last_sent: Dict[str, float] = {}
+        self._fingerprints: Dict[str, str] = {}   # city -> fingerprint last evaluated
+        self._notify_pool = ThreadPoolExecutor(max_workers=max(1, notify_workers), thread_name_prefix="alert-notify")
+        self.runs = self.overlaps_skipped = 0
+        self.evaluations = self.skipped_unchanged = 0
+        self.notifications_queued = self.notifications_failed = 0
+        self._notify_backlog = 0   # queued alerts not yet delivered (or given up on)
+        self.last_run: Optional[dict] = None
+
+    def _claim(self, key: str) -> bool:
+        """Start the cooldown for key if it is not cooling down already."""
+        now = time.time()
+        with self._state_lock:
+            last = self._last_sent.get(key)
+            if last is not None and now - last < self.cooldown_s:
+                return False
+            self._last_sent[key] = now
+            return True
+
+    def _release(self, key: str, claimed_at: float):
+        """Undo a claim, unless a later one replaced it."""
+        with self._state_lock:
+            if self._last_sent.get(key) == claimed_at:
+                del self._last_sent[key]
+
+    def _deliver(self, key: str, title: str, body: str, tag: str, city: str, pending: dict):
+        with self._state_lock:
+            claimed_at = self._last_sent.get(key)
+        delivered = 0
+        try:
+            for notify in self.notifiers:
+                try:
+                    notify(title, body, tag)
+                    delivered += 1
+                except Exception as e:
+                    with self._state_lock:
+                        self.notifications_failed += 1
+                    self._log(f"⚠ Alert notification failed ({tag}): {e}")
+            if not delivered and claimed_at is not None:
+                self._release(key, claimed_at)
+        finally:
+            with self._state_lock:
+                self._notify_backlog -= 1
+                # the city counts as evaluated once every alert of this run went out
+                pending["left"] -= 1
+                pending["ok"] = pending["ok"] and delivered > 0
+                if pending["left"] == 0 and pending["ok"]:
+                    self._fingerprints[city] = pending["fingerprint"]
+
+    def _alert(self, city: str, hazard: str, prob: float, pending: dict):
+        word, label, advice = HAZARD_TEXT[hazard]
+        title = f"{city}: HIGH {word} Risk"
+        body = (
+            f"[EarthPulse Alert]\n"
+            f"City: {city}\n"
+            f"{label}: {(prob * 100):.0f}%\n"
+            f"{advice}"
+        )
+        tag = f"earthpulse:{city}:{hazard}:{int(time.time())}"
+        with self._state_lock:
+            self.notifications_queued += 1
+            self._notify_backlog += 1
+        self._notify_pool.submit(self._deliver, f"{city}:{hazard}", title, body, tag, city, pending)
+
+    def run(self, cities: Iterable[str]) -> Optional[dict]:
+        """Evaluate every city once; None when the previous run is still going."""
+        if not self._run_lock.acquire(blocking=False):
+            with self._state_lock:
+                self.overlaps_skipped += 1
+            self._log("⚠ Alert run skipped: previous run still in progress")
+            return None
+        try:
+            return self._run(list(dict.fromkeys(cities)))
+        finally:
+            self._run_lock.release()
+
+    def _run(self, cities: List[str]) -> dict:
+        t0 = time.perf_counter()
+        try:
+            observed = self._observe(cities, self.deadline_s)
+        except Exception as e:
+            observed = {c: e for c in cities}
+
+        summary = {"cities": len(cities), "evaluated": 0, "unchanged": 0, "failed": 0, "timed_out": 0, "alerts": 0}
+        changed: Dict[str, Tuple[str, Any]] = {}
+        for city in cities:
+            result = observed.get(city)
+            if result is None:
+                summary["timed_out"] += 1
+            elif isinstance(result, Exception):
+                summary["failed"] += 1
+                self._log(f"⚠ Auto-alert error for {city}: {result}")
+            elif self._fingerprints.get(city) == result[0]:
+                summary["unchanged"] += 1
+            else:
+                changed[city] = result
+
+        scores = {}
+        if changed:
+            try:
+                scores = self._score({city: payload for city, (_, payload) in changed.items()})
+            except Exception as e:
+                scores = {city: e for city in changed}
+
+        for city, (fingerprint, _) in changed.items():
+            result = scores.get(city)
+            if not isinstance(result, tuple):
+                summary["failed"] += 1
+                self._log(f"⚠ Auto-alert error for {city}: {result or 'not scored'}")
+                continue
+            summary["evaluated"] += 1
+            alerts = [(hazard, float(prob)) for hazard, prob in zip(("flood", "fire"), result)
+                      if prob is not None and prob >= self.thresholds[hazard] and self._claim(f"{city}:{hazard}")]
+            if not alerts:
+                with self._state_lock:
+                    self._fingerprints[city] = fingerprint
+                continue
+            pending = {"fingerprint": fingerprint, "left": len(alerts), "ok": True}
+            for hazard, prob in alerts:
+                self._alert(city, hazard, prob, pending)
+                summary["alerts"] += 1
+
+        summary["duration_s"] = round(time.perf_counter() - t0, 3)
+        summary["finished_at"] = time.time()
+        with self._state_lock:
+            self.runs += 1
+            self.evaluations += summary["evaluated"]
+            self.skipped_unchanged += summary["unchanged"]
+            self.last_run = summary
+        return summary
+
+    def stats(self) -> dict:
+        with self._state_lock:
+            return {"runs": self.runs, "overlaps_skipped": self.overlaps_skipped,
+                    "evaluations": self.evaluations, "skipped_unchanged": self.skipped_unchanged,
+                    "running": self._run_lock.locked(), "deadline_s": self.deadline_s,
+                    "notifications_queued": self.notifications_queued,
+                    "notifications_failed": self.notifications_failed,
+                    "notify_backlog": self._notify_backlog,
+                    "last_run": self.last_run}
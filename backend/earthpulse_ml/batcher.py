@@ -0,0 +1,116 @@
+"""
+Dynamic micro-batching in front of the hazard runtime.
+
+Request threads submit feature rows and block on a Future. A single worker
+thread collects submissions for up to `max_wait_ms` or `max_batch` rows,
+runs one forward pass over the stacked matrix and hands each caller its
+slice of the result. Under load this turns many contending batch-size-1
+calls into a few larger ones; when idle the added latency is bounded by
+`max_wait_ms`.
+
+Env:
+  INFER_MAX_BATCH    rows per forward pass
+  INFER_MAX_WAIT_MS  how long the first queued request may wait for company
+"""
+from __future__ import annotations
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict
+
+import numpy as np
+
+INFER_MAX_BATCH = int(os.environ.get("INFER_MAX_BATCH", "64"))
+INFER_MAX_WAIT_MS = float(os.environ.get("INFER_MAX_WAIT_MS", "2"))
+
+_BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+
+class MicroBatcher:
+    def __init__(self, predict_fn: Callable[[np.ndarray], Dict[str, np.ndarray]],
+                 max_batch: int = INFER_MAX_BATCH, max_wait_ms: float = INFER_MAX_WAIT_MS):
+        self._predict_fn = predict_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: "queue.Queue[tuple[np.ndarray, Future]]" = queue.Queue()
+        self._worker = None
+        self._start_lock = threading.Lock()
+
+        self._stats_lock = threading.Lock()
+        self.batches = 0
+        self.rows = 0
+        self.max_queue_depth = 0
+        self._batch_hist = {b: 0 for b in _BATCH_BUCKETS}
+
+    def _ensure_worker(self):
+        if self._worker is None:
+            with self._start_lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, name="inference-batcher", daemon=True)
+                    self._worker.start()
+
+    def submit(self, X: np.ndarray) -> Future:
+        """Queue rows (n, n_features) for the next batch."""
+        self._ensure_worker()
+        fut: Future = Future()
+        self._queue.put((np.asarray(X, dtype="float32"), fut))
+        depth = self._queue.qsize()
+        if depth > self.max_queue_depth:
+            self.max_queue_depth = depth
+        return fut
+
+    def predict(self, X: np.ndarray) -> Dict[str, np.ndarray]:
+        """Blocking convenience wrapper with the same contract as HazardRuntime.predict."""
+        return self.submit(X).result()
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            pending = [first]
+            n_rows = first[0].shape[0]
+            deadline = time.perf_counter() + self.max_wait
+            while n_rows < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                pending.append(item)
+                n_rows += item[0].shape[0]
+            self._execute(pending, n_rows)
+
+    def _execute(self, pending, n_rows: int):
+        try:
+            out = self._predict_fn(np.concatenate([x for x, _ in pending], axis=0))
+        except Exception as e:
+            for _, fut in pending:
+                fut.set_exception(e)
+            return
+        start = 0
+        for x, fut in pending:
+            stop = start + x.shape[0]
+            fut.set_result({name: probs[start:stop] for name, probs in out.items()})
+            start = stop
+
+        with self._stats_lock:
+            self.batches += 1
+            self.rows += n_rows
+            bucket = next((b for b in _BATCH_BUCKETS if n_rows <= b), _BATCH_BUCKETS[-1])
+            self._batch_hist[bucket] += 1
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "max_queue_depth": self.max_queue_depth,
+                "batches": self.batches,
+                "rows": self.rows,
+                "mean_batch_size": round(self.rows / self.batches, 2) if self.batches else None,
+                "batch_size_histogram": {f"<={b}": c for b, c in self._batch_hist.items()},
+                "max_batch": self.max_batch,
+                "max_wait_ms": self.max_wait * 1000.0,
+            }
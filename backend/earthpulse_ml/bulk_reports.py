@@ -0,0 +1,264 @@
+"""
+Bulk PDF report packs for many cities.
+
+A job loads every city's prediction and weather concurrently on threads (the
+work is I/O and the predictions share the inference micro-batcher), then
+renders the PDFs on a pool of worker processes: matplotlib and fpdf2 are
+CPU-bound Python and would serialize on the GIL in threads. Renders are
+submitted as soon as a city's data arrives, and finished PDFs are written
+into one ZIP per job under REPORT_BULK_DIR. Each job keeps its progress and
+per-city fetch / render timings.
+
+Workers use the "spawn" start method, so they never inherit the server's
+threads, locks or models; they only import earthpulse_ml.report.
+
+Env:
+  REPORT_BULK_DIR         where job ZIPs are written
+  REPORT_WORKERS          render processes (default: CPU count)
+  REPORT_FETCH_THREADS    concurrent data loads per job
+  REPORT_BULK_MAX_CITIES  largest accepted city list
+"""
+from __future__ import annotations
+import hashlib
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import unicodedata
+import uuid
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from earthpulse_ml.report import render_report
+
+REPORT_BULK_DIR = os.environ.get("REPORT_BULK_DIR", os.path.join(tempfile.gettempdir(), "earthpulse_reports"))
+REPORT_WORKERS = int(os.environ.get("REPORT_WORKERS", str(os.cpu_count() or 2)))
+REPORT_FETCH_THREADS = int(os.environ.get("REPORT_FETCH_THREADS", "8"))
+REPORT_BULK_MAX_CITIES = int(os.environ.get("REPORT_BULK_MAX_CITIES", "200"))
+
+
+def _render(city: str, pred: dict, weather: dict) -> Tuple[bytes, float]:
+    """Worker-process entry point: (pdf bytes, render seconds)."""
+    t0 = time.perf_counter()
+    pdf = render_report(city, pred, weather)
+    return pdf, time.perf_counter() - t0
+
+
+def report_filename(city: str, unique: bool = False) -> str:
+    """'New Delhi' -> 'EarthPulse_Report_New_Delhi.pdf'; letters of any script are kept.
+
+    unique=True appends a short hash of the city, for names whose slug is taken.
+    """
+    slug, gap = [], False
+    for ch in city.strip():
+        if ch == "-" or unicodedata.category(ch)[0] in "LMN":
+            slug.append(ch)
+            gap = False
+        elif not gap:
+            slug.append("_")
+            gap = True
+    name = "".join(slug).strip("_") or "city"
+    if unique:
+        name += "_" + hashlib.sha1(city.strip().casefold().encode("utf-8")).hexdigest()[:8]
+    return f"EarthPulse_Report_{name}.pdf"
+
+
+class BulkReportJob:
+    def __init__(self, job_id: str, cities: List[str], path: str):
+        self.id = job_id
+        self.cities = cities
+        self.path = path
+        self.status = "queued"   # queued -> running -> done | failed
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._per_city = {c: {"city": c, "status": "pending"} for c in cities}
+        self._entries = set()   # ZIP entry names already written
+        self._lock = threading.Lock()
+
+    def entry_name(self, city: str) -> str:
+        """ZIP entry for city, hashed when another city already produced the same slug."""
+        name = report_filename(city)
+        if name in self._entries:
+            name = report_filename(city, unique=True)
+        self._entries.add(name)
+        return name
+
+    def update(self, city: str, **fields):
+        with self._lock:
+            self._per_city[city].update(fields)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            cities = [dict(v) for v in self._per_city.values()]
+        counts = {s: sum(1 for c in cities if c["status"] == s) for s in ("done", "failed")}
+        end = self.finished_at or time.time()
+        return {
+            "id": self.id,
+            "status": self.status,
+            "error": self.error,
+            "total": len(cities),
+            "done": counts["done"],
+            "failed": counts["failed"],
+            "progress": round((counts["done"] + counts["failed"]) / len(cities), 3) if cities else 1.0,
+            "elapsed_s": round(end - self.started_at, 2) if self.started_at else None,
+            "cities": cities,
+        }
+
+
+class BulkReportRunner:
+    """Runs bulk report jobs on a background thread each, sharing one render process pool.
+
+    load(city) -> (pred, weather) supplies report inputs; the optional
+    lookup(city) / store(city, pdf) hooks let jobs reuse and fill a PDF cache.
+    """
+
+    def __init__(self, load: Callable[[str], Tuple[dict, dict]],
+                 lookup: Optional[Callable[[str], Optional[bytes]]] = None,
+                 store: Optional[Callable[[str, bytes], None]] = None,
+                 root: str = REPORT_BULK_DIR, workers: int = REPORT_WORKERS,
+                 fetch_threads: int = REPORT_FETCH_THREADS, max_jobs: int = 20):
+        self._load = load
+        self._lookup = lookup
+        self._store = store
+        self.root = root
+        self.workers = max(1, workers)
+        self.fetch_threads = max(1, fetch_threads)
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, BulkReportJob]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.reports_rendered = self.reports_cached = self.render_seconds = 0
+        os.makedirs(root, exist_ok=True)
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                     mp_context=multiprocessing.get_context("spawn"))
+            return self._executor
+
+    def _reset_pool(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def submit(self, cities: Iterable[str]) -> BulkReportJob:
+        seen, unique = set(), []
+        for c in cities:
+            key = " ".join(str(c).split()).casefold()
+            if key and key not in seen:
+                seen.add(key)
+                unique.append(" ".join(str(c).split()))
+        job_id = uuid.uuid4().hex[:12]
+        job = BulkReportJob(job_id, unique, os.path.join(self.root, f"{job_id}.zip"))
+        with self._lock:
+            self._jobs[job_id] = job
+            self._evict()
+        threading.Thread(target=self._run, args=(job,), name=f"bulk-report-{job_id}", daemon=True).start()
+        return job
+
+    def _evict(self):
+        # drop the oldest finished jobs (and their ZIPs) beyond max_jobs
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= self.max_jobs:
+                break
+            job = self._jobs[job_id]
+            if job.status in ("done", "failed"):
+                del self._jobs[job_id]
+                try:
+                    os.remove(job.path)
+                except OSError:
+                    pass
+
+    def get(self, job_id: str) -> Optional[BulkReportJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _fetch(self, job: BulkReportJob, city: str):
+        t0 = time.perf_counter()
+        job.update(city, status="fetching")
+        try:
+            pdf = self._lookup(city) if self._lookup else None
+            data = None if pdf is not None else self._load(city)
+        except Exception as e:
+            job.update(city, status="failed", error=str(e), fetch_s=round(time.perf_counter() - t0, 3))
+            return None
+        job.update(city, fetch_s=round(time.perf_counter() - t0, 3))
+        return pdf, data
+
+    def _run(self, job: BulkReportJob):
+        job.status = "running"
+        job.started_at = time.time()
+        tmp = f"{job.path}.tmp"
+        try:
+            with zipfile.ZipFile(tmp, "w", zipfile.ZIP_STORED) as zf, \
+                    ThreadPoolExecutor(max_workers=self.fetch_threads, thread_name_prefix="bulk-fetch") as fetchers:
+                pending = {fetchers.submit(self._fetch, job, c): ("fetch", c) for c in job.cities}
+                while pending:
+                    finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for fut in finished:
+                        stage, city = pending.pop(fut)
+                        if stage == "fetch":
+                            self._fetched(job, zf, pending, city, fut.result())
+                        else:
+                            self._rendered(job, zf, city, fut)
+            os.replace(tmp, job.path)
+            job.status = "done"
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            print(f"❌ Bulk report job {job.id} failed:", e)
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+        finally:
+            job.finished_at = time.time()
+
+    def _fetched(self, job, zf, pending, city, result):
+        if result is None:
+            return
+        pdf, data = result
+        if pdf is not None:
+            self.reports_cached += 1
+            zf.writestr(job.entry_name(city), pdf)
+            job.update(city, status="done", cached=True, bytes=len(pdf))
+            return
+        job.update(city, status="rendering")
+        try:
+            pending[self._pool().submit(_render, city, *data)] = ("render", city)
+        except BrokenProcessPool as e:
+            self._reset_pool()
+            job.update(city, status="failed", error=f"render pool unavailable: {e}")
+
+    def _rendered(self, job, zf, city, fut):
+        try:
+            pdf, seconds = fut.result()
+        except BrokenProcessPool as e:
+            self._reset_pool()
+            job.update(city, status="failed", error=f"render worker died: {e}")
+            return
+        except Exception as e:
+            job.update(city, status="failed", error=str(e))
+            return
+        self.reports_rendered += 1
+        self.render_seconds += seconds
+        zf.writestr(job.entry_name(city), pdf)
+        if self._store:
+            self._store(city, pdf)
+        job.update(city, status="done", cached=False, render_s=round(seconds, 3), bytes=len(pdf))
+
+    def stats(self) -> dict:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return {"jobs": len(jobs), "running": sum(1 for j in jobs if j.status == "running"),
+                "workers": self.workers, "reports_rendered": self.reports_rendered,
+                "reports_cached": self.reports_cached,
+                "mean_render_s": round(self.render_seconds / self.reports_rendered, 3) if self.reports_rendered else None}
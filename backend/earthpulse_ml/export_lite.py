@@ -0,0 +1,125 @@
+"""
+Export the risk MLPs to lightweight serving artifacts.
+
+For a model built by `train_tf._build_mlp` this writes, next to the .keras file:
+  <model>.npz     normalization statistics + Dense weights for the NumPy backend
+  <model>.tflite  (optional) TFLite flatbuffer, optionally with int8 weights
+
+and can check either artifact against the Keras output:
+
+    python -m earthpulse_ml.export_lite --model models/flood_model.keras \
+        --tflite --int8 --data data/processed/flood.parquet --parity
+"""
+from __future__ import annotations
+import os
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import tensorflow as tf
+
+from earthpulse_ml.feature_engineering import select_features
+from earthpulse_ml.model_runtime import load_feature_list, NumpyMLP, TFLiteMLP
+
+
+def _sample_features(model_path: str, data_path: Optional[str], n: int = 512) -> np.ndarray:
+    """Feature rows for parity checks."""
+    feats = load_feature_list(model_path)
+    if data_path:
+        df = select_features(pd.read_parquet(data_path)).fillna(0.0)
+        df = df.reindex(columns=feats, fill_value=0.0)
+        return df.sample(min(n, len(df)), random_state=42).values.astype("float32")
+    # No data: sample around the model's own normalization statistics
+    stats = np.load(npz_path(model_path))
+    std = np.sqrt(stats["variance"])
+    rng = np.random.default_rng(42)
+    return (stats["mean"] + rng.standard_normal((n, len(feats))) * std).astype("float32")
+
+
+def npz_path(model_path: str) -> str:
+    return os.path.splitext(model_path)[0] + ".npz"
+
+
+def tflite_path(model_path: str) -> str:
+    return os.path.splitext(model_path)[0] + ".tflite"
+
+
+def export_npz(model_path: str, out_path: Optional[str] = None) -> str:
+    """Write normalization stats and Dense weights to a compressed .npz."""
+    model = tf.keras.models.load_model(model_path)
+    norm = next(l for l in model.layers if isinstance(l, tf.keras.layers.Normalization))
+    dense = [l for l in model.layers if isinstance(l, tf.keras.layers.Dense)]
+
+    arrays = {
+        "mean": np.asarray(norm.mean, dtype="float32").reshape(-1),
+        "variance": np.asarray(norm.variance, dtype="float32").reshape(-1),
+        "activations": np.array([l.activation.__name__ for l in dense]),
+        "features": np.array(load_feature_list(model_path)),
+    }
+    for i, layer in enumerate(dense):
+        kernel, bias = layer.get_weights()
+        arrays[f"kernel_{i}"] = kernel.astype("float32")
+        arrays[f"bias_{i}"] = bias.astype("float32")
+
+    out_path = out_path or npz_path(model_path)
+    np.savez_compressed(out_path, **arrays)
+    print(f"📦 NumPy artifact saved → {out_path}")
+    return out_path
+
+
+def export_tflite(model_path: str, out_path: Optional[str] = None, int8: bool = False) -> str:
+    """Convert the Keras model to TFLite, optionally with int8 weights.
+
+    int8 uses dynamic-range quantization (int8 weights, float activations).
+    Full-integer quantization is not used: the first op sees raw features whose
+    ranges differ by three orders of magnitude (surface_pressure vs
+    precipitation), and a single per-tensor input scale erases the rain signal.
+    """
+    model = tf.keras.models.load_model(model_path)
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if int8:
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    out_path = out_path or tflite_path(model_path)
+    with open(out_path, "wb") as f:
+        f.write(converter.convert())
+    print(f"📦 TFLite artifact saved → {out_path}" + (" (int8 weights)" if int8 else ""))
+    return out_path
+
+
+def parity_check(model_path: str, backend: str = "numpy", data_path: Optional[str] = None,
+                 tol: Optional[float] = None) -> float:
+    """Max absolute probability difference between Keras and a lite backend."""
+    X = _sample_features(model_path, data_path)
+    ref = tf.keras.models.load_model(model_path)(X, training=False).numpy().reshape(-1)
+    if backend == "numpy":
+        lite = NumpyMLP.load(npz_path(model_path))
+        tol = 1e-5 if tol is None else tol
+    else:
+        lite = TFLiteMLP(tflite_path(model_path))
+        tol = 5e-2 if tol is None else tol   # loose enough for int8
+    diff = float(np.max(np.abs(lite(X).reshape(-1) - ref)))
+    status = "✅" if diff <= tol else "❌"
+    print(f"{status} {backend} parity for {os.path.basename(model_path)}: max |Δp| = {diff:.2e} (tol {tol:g})")
+    if diff > tol:
+        raise ValueError(f"{backend} backend diverges from Keras by {diff:.2e}")
+    return diff
+
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="Export risk MLPs for the NumPy / TFLite serving backends")
+    ap.add_argument("--model", required=True, action="append", help=".keras model path (repeatable)")
+    ap.add_argument("--tflite", action="store_true", help="Also export a .tflite flatbuffer")
+    ap.add_argument("--int8", action="store_true", help="Quantize the TFLite weights to int8")
+    ap.add_argument("--data", help="Training parquet to draw parity-check rows from")
+    ap.add_argument("--parity", action="store_true", help="Compare exported artifacts against Keras")
+    args = ap.parse_args()
+
+    for path in args.model:
+        export_npz(path)
+        if args.tflite:
+            export_tflite(path, int8=args.int8)
+        if args.parity:
+            parity_check(path, "numpy", args.data)
+            if args.tflite:
+                parity_check(path, "tflite", args.data)
@@ -4,10 +4,11 @@ import numpy as np
 
 AGG_WINDOWS = [6, 12, 24, 72, 168]  # hours: 6h, 12h, 1d, 3d, 7d
 
-def add_lagged_aggregates(df: pd.DataFrame) -> pd.DataFrame:
+def add_lagged_aggregates(df: pd.DataFrame, windows=AGG_WINDOWS) -> pd.DataFrame:
     """
     Given a timeseries dataframe indexed by time,
     compute rolling aggregates useful for flood & wildfire risk.
+    windows=() only regularizes the frame (hourly index, numeric columns).
     """
     work = df.sort_index().copy()
 
@@ -24,7 +25,7 @@ def add_lagged_aggregates(df: pd.DataFrame) -> pd.DataFrame:
             work[col] = pd.to_numeric(work[col], errors="coerce")
 
     # Rolling sums and means
-    for win in AGG_WINDOWS:
+    for win in windows:
         win_str = f"{win}h"
         if "precipitation" in work.columns:
             work[f"precip_sum_{win_str}"] = work["precipitation"].rolling(win, min_periods=1).sum()
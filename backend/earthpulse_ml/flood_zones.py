@@ -0,0 +1,213 @@
+"""
+Precomputed flood-zone polygons around cached waterway geometry.
+
+For each waterway region (the WaterwayStore fetch tile) the ways are buffered
+by a width that depends on their kind, unioned, and cut along the weather
+grid, so every stored piece belongs to exactly one weather cell. Pieces are
+persisted as WKB and held in an STRtree; a request is a tree lookup plus a
+join of each piece's cell with that cell's current flood probability.
+
+A region is rebuilt when its waterway tile was refreshed since the build.
+shapely is imported on first use, keeping it off the service's cold start.
+
+Env:
+  FLOOD_ZONE_DB_PATH  SQLite file (falls back to an in-memory database)
+"""
+from __future__ import annotations
+import math
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, List, Tuple
+
+from earthpulse_ml.singleflight import SingleFlight
+from earthpulse_ml.waterways import WATERWAYS, WaterwayStore
+from earthpulse_ml.weather_cache import GRID_DEG, snap_to_grid
+
+FLOOD_ZONE_DB_PATH = os.environ.get("FLOOD_ZONE_DB_PATH", os.path.join(tempfile.gettempdir(), "earthpulse_flood_zones.sqlite"))
+
+# buffer half-widths in metres by OSM waterway kind; None = lakes / reservoirs
+BUFFER_M = {"river": 500.0, "canal": 200.0, "stream": 150.0, "drain": 60.0, "ditch": 40.0, None: 250.0}
+DEFAULT_BUFFER_M = 100.0
+METRES_PER_DEG = 111320.0
+# zoom used to simplify waterways before buffering (~20 m tolerance)
+BUILD_ZOOM = 12
+
+if TYPE_CHECKING:
+    from shapely.geometry import Polygon
+
+
+class RegionZones:
+    """Flood-zone pieces of one region with their weather cells and an STRtree."""
+
+    def __init__(self, built_at: float, cells: List[Tuple[float, float]], geoms: List[Polygon]):
+        self.built_at = built_at
+        self.cells = cells
+        self.geoms = geoms
+        if geoms:
+            from shapely.strtree import STRtree
+            self.tree = STRtree(geoms)
+        else:
+            self.tree = None
+
+    def query(self, south: float, west: float, north: float, east: float) -> List[int]:
+        if self.tree is None:
+            return []
+        from shapely.geometry import box
+        return self.tree.query(box(west, south, east, north)).tolist()
+
+
+def build_region(ways, south: float, west: float, north: float, east: float,
+                 grid_deg: float = GRID_DEG) -> Tuple[List[Tuple[float, float]], List[Polygon]]:
+    """Buffer, union and cut one region's ways into per-weather-cell pieces."""
+    import shapely
+    from shapely import affinity
+    from shapely.geometry import LineString, Polygon, box
+
+    lat0 = (south + north) / 2
+    kx = math.cos(math.radians(lat0))
+    # buffer in a local equirectangular frame so widths are metres in both axes
+    buffers = []
+    for _, kind, coords in ways:
+        if len(coords) < 2:
+            continue
+        width = BUFFER_M.get(kind, DEFAULT_BUFFER_M) / METRES_PER_DEG
+        line = affinity.scale(LineString(coords), xfact=kx, yfact=1.0, origin=(0, 0))
+        buffers.append(line.buffer(width, quad_segs=4))
+    if not buffers:
+        return [], []
+
+    merged = affinity.scale(shapely.union_all(buffers), xfact=1 / kx, yfact=1.0, origin=(0, 0))
+    merged = merged.intersection(box(west, south, east, north))
+    if merged.is_empty:
+        return [], []
+
+    # cut along weather cell boundaries (cells are centred on multiples of grid_deg)
+    cells, geoms = [], []
+    h = grid_deg / 2
+    for i in range(math.floor((south + h) / grid_deg), math.ceil((north + h) / grid_deg) + 1):
+        for j in range(math.floor((west + h) / grid_deg), math.ceil((east + h) / grid_deg) + 1):
+            clat, clon = i * grid_deg, j * grid_deg
+            piece = merged.intersection(box(clon - h, clat - h, clon + h, clat + h))
+            if piece.is_empty:
+                continue
+            for poly in getattr(piece, "geoms", [piece]):
+                if isinstance(poly, Polygon) and poly.area > 0:
+                    cells.append(snap_to_grid(clat, clon, grid_deg))
+                    geoms.append(shapely.set_precision(poly.simplify(grid_deg / 2000), 1e-5))
+    return cells, geoms
+
+
+class FloodZoneIndex:
+    def __init__(self, waterways: WaterwayStore = WATERWAYS, db_path: str = FLOOD_ZONE_DB_PATH,
+                 max_regions: int = 256):
+        self.waterways = waterways
+        self.max_regions = max_regions
+        self._regions: "OrderedDict[Tuple[int, int], RegionZones]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._flights = SingleFlight("flood_zones")
+        self.builds = self.disk_loads = self.hits = 0
+
+        try:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._init_schema()
+        except sqlite3.Error as e:
+            print("⚠ Flood zone store unavailable, using memory only:", e)
+            self._db = sqlite3.connect(":memory:", check_same_thread=False)
+            self._init_schema()
+
+    def _init_schema(self):
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS regions (region TEXT PRIMARY KEY, built_at REAL);
+            CREATE TABLE IF NOT EXISTS zones (region TEXT, cell_lat REAL, cell_lon REAL, wkb BLOB);
+            CREATE INDEX IF NOT EXISTS zones_region ON zones (region);
+        """)
+        self._db.commit()
+
+    def _region_bounds(self, region: Tuple[int, int]):
+        d = self.waterways.tile_deg
+        return region[0] * d, region[1] * d, (region[0] + 1) * d, (region[1] + 1) * d
+
+    def _remember(self, region, zones: RegionZones):
+        with self._lock:
+            self._regions[region] = zones
+            self._regions.move_to_end(region)
+            while len(self._regions) > self.max_regions:
+                self._regions.popitem(last=False)
+
+    def _load(self, region: Tuple[int, int]) -> RegionZones:
+        import shapely
+
+        key = self.waterways.tile_key(region)
+        south, west, north, east = self._region_bounds(region)
+        # make sure the waterway tile is present and fresh (may hit Overpass once);
+        # shrink the box so only this region's own tile is touched
+        eps = 1e-9
+        ways = self.waterways.ways_in_bbox(south, west, north - eps, east - eps, zoom=BUILD_ZOOM)
+        source_at = self.waterways.tile_fetched_at(region) or 0.0
+
+        with self._lock:
+            row = self._db.execute("SELECT built_at FROM regions WHERE region = ?", (key,)).fetchone()
+            if row and row[0] >= source_at:
+                rows = self._db.execute("SELECT cell_lat, cell_lon, wkb FROM zones WHERE region = ?",
+                                        (key,)).fetchall()
+                self.disk_loads += 1
+                return RegionZones(row[0], [(r[0], r[1]) for r in rows],
+                                   list(shapely.from_wkb([r[2] for r in rows])) if rows else [])
+
+        cells, geoms = build_region(ways, south, west, north, east)
+        built_at = time.time()
+        with self._lock:
+            self._db.execute("DELETE FROM zones WHERE region = ?", (key,))
+            self._db.executemany("INSERT INTO zones VALUES (?, ?, ?, ?)",
+                                 [(key, c[0], c[1], shapely.to_wkb(g)) for c, g in zip(cells, geoms)])
+            self._db.execute("INSERT OR REPLACE INTO regions VALUES (?, ?)", (key, built_at))
+            self._db.commit()
+            self.builds += 1
+        return RegionZones(built_at, cells, geoms)
+
+    def region(self, region: Tuple[int, int]) -> RegionZones:
+        with self._lock:
+            zones = self._regions.get(region)
+        source_at = self.waterways.tile_fetched_at(region)
+        # reuse while the waterway tile is unchanged and not due for a refresh
+        if zones is not None and source_at is not None and zones.built_at >= source_at \
+                and time.time() - source_at < self.waterways.max_age:
+            self.hits += 1
+            return zones
+        zones = self._flights.do(region, self._load, region)
+        self._remember(region, zones)
+        return zones
+
+    def zones_in_bbox(self, south: float, west: float, north: float, east: float):
+        """[(cell, polygon)] for every stored piece intersecting the box."""
+        d = self.waterways.tile_deg
+        # refresh every covering waterway tile at once rather than one per region build
+        self.waterways.prefetch(south, west, north, east)
+        out = []
+        for i in range(math.floor(south / d), math.floor(north / d) + 1):
+            for j in range(math.floor(west / d), math.floor(east / d) + 1):
+                zones = self.region((i, j))
+                out.extend((zones.cells[k], zones.geoms[k]) for k in zones.query(south, west, north, east))
+        return out
+
+    def prebuild(self, locations, radius_km: float = 15.0):
+        """Build (or load) the regions around each {"lat", "lon"} location ahead of requests."""
+        for loc in locations:
+            dlat = radius_km / 111.0
+            dlon = radius_km / (111.0 * max(math.cos(math.radians(loc["lat"])), 1e-6))
+            try:
+                self.zones_in_bbox(loc["lat"] - dlat, loc["lon"] - dlon, loc["lat"] + dlat, loc["lon"] + dlon)
+            except Exception as e:
+                print(f"⚠ Flood zone prebuild failed for {loc.get('name')}:", e)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"regions_in_memory": len(self._regions), "builds": self.builds,
+                    "disk_loads": self.disk_loads, "hits": self.hits, "coalesced": self._flights.stats()}
+
+
+FLOOD_ZONES = FloodZoneIndex()
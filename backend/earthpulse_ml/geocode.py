@@ -0,0 +1,145 @@
+"""
+Shared city geocoding with an in-memory LRU backed by an on-disk SQLite store.
+
+The store is pre-seeded with `TRACKED_LOCATIONS`, lookups are normalized for
+case and whitespace, and "not found" answers are remembered for a short time
+so typos do not hammer the Open-Meteo geocoding API.
+"""
+from __future__ import annotations
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from earthpulse_ml.http_transport import HTTP
+
+from earthpulse_ml.locations import TRACKED_LOCATIONS
+from earthpulse_ml.singleflight import SingleFlight
+
+GEOCODE_URL = "https://geocoding-api.open-meteo.com/v1/search"
+GEOCODE_DB_PATH = os.environ.get("GEOCODE_DB_PATH", os.path.join(tempfile.gettempdir(), "earthpulse_geocode.sqlite"))
+GEOCODE_LRU_SIZE = int(os.environ.get("GEOCODE_LRU_SIZE", "4096"))
+GEOCODE_NEGATIVE_TTL = float(os.environ.get("GEOCODE_NEGATIVE_TTL", "300"))
+GEOCODE_TIMEOUT = float(os.environ.get("GEOCODE_TIMEOUT", "5"))
+
+
+def normalize_key(city: str, country: Optional[str] = None) -> str:
+    """'  new   DELHI ' / 'India' -> 'new delhi|india'"""
+    name = " ".join(city.split()).casefold()
+    return f"{name}|{' '.join((country or '').split()).casefold()}"
+
+
+class Geocoder:
+    """City -> (lat, lon) with memory, disk and negative caching."""
+
+    def __init__(self, db_path: str = GEOCODE_DB_PATH, lru_size: int = GEOCODE_LRU_SIZE,
+                 negative_ttl: float = GEOCODE_NEGATIVE_TTL, timeout: float = GEOCODE_TIMEOUT):
+        self.lru_size = lru_size
+        self.negative_ttl = negative_ttl
+        self.timeout = timeout
+        self._lru: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._negative: dict = {}   # key -> expiry epoch
+        self._lock = threading.Lock()
+        self._flights = SingleFlight("geocode")
+        self.hits = self.disk_hits = self.misses = self.negative_hits = 0
+
+        self._db = None
+        try:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS geocode (key TEXT PRIMARY KEY, lat REAL, lon REAL)")
+            self._db.commit()
+        except sqlite3.Error as e:
+            # Read-only filesystem etc.: fall back to memory only
+            print("⚠ Geocode store unavailable, using memory only:", e)
+            self._db = None
+
+    def seed(self, locations=TRACKED_LOCATIONS, countries=("India", None)):
+        """Pre-load known locations so they never need a network lookup."""
+        rows = []
+        for loc in locations:
+            for country in countries:
+                key = normalize_key(loc["name"], country)
+                rows.append((key, float(loc["lat"]), float(loc["lon"])))
+        with self._lock:
+            for key, lat, lon in rows:
+                self._remember(key, (lat, lon))
+            if self._db is not None:
+                self._db.executemany("INSERT OR IGNORE INTO geocode VALUES (?, ?, ?)", rows)
+                self._db.commit()
+
+    def _remember(self, key: str, coords: Tuple[float, float]):
+        self._lru[key] = coords
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+
+    def _fetch(self, city: str, country: Optional[str]) -> Optional[Tuple[float, float]]:
+        q = f"{city}, {country}" if country else city
+        r = HTTP.get(GEOCODE_URL, params={"name": q, "count": 1, "language": "en", "format": "json"},
+                         timeout=self.timeout)
+        r.raise_for_status()
+        data = r.json()
+        if "results" not in data or not data["results"]:
+            return None
+        res = data["results"][0]
+        return float(res["latitude"]), float(res["longitude"])
+
+    def lookup(self, city: str, country: Optional[str] = "India") -> Tuple[float, float]:
+        """Resolve a city; raises ValueError when it cannot be geocoded."""
+        if not city or not city.strip():
+            raise ValueError("City name is empty")
+        key = normalize_key(city, country)
+
+        with self._lock:
+            if key in self._lru:
+                self._lru.move_to_end(key)
+                self.hits += 1
+                return self._lru[key]
+            expiry = self._negative.get(key)
+            if expiry is not None:
+                if expiry > time.time():
+                    self.negative_hits += 1
+                    raise ValueError(f"Could not geocode '{city}'")
+                del self._negative[key]
+            if self._db is not None:
+                row = self._db.execute("SELECT lat, lon FROM geocode WHERE key = ?", (key,)).fetchone()
+                if row:
+                    self.disk_hits += 1
+                    self._remember(key, (row[0], row[1]))
+                    return row[0], row[1]
+            self.misses += 1
+
+        return self._flights.do(key, self._resolve, key, city, country)
+
+    def _resolve(self, key: str, city: str, country: Optional[str]) -> Tuple[float, float]:
+        coords = self._fetch(" ".join(city.split()), country)
+
+        with self._lock:
+            if coords is None:
+                now = time.time()
+                if len(self._negative) >= self.lru_size:
+                    self._negative = {k: exp for k, exp in self._negative.items() if exp > now}
+                self._negative[key] = now + self.negative_ttl
+                raise ValueError(f"Could not geocode '{city}'")
+            self._remember(key, coords)
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO geocode VALUES (?, ?, ?)", (key, *coords))
+                self._db.commit()
+        return coords
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._lru), "hits": self.hits, "disk_hits": self.disk_hits,
+                    "misses": self.misses, "negative_hits": self.negative_hits,
+                    "negative_entries": len(self._negative), "coalesced": self._flights.stats()}
+
+
+GEOCODER = Geocoder()
+GEOCODER.seed()
+
+
+def geocode_city(city: str, country: Optional[str] = "India") -> Tuple[float, float]:
+    return GEOCODER.lookup(city, country)
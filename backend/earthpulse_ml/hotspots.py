@@ -0,0 +1,189 @@
+"""
+In-memory NASA FIRMS active-fire snapshot with a grid-bucket spatial index.
+
+The India VIIRS 24h CSV is downloaded by a background thread every
+HOTSPOT_REFRESH_SECONDS and turned into NumPy arrays sorted by bucket
+(HOTSPOT_BUCKET_DEG cells). A radius query only touches the buckets that
+overlap the search box and runs a vectorized haversine over them. When a
+refresh fails the previous snapshot keeps serving.
+
+Env:
+  HOTSPOT_REFRESH_SECONDS  how often the CSV is re-downloaded
+  HOTSPOT_BUCKET_DEG       index cell size, degrees
+"""
+from __future__ import annotations
+import math
+import os
+import threading
+import time
+from io import StringIO
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from earthpulse_ml.http_transport import HTTP
+
+FIRMS_URL = (
+    "https://firms.modaps.eosdis.nasa.gov/"
+    "api/area/csv/?country=india&source=viirs&timeWindow=24"
+)
+HOTSPOT_REFRESH_SECONDS = float(os.environ.get("HOTSPOT_REFRESH_SECONDS", "900"))
+HOTSPOT_BUCKET_DEG = float(os.environ.get("HOTSPOT_BUCKET_DEG", "1.0"))
+EARTH_RADIUS_KM = 6371.0
+
+# VIIRS reports confidence as low / nominal / high instead of a percentage
+_VIIRS_CONFIDENCE = {"l": 20.0, "low": 20.0, "n": 50.0, "nominal": 50.0, "h": 80.0, "high": 80.0}
+
+
+def _fetch_csv() -> pd.DataFrame:
+    r = HTTP.get(FIRMS_URL, timeout=(3.05, 30))
+    r.raise_for_status()
+    return pd.read_csv(StringIO(r.text))
+
+
+def haversine_km(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Great-circle distance from one point to many, in km."""
+    lat1, lon1 = math.radians(lat), math.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+class HotspotSnapshot:
+    """Immutable point set sorted by grid bucket; buckets map to [start, stop) slices."""
+
+    def __init__(self, lats: np.ndarray, lons: np.ndarray, confidence: np.ndarray,
+                 bucket_deg: float = HOTSPOT_BUCKET_DEG, fetched_at: Optional[float] = None):
+        self.bucket_deg = bucket_deg
+        self.fetched_at = time.time() if fetched_at is None else fetched_at
+
+        bi = np.floor(lats / bucket_deg).astype(np.int64)
+        bj = np.floor(lons / bucket_deg).astype(np.int64)
+        order = np.lexsort((bj, bi))
+        self.lats, self.lons, self.confidence = lats[order], lons[order], confidence[order]
+        bi, bj = bi[order], bj[order]
+
+        self._buckets: Dict[Tuple[int, int], Tuple[int, int]] = {}
+        if len(order):
+            starts = np.flatnonzero(np.r_[True, (bi[1:] != bi[:-1]) | (bj[1:] != bj[:-1])])
+            stops = np.r_[starts[1:], len(order)]
+            for s, e in zip(starts.tolist(), stops.tolist()):
+                self._buckets[(int(bi[s]), int(bj[s]))] = (s, e)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, bucket_deg: float = HOTSPOT_BUCKET_DEG) -> "HotspotSnapshot":
+        if df.empty or not {"latitude", "longitude"}.issubset(df.columns):
+            return cls(np.empty(0), np.empty(0), np.empty(0), bucket_deg)
+        lats = pd.to_numeric(df["latitude"], errors="coerce").to_numpy(dtype="float64")
+        lons = pd.to_numeric(df["longitude"], errors="coerce").to_numpy(dtype="float64")
+        if "confidence" in df.columns:
+            raw = df["confidence"]
+            conf = pd.to_numeric(raw, errors="coerce")
+            conf = conf.fillna(raw.astype(str).str.strip().str.lower().map(_VIIRS_CONFIDENCE))
+            conf = conf.to_numpy(dtype="float64")
+        else:
+            conf = np.full(len(df), np.nan)
+        ok = np.isfinite(lats) & np.isfinite(lons)
+        return cls(lats[ok], lons[ok], conf[ok], bucket_deg)
+
+    def __len__(self) -> int:
+        return len(self.lats)
+
+    def _candidates(self, south: float, west: float, north: float, east: float) -> np.ndarray:
+        """Indices of points in every bucket overlapping the box."""
+        b = self.bucket_deg
+        slices = [self._buckets[(i, j)]
+                  for i in range(math.floor(south / b), math.floor(north / b) + 1)
+                  for j in range(math.floor(west / b), math.floor(east / b) + 1)
+                  if (i, j) in self._buckets]
+        if not slices:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([np.arange(s, e) for s, e in slices])
+
+    def in_bbox(self, south: float, west: float, north: float, east: float):
+        """(lats, lons, confidence) arrays of the points inside the box."""
+        idx = self._candidates(south, west, north, east)
+        lats, lons = self.lats[idx], self.lons[idx]
+        hit = (lats >= south) & (lats <= north) & (lons >= west) & (lons <= east)
+        return lats[hit], lons[hit], self.confidence[idx][hit]
+
+    def query(self, lat: float, lon: float, radius_km: float) -> List[dict]:
+        """Hotspots within radius_km of (lat, lon), as {"lat", "lon", "confidence"} dicts."""
+        if not len(self) or radius_km <= 0:
+            return []
+        dlat = radius_km / 111.0
+        # widest longitude span of the search box is at its most poleward edge
+        cos_lat = max(math.cos(math.radians(min(89.9, abs(lat) + dlat))), 1e-6)
+        dlon = min(180.0, radius_km / (111.0 * cos_lat))
+
+        idx = self._candidates(lat - dlat, lon - dlon, lat + dlat, lon + dlon)
+        if not len(idx):
+            return []
+        lats, lons, conf = self.lats[idx], self.lons[idx], self.confidence[idx]
+        hit = haversine_km(lat, lon, lats, lons) <= radius_km
+        return [{"lat": float(a), "lon": float(o), "confidence": None if math.isnan(c) else float(c)}
+                for a, o, c in zip(lats[hit], lons[hit], conf[hit])]
+
+
+class HotspotIndex:
+    """Holds the current snapshot and refreshes it on a background thread."""
+
+    def __init__(self, fetcher: Callable[[], pd.DataFrame] = _fetch_csv,
+                 refresh_seconds: float = HOTSPOT_REFRESH_SECONDS, bucket_deg: float = HOTSPOT_BUCKET_DEG):
+        self._fetcher = fetcher
+        self.refresh_seconds = refresh_seconds
+        self.bucket_deg = bucket_deg
+        self.snapshot: Optional[HotspotSnapshot] = None
+        self._loaded = threading.Event()
+        self._worker = None
+        self._start_lock = threading.Lock()
+        self.refreshes = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+
+    def refresh(self):
+        try:
+            snap = HotspotSnapshot.from_frame(self._fetcher(), self.bucket_deg)
+        except Exception as e:
+            self.failures += 1
+            self.last_error = str(e)
+            print("⚠ FIRMS hotspot refresh failed:", e)
+            return
+        self.snapshot = snap
+        self.refreshes += 1
+        self.last_error = None
+
+    def _run(self):
+        while True:
+            self.refresh()
+            self._loaded.set()
+            time.sleep(self.refresh_seconds)
+
+    def start(self):
+        if self._worker is None:
+            with self._start_lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, name="firms-refresh", daemon=True)
+                    self._worker.start()
+
+    def query(self, lat: float, lon: float, radius_km: float, wait: float = 35.0) -> List[dict]:
+        """Radius query against the current snapshot; the first call waits for the initial load."""
+        snap = self.current(wait)
+        return snap.query(lat, lon, radius_km) if snap is not None else []
+
+    def current(self, wait: float = 35.0) -> Optional[HotspotSnapshot]:
+        """Current snapshot (the first call waits for the initial load)."""
+        self.start()
+        self._loaded.wait(wait)
+        return self.snapshot
+
+    def stats(self) -> dict:
+        snap = self.snapshot
+        return {"points": len(snap) if snap is not None else 0,
+                "buckets": len(snap._buckets) if snap is not None else 0,
+                "age_s": round(time.time() - snap.fetched_at, 1) if snap is not None else None,
+                "refreshes": self.refreshes, "failures": self.failures, "last_error": self.last_error}
+
+
+HOTSPOTS = HotspotIndex()
@@ -0,0 +1,102 @@
+"""
+Shared pooled HTTP transport for every outbound integration.
+
+One `requests.Session` keeps keep-alive connection pools per host (so TLS
+handshakes to Open-Meteo, OpenWeather, Google, Overpass, FIRMS, ... are paid
+once), negotiates gzip, caps concurrent requests per host and always applies a
+(connect, read) timeout. Per-host latency stats are exported for /metrics.
+
+Env:
+  HTTP_CONNECT_TIMEOUT  default connect timeout, seconds
+  HTTP_READ_TIMEOUT     default read timeout, seconds
+  HTTP_MAX_PER_HOST     concurrent requests (and pooled connections) per host
+"""
+from __future__ import annotations
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", "3.05"))
+HTTP_READ_TIMEOUT = float(os.environ.get("HTTP_READ_TIMEOUT", "10"))
+HTTP_MAX_PER_HOST = int(os.environ.get("HTTP_MAX_PER_HOST", "8"))
+
+
+class HostStats:
+    """Request count, errors and a rolling latency window for one host."""
+
+    def __init__(self, window: int = 512):
+        self.requests = 0
+        self.errors = 0
+        self.latencies_ms = deque(maxlen=window)
+
+    def record(self, elapsed_ms: float, ok: bool):
+        self.requests += 1
+        if not ok:
+            self.errors += 1
+        self.latencies_ms.append(elapsed_ms)
+
+    def snapshot(self) -> dict:
+        lat = sorted(self.latencies_ms)
+        pct = lambda p: round(lat[min(len(lat) - 1, int(p * len(lat)))], 1) if lat else None
+        return {"requests": self.requests, "errors": self.errors,
+                "p50_ms": pct(0.50), "p95_ms": pct(0.95), "max_ms": round(lat[-1], 1) if lat else None}
+
+
+class Transport:
+    def __init__(self, connect_timeout: float = HTTP_CONNECT_TIMEOUT, read_timeout: float = HTTP_READ_TIMEOUT,
+                 max_per_host: int = HTTP_MAX_PER_HOST):
+        self.default_timeout = (connect_timeout, read_timeout)
+        self.max_per_host = max_per_host
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=32, pool_maxsize=max_per_host, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"Accept-Encoding": "gzip, deflate", "User-Agent": "earthpulse-backend"})
+
+        self._lock = threading.Lock()
+        self._limits: Dict[str, threading.BoundedSemaphore] = {}
+        self._stats: Dict[str, HostStats] = {}
+
+    def _host(self, host: str):
+        with self._lock:
+            if host not in self._limits:
+                self._limits[host] = threading.BoundedSemaphore(self.max_per_host)
+                self._stats[host] = HostStats()
+            return self._limits[host], self._stats[host]
+
+    def request(self, method: str, url: str, timeout=None, **kwargs) -> requests.Response:
+        """Like requests.request, but pooled, per-host limited and never without a timeout."""
+        if timeout is None:
+            timeout = self.default_timeout
+        limit, stats = self._host(urlsplit(url).hostname or "")
+        with limit:
+            start = time.perf_counter()
+            ok = False
+            try:
+                resp = self.session.request(method, url, timeout=timeout, **kwargs)
+                ok = resp.status_code < 500
+                return resp
+            finally:
+                elapsed = (time.perf_counter() - start) * 1000.0
+                with self._lock:
+                    stats.record(elapsed, ok)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {host: s.snapshot() for host, s in self._stats.items()}
+
+
+HTTP = Transport()
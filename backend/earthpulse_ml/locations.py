@@ -0,0 +1,58 @@
+"""
+Locations tracked by the ingestion job (`ml_service/fetch_weather.py`).
+
+Used to pre-seed the geocode cache and as the default city set for batch jobs.
+Keep in sync with the `locations` list in fetch_weather.py.
+"""
+
+TRACKED_LOCATIONS = [
+    # --- Major metros ---
+    {"name": "Delhi", "lat": 28.7041, "lon": 77.1025},
+    {"name": "Mumbai", "lat": 19.0760, "lon": 72.8777},
+    {"name": "Kolkata", "lat": 22.5726, "lon": 88.3639},
+    {"name": "Chennai", "lat": 13.0827, "lon": 80.2707},
+    {"name": "Bengaluru", "lat": 12.9716, "lon": 77.5946},  # urban flooding
+    {"name": "Hyderabad", "lat": 17.3850, "lon": 78.4867},
+    {"name": "Ahmedabad", "lat": 23.0225, "lon": 72.5714},
+    {"name": "Jaipur", "lat": 26.9124, "lon": 75.7873},
+    {"name": "Lucknow", "lat": 26.8467, "lon": 80.9462},
+    {"name": "Pune", "lat": 18.5204, "lon": 73.8567},
+    {"name": "Bhopal", "lat": 23.2599, "lon": 77.4126},
+    {"name": "Indore", "lat": 22.7196, "lon": 75.8577},
+    {"name": "Visakhapatnam", "lat": 17.6868, "lon": 83.2185},
+    {"name": "Srinagar", "lat": 34.0837, "lon": 74.7973},
+    {"name": "Ranchi", "lat": 23.3441, "lon": 85.3096},
+    {"name": "Chandigarh", "lat": 30.7333, "lon": 76.7794},
+    {"name": "Thiruvananthapuram", "lat": 8.5241, "lon": 76.9366},
+
+    # --- River flood–prone (Ganga–Brahmaputra belt) ---
+    {"name": "Guwahati", "lat": 26.1445, "lon": 91.7362},
+    {"name": "Dibrugarh", "lat": 27.4728, "lon": 94.9120},
+    {"name": "Patna", "lat": 25.5941, "lon": 85.1376},
+    {"name": "Bhagalpur", "lat": 25.2425, "lon": 86.9842},
+    {"name": "Varanasi", "lat": 25.3176, "lon": 82.9739},
+    {"name": "Gorakhpur", "lat": 26.7606, "lon": 83.3732},
+
+    # --- Delta & coastal flooding ---
+    {"name": "Howrah", "lat": 22.5958, "lon": 88.2636},
+    {"name": "Kochi", "lat": 9.9312, "lon": 76.2673},
+    {"name": "Alappuzha", "lat": 9.4981, "lon": 76.3388},
+
+    # --- Wildfire-prone (Western Ghats & forests) ---
+    {"name": "Chikkamagaluru", "lat": 13.3153, "lon": 75.7754},
+    {"name": "Madikeri", "lat": 12.4260, "lon": 75.7382},
+    {"name": "Shivamogga", "lat": 13.9299, "lon": 75.5681},
+
+    {"name": "Nagpur", "lat": 21.1458, "lon": 79.0882},
+    {"name": "Chandrapur", "lat": 19.9615, "lon": 79.2961},
+    {"name": "Gadchiroli", "lat": 20.1850, "lon": 80.0033},
+
+    {"name": "Jagdalpur", "lat": 19.0748, "lon": 82.0080},
+    {"name": "Bastar", "lat": 19.0833, "lon": 81.9500},  # district HQ approx
+
+    {"name": "Nainital", "lat": 29.3806, "lon": 79.4636},
+    {"name": "Almora", "lat": 29.5971, "lon": 79.6591},
+
+    {"name": "Kullu", "lat": 31.9579, "lon": 77.1095},
+    {"name": "Mandi", "lat": 31.7088, "lon": 76.9310}
+]
@@ -0,0 +1,239 @@
+"""
+Fused inference runtime for the hazard MLPs.
+
+Every model listed in `HAZARD_MODELS` is loaded once and wired into a single
+forward pass over a shared input tensor, so one call returns the probability
+of every hazard. Adding a hazard only needs a new registry entry pointing at a
+`.keras` file with its `.features.txt` sidecar.
+
+Serving backends (env INFERENCE_BACKEND):
+  keras   fused Keras graph (imports TensorFlow)
+  numpy   fused NumPy forward pass over the exported .npz weights
+  tflite  one TFLite interpreter per model over the exported .tflite files
+  auto    numpy when every model has an .npz artifact, else keras (default)
+
+Artifacts are written by `earthpulse_ml.export_lite`.
+"""
+from __future__ import annotations
+import hashlib
+import os
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models")
+INFERENCE_BACKEND = os.environ.get("INFERENCE_BACKEND", "auto")
+
+# hazard name -> .keras model path
+HAZARD_MODELS: Dict[str, str] = {
+    "flood": os.path.join(MODELS_DIR, "flood_model.keras"),
+    "wildfire": os.path.join(MODELS_DIR, "wildfire_model.keras"),
+}
+
+# matches keras.layers.Normalization's floor on the standard deviation
+_NORM_EPSILON = 1e-7
+
+_ACTIVATIONS = {
+    "relu": lambda x: np.maximum(x, 0.0),
+    "sigmoid": lambda x: 0.5 * (1.0 + np.tanh(0.5 * x)),   # overflow-free logistic
+    "linear": lambda x: x,
+}
+
+
+def load_feature_list(model_path: str) -> List[str]:
+    feat_file = model_path + ".features.txt"
+    if not os.path.exists(feat_file):
+        return []
+    with open(feat_file, "r") as f:
+        return [l.strip() for l in f if l.strip()]
+
+
+def _artifact(model_path: str, ext: str) -> str:
+    return os.path.splitext(model_path)[0] + ext
+
+
+class NumpyMLP:
+    """Normalization + Dense stack evaluated with NumPy matmuls."""
+
+    def __init__(self, kernels, biases, activations):
+        self.kernels = [np.asarray(k, dtype="float32") for k in kernels]
+        self.biases = [np.asarray(b, dtype="float32") for b in biases]
+        self.activations = list(activations)
+
+    @classmethod
+    def load(cls, npz_file: str) -> "NumpyMLP":
+        with np.load(npz_file) as z:
+            n = len(z["activations"])
+            kernels = [z[f"kernel_{i}"] for i in range(n)]
+            biases = [z[f"bias_{i}"] for i in range(n)]
+            # Fold the normalization into the first Dense layer: ((x - m) / s) @ W + b
+            std = np.maximum(np.sqrt(z["variance"]), _NORM_EPSILON)
+            biases[0] = biases[0] - (z["mean"] / std) @ kernels[0]
+            kernels[0] = kernels[0] / std[:, None]
+            return cls(kernels, biases, [str(a) for a in z["activations"]])
+
+    def __call__(self, X: np.ndarray) -> np.ndarray:
+        h = X
+        for k, b, act in zip(self.kernels, self.biases, self.activations):
+            h = _ACTIVATIONS[act](h @ k + b)
+        return h
+
+    @classmethod
+    def fuse(cls, mlps: List["NumpyMLP"], columns: List[List[int]], n_inputs: int) -> "NumpyMLP":
+        """Stack same-depth MLPs into one block-diagonal network.
+
+        columns[i] maps each input of model i to its shared-input column.
+        """
+        depth = len(mlps[0].kernels)
+        if any(len(m.kernels) != depth or m.activations != mlps[0].activations for m in mlps):
+            raise ValueError("Only MLPs with identical layer structure can be fused")
+
+        kernels, biases = [], []
+        for layer in range(depth):
+            blocks = [m.kernels[layer] for m in mlps]
+            rows = n_inputs if layer == 0 else sum(b.shape[0] for b in blocks)
+            K = np.zeros((rows, sum(b.shape[1] for b in blocks)), dtype="float32")
+            r = c = 0
+            for block, cols in zip(blocks, columns):
+                if layer == 0:
+                    K[cols, c:c + block.shape[1]] = block
+                else:
+                    K[r:r + block.shape[0], c:c + block.shape[1]] = block
+                    r += block.shape[0]
+                c += block.shape[1]
+            kernels.append(K)
+            biases.append(np.concatenate([m.biases[layer] for m in mlps]))
+        return cls(kernels, biases, mlps[0].activations)
+
+
+class TFLiteMLP:
+    """Thread-safe wrapper around a TFLite interpreter with a resizable batch."""
+
+    def __init__(self, tflite_file: str):
+        # Prefer the standalone runtimes so serving does not need full TensorFlow
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            try:
+                from ai_edge_litert.interpreter import Interpreter
+            except ImportError:
+                import tensorflow as tf
+                Interpreter = tf.lite.Interpreter
+        self._interp = Interpreter(model_path=tflite_file)
+        self._interp.allocate_tensors()
+        self._in = self._interp.get_input_details()[0]["index"]
+        self._out = self._interp.get_output_details()[0]["index"]
+        self._batch = None
+        self._lock = threading.Lock()
+
+    def __call__(self, X: np.ndarray) -> np.ndarray:
+        X = np.ascontiguousarray(X, dtype="float32")
+        with self._lock:
+            if X.shape[0] != self._batch:
+                self._interp.resize_tensor_input(self._in, list(X.shape))
+                self._interp.allocate_tensors()
+                self._batch = X.shape[0]
+            self._interp.set_tensor(self._in, X)
+            self._interp.invoke()
+            return self._interp.get_tensor(self._out).copy()
+
+
+def _resolve_backend(backend: str, registry: Dict[str, str]) -> str:
+    if backend != "auto":
+        return backend
+    has_npz = all(os.path.exists(_artifact(p, ".npz")) for p in registry.values())
+    return "numpy" if has_npz else "keras"
+
+
+class HazardRuntime:
+    """All registered hazard models fused into one forward pass."""
+
+    def __init__(self, registry: Optional[Dict[str, str]] = None, backend: Optional[str] = None):
+        registry = dict(registry or HAZARD_MODELS)
+        self.hazards: List[str] = list(registry)
+        self.model_features: Dict[str, List[str]] = {
+            name: load_feature_list(path) for name, path in registry.items()
+        }
+
+        # Shared input = union of every model's features, in first-seen order
+        self.features: List[str] = []
+        for feats in self.model_features.values():
+            self.features.extend(c for c in feats if c not in self.features)
+        columns = [[self.features.index(c) for c in self.model_features[n]] for n in self.hazards]
+
+        self.backend = _resolve_backend(backend or INFERENCE_BACKEND, registry)
+        if self.backend == "keras":
+            self._forward = self._build_keras(registry, columns)
+        elif self.backend == "numpy":
+            mlps = [NumpyMLP.load(_artifact(registry[n], ".npz")) for n in self.hazards]
+            self._forward = NumpyMLP.fuse(mlps, columns, len(self.features))
+        elif self.backend == "tflite":
+            self._forward = self._build_tflite(registry, columns)
+        else:
+            raise ValueError(f"Unknown inference backend '{self.backend}'")
+
+        # Content hash of the served artifacts; changes whenever a model is retrained/re-exported
+        ext = {"keras": ".keras", "numpy": ".npz", "tflite": ".tflite"}[self.backend]
+        digest = hashlib.sha1(self.backend.encode())
+        for name in self.hazards:
+            digest.update(name.encode())
+            with open(_artifact(registry[name], ext), "rb") as f:
+                digest.update(f.read())
+            digest.update("\n".join(self.model_features[name]).encode())
+        self.version = digest.hexdigest()[:12]
+
+    def _build_keras(self, registry, columns):
+        import tensorflow as tf
+
+        inputs = tf.keras.Input(shape=(len(self.features),), name="features")
+        outputs = []
+        for name, idx in zip(self.hazards, columns):
+            model = tf.keras.models.load_model(registry[name])
+            # saved models are all named "functional"; rewrap so names are unique in the fused graph
+            model = tf.keras.Model(model.inputs[0], model.outputs[0], name=f"{name}_mlp")
+            x = inputs
+            if idx != list(range(len(self.features))):
+                x = tf.keras.layers.Lambda(lambda t, idx=idx: tf.gather(t, idx, axis=1),
+                                           name=f"{name}_columns")(inputs)
+            outputs.append(model(x))
+        fused_out = outputs[0] if len(outputs) == 1 else tf.keras.layers.Concatenate(name="hazards")(outputs)
+        self.model = tf.keras.Model(inputs, fused_out, name="hazard_runtime")
+
+        # One traced graph for any batch size; avoids Model.predict's per-call setup
+        graph = tf.function(
+            lambda x: self.model(x, training=False),
+            input_signature=[tf.TensorSpec([None, len(self.features)], tf.float32)],
+        )
+        return lambda X: graph(tf.constant(X)).numpy()
+
+    def _build_tflite(self, registry, columns):
+        interps = [TFLiteMLP(_artifact(registry[n], ".tflite")) for n in self.hazards]
+        return lambda X: np.concatenate([m(X[:, idx]) for m, idx in zip(interps, columns)], axis=1)
+
+    def align(self, feats: pd.DataFrame) -> np.ndarray:
+        """Reorder/fill a feature frame into the shared input matrix."""
+        return feats.reindex(columns=self.features, fill_value=0.0).values.astype("float32")
+
+    def predict(self, X) -> Dict[str, np.ndarray]:
+        """Return {hazard: probabilities} for every row of X."""
+        if isinstance(X, pd.DataFrame):
+            X = self.align(X)
+        X = np.asarray(X, dtype="float32").reshape(-1, len(self.features))
+        out = np.asarray(self._forward(X)).reshape(X.shape[0], len(self.hazards))
+        return {name: out[:, i] for i, name in enumerate(self.hazards)}
+
+
+_RUNTIME: Optional[HazardRuntime] = None
+_RUNTIME_LOCK = threading.Lock()
+
+
+def get_runtime() -> HazardRuntime:
+    """Process-wide runtime, built on first use."""
+    global _RUNTIME
+    if _RUNTIME is None:
+        with _RUNTIME_LOCK:
+            if _RUNTIME is None:
+                _RUNTIME = HazardRuntime()
+    return _RUNTIME
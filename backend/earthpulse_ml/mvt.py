@@ -0,0 +1,97 @@
+"""
+Mapbox Vector Tile (MVT 2.1) layers for the map overlays.
+
+Features are added in lon/lat, projected to Web Mercator tile coordinates
+(`extent` units, origin top-left) and clipped to the tile plus a small
+buffer, so a tile only carries what it can draw. Serialization (protobuf,
+geometry commands, winding order, key / value tables) is done by
+`mapbox-vector-tile`; it and shapely are imported on first use so the
+service's cold start does not pay for them.
+"""
+from __future__ import annotations
+import math
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+EXTENT = 4096
+BUFFER = 64
+
+
+def project(lons, lats, z: int, x: int, y: int, extent: int = EXTENT) -> np.ndarray:
+    """lon/lat arrays -> (n, 2) float tile coordinates (origin top-left, y down)."""
+    n = 2 ** z
+    lons = np.asarray(lons, dtype="float64")
+    lats = np.clip(np.asarray(lats, dtype="float64"), -85.0511, 85.0511)
+    px = ((lons + 180.0) / 360.0 * n - x) * extent
+    py = ((1.0 - np.arcsinh(np.tan(np.radians(lats))) / math.pi) / 2.0 * n - y) * extent
+    return np.column_stack([px, py])
+
+
+class TileLayer:
+    """Accumulates features for one named layer of a tile."""
+
+    def __init__(self, name: str, z: int, x: int, y: int, extent: int = EXTENT):
+        self.name = name
+        self.z, self.x, self.y, self.extent = z, x, y, extent
+        self._features: List[dict] = []
+
+    def _project(self, coords) -> np.ndarray:
+        coords = np.asarray(coords, dtype="float64")
+        return project(coords[:, 0], coords[:, 1], self.z, self.x, self.y, self.extent)
+
+    def _add(self, geom, properties: Optional[dict], fid: Optional[int]):
+        import shapely
+
+        geom = shapely.clip_by_rect(geom, -BUFFER, -BUFFER, self.extent + BUFFER, self.extent + BUFFER)
+        if geom.is_empty:
+            return
+        feature = {"geometry": geom, "properties": {k: v for k, v in (properties or {}).items() if v is not None}}
+        if fid is not None and fid >= 0:
+            feature["id"] = int(fid)
+        self._features.append(feature)
+
+    def add_points(self, lons, lats, properties: Optional[List[dict]] = None, ids=None):
+        """One point feature per coordinate; points outside the buffered tile are dropped."""
+        from shapely.geometry import Point
+
+        pts = project(lons, lats, self.z, self.x, self.y, self.extent)
+        inside = np.all((pts >= -BUFFER) & (pts <= self.extent + BUFFER), axis=1)
+        for i in np.flatnonzero(inside).tolist():
+            self._add(Point(pts[i]), properties[i] if properties else None, ids[i] if ids is not None else None)
+
+    def add_line(self, coords, properties: Optional[dict] = None, fid: Optional[int] = None):
+        """coords: [[lon, lat], ...]"""
+        from shapely.geometry import LineString
+
+        if len(coords) > 1:
+            self._add(LineString(self._project(coords)), properties, fid)
+
+    def add_polygon(self, rings, properties: Optional[dict] = None, fid: Optional[int] = None):
+        """rings: exterior first, then holes, each [[lon, lat], ...] (closed or not)."""
+        from shapely.geometry import Polygon
+
+        rings = [self._project(r) for r in rings if len(r) > 2]
+        if rings:
+            self._add(Polygon(rings[0], rings[1:]), properties, fid)
+
+    def __len__(self) -> int:
+        return len(self._features)
+
+    def as_dict(self) -> dict:
+        return {"name": self.name, "features": self._features}
+
+
+def encode_tile(layers: Iterable[TileLayer]) -> bytes:
+    """Serialize layers into a tile; empty layers are omitted."""
+    layers = [layer for layer in layers if len(layer)]
+    if not layers:
+        return b""
+    import mapbox_vector_tile
+    from mapbox_vector_tile.encoder import on_invalid_geometry_make_valid
+
+    return mapbox_vector_tile.encode(
+        [layer.as_dict() for layer in layers],
+        per_layer_options={layer.name: {"extents": layer.extent} for layer in layers},
+        default_options={"y_coord_down": True, "on_invalid_geometry": on_invalid_geometry_make_valid},
+    )
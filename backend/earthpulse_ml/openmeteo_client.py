@@ -6,9 +6,9 @@ Docs: https://open-meteo.com/en/docs
 Note: Run this script in an environment with internet access.
 """
 from __future__ import annotations
-import requests
+from earthpulse_ml.http_transport import HTTP
 from datetime import datetime, timedelta, timezone
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 import pandas as pd
 
 OPEN_METEO_BASE = "https://api.open-meteo.com/v1/forecast"
@@ -55,7 +55,7 @@ def fetch_archive_timeseries(lat: float, lon: float, start: datetime, end: datet
         "hourly": ",".join(hourly),
         "timezone": timezone_name
     }
-    r = requests.get(OPEN_METEO_ARCHIVE, params=params, timeout=60)
+    r = HTTP.get(OPEN_METEO_ARCHIVE, params=params, timeout=60)
     r.raise_for_status()
     data = r.json()
     if "hourly" not in data:
@@ -64,7 +64,8 @@ def fetch_archive_timeseries(lat: float, lon: float, start: datetime, end: datet
     df["time"] = pd.to_datetime(df["time"])
     return df.set_index("time")
 
-def fetch_realtime(lat: float, lon: float, hourly=None, timezone_name="UTC") -> pd.DataFrame:
+def fetch_realtime(lat: float, lon: float, hourly=None, timezone_name="UTC", forecast_days: int = 1) -> pd.DataFrame:
+    """Previous day plus `forecast_days` (1-16) of hourly data."""
     hourly = hourly or DEFAULT_HOURLY
 
     # ensure timezone compatibility
@@ -76,13 +77,13 @@ def fetch_realtime(lat: float, lon: float, hourly=None, timezone_name="UTC") ->
         "longitude": lon,
         "hourly": ",".join(hourly),
         "past_days": 1,
-        "forecast_days": 1,
+        "forecast_days": forecast_days,
         "timezone": timezone_name
     }
 
     try:
         # safe for Render/Vercel
-        r = requests.get(OPEN_METEO_BASE, params=params, timeout=7)
+        r = HTTP.get(OPEN_METEO_BASE, params=params, timeout=7)
         r.raise_for_status()
         data = r.json()
     except Exception as e:
@@ -97,6 +98,48 @@ def fetch_realtime(lat: float, lon: float, hourly=None, timezone_name="UTC") ->
     return df.set_index("time")
 
 
+def fetch_realtime_many(coords: List[Tuple[float, float]], hourly=None, timezone_name="UTC",
+                        forecast_days: int = 1) -> List[pd.DataFrame]:
+    """
+    `fetch_realtime` for many points in one request, using Open-Meteo's
+    comma-separated latitude/longitude lists. Frames come back in input order.
+    """
+    hourly = hourly or DEFAULT_HOURLY
+    if timezone_name == "auto":
+        timezone_name = "UTC"
+
+    params = {
+        "latitude": ",".join(f"{lat:.4f}" for lat, _ in coords),
+        "longitude": ",".join(f"{lon:.4f}" for _, lon in coords),
+        "hourly": ",".join(hourly),
+        "past_days": 1,
+        "forecast_days": forecast_days,
+        "timezone": timezone_name
+    }
+
+    try:
+        r = HTTP.get(OPEN_METEO_BASE, params=params, timeout=(3.05, 30))
+        r.raise_for_status()
+        data = r.json()
+    except Exception as e:
+        print("⚠ Bulk weather fetch failed:", e)
+        raise RuntimeError("weather_service_unavailable")
+
+    # a single location comes back as an object, several as a list
+    if isinstance(data, dict):
+        data = [data]
+    if len(data) != len(coords):
+        raise RuntimeError("weather_data_missing")
+
+    frames = []
+    for item in data:
+        if "hourly" not in item:
+            raise RuntimeError("weather_data_missing")
+        df = pd.DataFrame(item["hourly"])
+        df["time"] = pd.to_datetime(df["time"])
+        frames.append(df.set_index("time"))
+    return frames
+
 
 def fetch_fwi(lat: float, lon: float, start: datetime, end: datetime, timezone_name: str = "UTC") -> pd.DataFrame:
     """
@@ -110,7 +153,7 @@ def fetch_fwi(lat: float, lon: float, start: datetime, end: datetime, timezone_n
         "hourly": ",".join(DEFAULT_FWI_HOURLY),
         "timezone": timezone_name
     }
-    r = requests.get(OPEN_METEO_FWI, params=params, timeout=60)
+    r = HTTP.get(OPEN_METEO_FWI, params=params, timeout=60)
     r.raise_for_status()
     data = r.json()
     if "hourly" not in data:
@@ -0,0 +1,201 @@
+"""
+Caching proxy in front of Google Places API (New).
+
+Nearby and text searches are keyed by the geohash cell of the search centre
+(the request is sent for the cell centre, so every point in the cell shares
+the answer), the included types / query and the field mask. Every place
+returned by any call is merged by place id into one store, which also
+answers /details lookups when the requested fields were already seen;
+otherwise details are fetched and kept for PLACES_DETAILS_TTL. Identical
+concurrent upstream calls are coalesced. Error responses are never cached;
+searches raise PlacesUpstreamError carrying Google's status and body.
+
+Env:
+  PLACES_GEOHASH_PRECISION  geohash length for search keys (6 = ~1.2 x 0.6 km)
+  PLACES_SEARCH_TTL         seconds a nearby / text search stays cached
+  PLACES_DETAILS_TTL        seconds a place record stays cached
+"""
+from __future__ import annotations
+import os
+import threading
+from typing import Iterable, List, Optional, Tuple
+
+from earthpulse_ml.http_transport import HTTP
+from earthpulse_ml.singleflight import SingleFlight
+from earthpulse_ml.ttl_cache import TTLCache
+
+PLACES_BASE = "https://places.googleapis.com/v1"
+PLACES_GEOHASH_PRECISION = int(os.environ.get("PLACES_GEOHASH_PRECISION", "6"))
+PLACES_SEARCH_TTL = float(os.environ.get("PLACES_SEARCH_TTL", str(6 * 3600)))
+PLACES_DETAILS_TTL = float(os.environ.get("PLACES_DETAILS_TTL", str(7 * 86400)))
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash_encode(lat: float, lon: float, precision: int = PLACES_GEOHASH_PRECISION) -> str:
+    lat_lo, lat_hi, lon_lo, lon_hi = -90.0, 90.0, -180.0, 180.0
+    out, bits, ch, even = [], 0, 0, True
+    while len(out) < precision:
+        if even:
+            mid = (lon_lo + lon_hi) / 2
+            ch = (ch << 1) | (lon >= mid)
+            lon_lo, lon_hi = (mid, lon_hi) if lon >= mid else (lon_lo, mid)
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            ch = (ch << 1) | (lat >= mid)
+            lat_lo, lat_hi = (mid, lat_hi) if lat >= mid else (lat_lo, mid)
+        even = not even
+        bits += 1
+        if bits == 5:
+            out.append(_BASE32[ch])
+            bits, ch = 0, 0
+    return "".join(out)
+
+
+def geohash_center(gh: str) -> Tuple[float, float]:
+    lat_lo, lat_hi, lon_lo, lon_hi = -90.0, 90.0, -180.0, 180.0
+    even = True
+    for c in gh:
+        v = _BASE32.index(c)
+        for shift in range(4, -1, -1):
+            bit = (v >> shift) & 1
+            if even:
+                mid = (lon_lo + lon_hi) / 2
+                lon_lo, lon_hi = (mid, lon_hi) if bit else (lon_lo, mid)
+            else:
+                mid = (lat_lo + lat_hi) / 2
+                lat_lo, lat_hi = (mid, lat_hi) if bit else (lat_lo, mid)
+            even = not even
+    return (lat_lo + lat_hi) / 2, (lon_lo + lon_hi) / 2
+
+
+class PlacesUpstreamError(RuntimeError):
+    """Non-200 answer from Google Places; status and body are passed through to the client."""
+
+    def __init__(self, status: int, body: dict):
+        super().__init__(f"Places upstream returned {status}")
+        self.status = status
+        self.body = body
+
+
+def _json(r) -> dict:
+    try:
+        return r.json()
+    except ValueError:
+        return {"error": {"code": r.status_code, "message": r.text[:500]}}
+
+
+def _mask_fields(field_mask: str, prefix: str = "") -> frozenset:
+    """'places.id,places.rating' -> {'id', 'rating'}"""
+    fields = (f.strip() for f in field_mask.split(","))
+    return frozenset(f[len(prefix):] if prefix and f.startswith(prefix) else f for f in fields if f)
+
+
+class PlacesProxy:
+    def __init__(self, api_key: Optional[str] = None, precision: int = PLACES_GEOHASH_PRECISION,
+                 search_ttl: float = PLACES_SEARCH_TTL, details_ttl: float = PLACES_DETAILS_TTL):
+        self.api_key = api_key
+        self.precision = precision
+        self._searches = TTLCache(max_entries=8192, ttl=search_ttl)   # key -> [place ids] / raw body
+        self._places = TTLCache(max_entries=50000, ttl=details_ttl)   # place id -> (fields, record)
+        self._merge_lock = threading.Lock()
+        self._flights = SingleFlight("places")
+        self.upstream_calls = 0
+
+    def _headers(self, field_mask: str, json_body: bool = False) -> dict:
+        headers = {"X-Goog-Api-Key": self.api_key, "X-Goog-FieldMask": field_mask}
+        if json_body:
+            headers["Content-Type"] = "application/json"
+        return headers
+
+    def _merge(self, places: Iterable[dict], fields: frozenset):
+        """Fold records into the per-place store, accumulating the fields known for each."""
+        with self._merge_lock:
+            for p in places:
+                pid = p.get("id")
+                if not pid:
+                    continue
+                known, record = self._places.get(pid, (frozenset(), {}))
+                self._places.set(pid, (known | fields, {**record, **p}))
+
+    def _post(self, path: str, payload: dict, field_mask: str) -> Tuple[int, dict]:
+        self.upstream_calls += 1
+        r = HTTP.post(f"{PLACES_BASE}/{path}", json=payload, headers=self._headers(field_mask, json_body=True))
+        return r.status_code, _json(r)
+
+    def _search(self, key: tuple, path: str, payload: dict, field_mask: str) -> List[dict]:
+        status, data = self._post(path, payload, field_mask)
+        if status != 200:
+            print("⚠ Places search failed:", status, data.get("error", {}).get("message"))
+            raise PlacesUpstreamError(status, data)
+        places = data.get("places", [])
+        self._merge(places, _mask_fields(field_mask, "places."))
+        self._searches.set(key, [p.get("id") for p in places])
+        return places
+
+    def _from_ids(self, ids: List[str]) -> Optional[List[dict]]:
+        out = []
+        for pid in ids:
+            entry = self._places.get(pid)
+            if entry is None:
+                return None  # a member expired; refetch the whole search
+            out.append(entry[1])
+        return out
+
+    def nearby(self, lat: float, lon: float, included_types: List[str], field_mask: str,
+               radius: float = 5000) -> List[dict]:
+        """places:searchNearby around the geohash cell of (lat, lon)."""
+        gh = geohash_encode(lat, lon, self.precision)
+        key = ("nearby", gh, tuple(sorted(included_types)), field_mask, radius)
+        ids = self._searches.get(key)
+        if ids is not None:
+            places = self._from_ids(ids)
+            if places is not None:
+                return places
+
+        clat, clon = geohash_center(gh)
+        payload = {
+            "includedTypes": list(included_types),
+            "locationRestriction": {"circle": {"center": {"latitude": clat, "longitude": clon}, "radius": radius}}
+        }
+        return self._flights.do(key, self._search, key, "places:searchNearby", payload, field_mask)
+
+    def search_text(self, query: str, lat: Optional[float], lon: Optional[float], field_mask: str,
+                    radius: float = 5000) -> List[dict]:
+        """places:searchText biased to the geohash cell of (lat, lon) when given."""
+        gh = geohash_encode(lat, lon, self.precision) if lat is not None and lon is not None else None
+        key = ("text", " ".join((query or "").split()).casefold(), gh, field_mask, radius)
+        ids = self._searches.get(key)
+        if ids is not None:
+            places = self._from_ids(ids)
+            if places is not None:
+                return places
+
+        payload: dict = {"textQuery": query}
+        if gh is not None:
+            clat, clon = geohash_center(gh)
+            payload["locationBias"] = {"circle": {"center": {"latitude": clat, "longitude": clon}, "radius": radius}}
+        return self._flights.do(key, self._search, key, "places:searchText", payload, field_mask)
+
+    def details(self, place_id: str, field_mask: str) -> Tuple[int, dict]:
+        """(status, place) for one place id; served from the merged store when it has the fields."""
+        wanted = _mask_fields(field_mask)
+        entry = self._places.get(place_id)
+        if entry is not None and wanted <= entry[0]:
+            return 200, entry[1]
+        return self._flights.do(("details", place_id, field_mask), self._details, place_id, field_mask, wanted)
+
+    def _details(self, place_id: str, field_mask: str, wanted: frozenset) -> Tuple[int, dict]:
+        self.upstream_calls += 1
+        r = HTTP.get(f"{PLACES_BASE}/places/{place_id}", headers=self._headers(field_mask))
+        data = _json(r)
+        if r.status_code == 200:
+            self._merge([{**data, "id": data.get("id", place_id)}], wanted)
+        return r.status_code, data
+
+    def stats(self) -> dict:
+        return {"upstream_calls": self.upstream_calls, "searches": self._searches.stats(),
+                "places": self._places.stats(), "coalesced": self._flights.stats()}
+
+
+PLACES = PlacesProxy(api_key=os.getenv("GOOGLE_API_KEY"))
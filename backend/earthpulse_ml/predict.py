@@ -1,41 +1,12 @@
 from __future__ import annotations
-import os
-import requests
-from datetime import datetime
 import pandas as pd
-import numpy as np
-import tensorflow as tf
-from earthpulse_ml.openmeteo_client import fetch_realtime
+from earthpulse_ml.model_runtime import HazardRuntime
+from earthpulse_ml.weather_cache import fetch_realtime_cached
+from earthpulse_ml.geocode import geocode_city
 from earthpulse_ml.feature_engineering import add_lagged_aggregates, select_features
 
-# Initial city → Lat/Lon mapping
-CITY_COORDS = {
-    "Delhi": (28.6139, 77.2090),
-    "Mumbai": (19.0760, 72.8777),
-    "California": (36.7783, -119.4179)
-}
-
-def geocode_city(city: str) -> tuple[float, float]:
-    """Fetch coordinates dynamically using Open-Meteo Geocoding API."""
-    url = "https://geocoding-api.open-meteo.com/v1/search"
-    resp = requests.get(url, params={"name": city, "count": 1, "language": "en", "format": "json"})
-    if resp.status_code != 200:
-        raise ValueError(f"Failed to geocode city '{city}' (status {resp.status_code})")
-    data = resp.json()
-    if "results" not in data or not data["results"]:
-        raise ValueError(f"No coordinates found for city '{city}'")
-    coords = data["results"][0]
-    return coords["latitude"], coords["longitude"]
-
-def load_model(model_path: str):
-    model = tf.keras.models.load_model(model_path)
-    feat_file = model_path + ".features.txt"
-    with open(feat_file, "r") as f:
-        feat_cols = [line.strip() for line in f if line.strip()]
-    return model, feat_cols
-
 def _prepare_features(lat: float, lon: float) -> tuple[pd.DataFrame, dict]:
-    wx = fetch_realtime(lat, lon, timezone_name="auto")
+    wx = fetch_realtime_cached(lat, lon, timezone_name="auto")
     wx_eng = add_lagged_aggregates(wx)
     feats = select_features(wx_eng).fillna(0.0)
     # Latest weather snapshot for output
@@ -52,26 +23,19 @@ def predict_risks(city: str | None, lat: float | None, lon: float | None,
                   flood_model_path: str, wildfire_model_path: str):
     # Resolve coordinates
     if city:
-        if city in CITY_COORDS:
-            lat, lon = CITY_COORDS[city]
-        else:
-            print(f"ℹ️ City '{city}' not in local mapping, fetching coordinates...")
-            lat, lon = geocode_city(city)
-            CITY_COORDS[city] = (lat, lon)  # Cache for future use
+        # shared geocoder: pre-seeded, LRU + on-disk cache, request timeout
+        lat, lon = geocode_city(city, country=None)
     elif lat is None or lon is None:
         raise ValueError("Either --city or both --lat and --lon must be provided")
 
-    # Load models & features
-    flood_model, flood_feats = load_model(flood_model_path)
-    fire_model, fire_feats = load_model(wildfire_model_path)
+    # Load both models into one fused runtime
+    runtime = HazardRuntime({"flood": flood_model_path, "wildfire": wildfire_model_path})
     feats, weather_snapshot = _prepare_features(lat, lon)
 
-    # Feature alignment
-    X_flood = feats.reindex(columns=flood_feats, fill_value=0.0).values.astype("float32")
-    X_fire = feats.reindex(columns=fire_feats, fill_value=0.0).values.astype("float32")
-
-    flood_prob = float(flood_model.predict(X_flood, verbose=0)[0][0])
-    fire_prob = float(fire_model.predict(X_fire, verbose=0)[0][0])
+    # Feature alignment + single forward pass
+    probs = runtime.predict(runtime.align(feats))
+    flood_prob = float(probs["flood"][0])
+    fire_prob = float(probs["wildfire"][0])
 
     flood_label = "High" if flood_prob >= 0.5 else "Low"
     wildfire_label = "High" if fire_prob >= 0.5 else "Low"
@@ -0,0 +1,342 @@
+"""
+PDF disaster report rendering for /download_report.
+
+`render_report` turns a /predict body and a /weather payload into PDF bytes
+without touching the filesystem: charts are drawn on standalone matplotlib
+Figures (no pyplot global state, so concurrent reports don't share a figure)
+and their Agg pixel buffers are handed to fpdf2 directly (no temp files, no
+PNG encode / decode). Fonts go through fpdf2's public add_font only
+(requirements pins fpdf2).
+
+matplotlib and fpdf2 are imported on first use to keep them off the startup path.
+
+Env:
+  REPORT_FONT_DIR  directory holding the DejaVu TTFs (default: backend/fonts)
+"""
+from __future__ import annotations
+import os
+from datetime import datetime
+from typing import Optional
+
+REPORT_FONT_DIR = os.environ.get(
+    "REPORT_FONT_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fonts"))
+FONT_FILES = {"": "DejaVuSans.ttf", "B": "DejaVuSans-Bold.ttf", "I": "DejaVuSans-Oblique.ttf"}
+
+
+class _ReportFonts:
+    """Registers DejaVu on each document through fpdf2's add_font.
+
+    The TTFs are parsed per document (tens of ms); that is paid once per city
+    and hour, since finished PDFs are cached.
+    """
+
+    def __init__(self, font_dir: str = REPORT_FONT_DIR):
+        self.font_dir = font_dir
+        self.installs = self.failures = 0
+
+    def install(self, pdf) -> bool:
+        """Register DejaVu on pdf; False when the fonts are unavailable."""
+        try:
+            for style, fname in FONT_FILES.items():
+                pdf.add_font("DejaVu", style, os.path.join(self.font_dir, fname))
+        except Exception as e:
+            print("⚠ Report fonts unavailable:", e)
+            self.failures += 1
+            return False
+        self.installs += 1
+        return True
+
+    def stats(self) -> dict:
+        return {"installs": self.installs, "failures": self.failures}
+
+
+REPORT_FONTS = _ReportFonts()
+
+
+def canonical_city(city: str) -> str:
+    """Title-case name derived from the report cache key, so every spelling of a city gets the same PDF."""
+    return " ".join(city.split()).casefold().title()
+
+
+def _chart_image(forecast: list, kind: str):
+    """7-day temperature ("temp") or rain-probability ("rain") chart as a PIL image."""
+    dates = [d.get("date", "") for d in forecast]
+    if not dates:
+        return None
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(6, 3.2))
+    ax = fig.subplots()
+    if kind == "temp":
+        ax.plot(dates, [d["day"].get("mintemp_c", 0) for d in forecast], marker="o", label="Min Temp")
+        ax.plot(dates, [d["day"].get("maxtemp_c", 0) for d in forecast], marker="o", label="Max Temp")
+        ax.set_title("7-Day Temperature Trend")
+        ax.set_ylabel("°C")
+        ax.grid(True, linewidth=0.3)
+        ax.legend()
+    else:
+        ax.bar(dates, [d["day"].get("daily_chance_of_rain", 0) for d in forecast], color="#4A90E2")
+        ax.set_title("7-Day Rain Probability")
+        ax.set_ylabel("%")
+        ax.set_ylim(0, 100)
+        ax.grid(axis="y", linewidth=0.3)
+    ax.tick_params(axis="x", labelrotation=45, labelsize=8)
+    ax.tick_params(axis="y", labelsize=8)
+    fig.tight_layout()
+
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from PIL import Image
+
+    fig.set_dpi(150)
+    canvas = FigureCanvasAgg(fig)
+    canvas.draw()
+    return Image.frombuffer("RGBA", canvas.get_width_height(), canvas.buffer_rgba()).convert("RGB")
+
+
+def render_report(city: str, pred: dict, weather: dict, generated_at: Optional[datetime] = None) -> bytes:
+    """EarthPulse — Professional Graphical PDF Report, as bytes."""
+    from fpdf import FPDF
+
+    cur = weather.get("current", {})
+    forecast = weather.get("forecast", {}).get("forecastday", [])
+
+    flood = pred.get("flood", {"probability": 0, "label": "N/A"})
+    wildfire = pred.get("wildfire", {"probability": 0, "label": "N/A"})
+
+    # -------------------------------
+    # CHART IMAGES
+    # -------------------------------
+    charts = {}
+    for kind in ("temp", "rain"):
+        try:
+            charts[kind] = _chart_image(forecast, kind)
+        except Exception as e:
+            print(f"⚠ Report {kind} chart failed:", e)
+            charts[kind] = None
+
+    # -------------------------------
+    # BUILD PDF
+    # -------------------------------
+    pdf = FPDF("P", "mm", "A4")
+    pdf.set_auto_page_break(auto=True, margin=12)
+
+    def draw_page_border():
+        pdf.set_draw_color(180, 180, 180)   # light grey
+        pdf.set_line_width(0.8)
+        pdf.rect(5, 5, 200, 287)            # (x, y, width, height)
+
+    pdf.add_page()
+    draw_page_border()
+
+    # Fonts (parsed once per process)
+    if REPORT_FONTS.install(pdf):
+        pdf.set_font("DejaVu", "", 11)
+    else:
+        pdf.set_font("Arial", "", 11)
+
+    # Title
+    pdf.set_font("DejaVu", "B", 18)
+    pdf.set_text_color(30, 144, 255)
+    pdf.cell(0, 10, f"🌍 EarthPulse Disaster Report — {canonical_city(city)}", ln=True)
+    pdf.ln(2)
+
+    pdf.set_font("DejaVu", "", 11)
+    pdf.set_text_color(0, 0, 0)
+    pdf.cell(0, 6, f"Generated: {(generated_at or datetime.now()).strftime('%Y-%m-%d %H:%M')}", ln=True)
+    pdf.ln(4)
+
+    # -------------------------------
+    # Section helper
+    # -------------------------------
+    def section(title, fill=(160, 30, 30)):
+        pdf.set_font("DejaVu", "B", 14)
+        pdf.set_fill_color(*fill)
+        pdf.set_text_color(255, 255, 255)
+        pdf.cell(0, 10, f"  {title}", ln=True, fill=True)
+        pdf.set_text_color(0, 0, 0)
+        pdf.ln(3)
+
+    # -------------------------------
+    # RISK BAR
+    # -------------------------------
+    def draw_risk(label, prob):
+        pct = int(prob * 100)
+        bar_w = 120
+        bar_h = 8
+
+        # color scale
+        if pct < 30:
+            color = (0, 200, 0)
+        elif pct < 60:
+            color = (255, 215, 0)
+        elif pct < 80:
+            color = (255, 165, 0)
+        else:
+            color = (255, 60, 60)
+
+        pdf.set_font("DejaVu", "B", 11)
+        pdf.cell(0, 6, f"{label}: {pct}%", ln=True)
+
+        x = pdf.get_x()
+        y = pdf.get_y()
+
+        # background
+        pdf.set_fill_color(230, 230, 230)
+        pdf.rect(x, y, bar_w, bar_h, "F")
+
+        # bar
+        pdf.set_fill_color(*color)
+        pdf.rect(x, y, bar_w * pct / 100, bar_h, "F")
+
+        pdf.ln(bar_h + 4)
+
+    # -------------------------------
+    # CURRENT WEATHER
+    # -------------------------------
+    section("Current Weather", (30, 100, 160))
+    pdf.set_font("DejaVu", "", 11)
+    pdf.multi_cell(0, 6,
+        f"Temperature: {cur.get('temp_c')}°C (Feels like {cur.get('feelslike_c')}°C)\n"
+        f"Humidity: {cur.get('humidity')}%\n"
+        f"Wind: {cur.get('wind_kph')} km/h ({cur.get('wind_dir')})\n"
+        f"Visibility: {cur.get('vis_km')} km\n"
+        f"Pressure: {cur.get('pressure_mb')} mb"
+    )
+    pdf.ln(2)
+
+    # -------------------------------
+    # RISK SECTION
+    # -------------------------------
+    section("Disaster Risk Assessment")
+
+    draw_risk("Flood Risk", flood["probability"])
+    draw_risk("Wildfire Risk", wildfire["probability"])
+
+    # -------------------------------
+    # 24-HOUR SNAPSHOT
+    # -------------------------------
+    section("24-Hour Snapshot", (80, 80, 80))
+
+    hours = forecast[0].get("hour", [])[:12] if forecast else []
+
+    pdf.set_font("DejaVu", "B", 10)
+    pdf.set_fill_color(230, 230, 230)
+    pdf.cell(45, 7, "Time", 1, 0, "C", True)
+    pdf.cell(40, 7, "Temp", 1, 0, "C", True)
+    pdf.cell(30, 7, "Rain%", 1, 1, "C", True)
+
+    pdf.set_font("DejaVu", "", 10)
+
+    for h in hours:
+        # Clean and safe timestamp
+        t = h.get("time", "").replace("T", " ").replace("+00:00", "")
+
+        temp = f"{h.get('temp_c', 'N/A')}°C"
+        rain = f"{h.get('chance_of_rain', 'N/A')}%"
+
+        pdf.cell(45, 7, t, border=1)
+        pdf.cell(40, 7, temp, border=1)
+        pdf.cell(30, 7, rain, border=1)
+        pdf.ln(7)
+
+    # spacing before next section
+    pdf.ln(5)
+
+    # -------------------------------
+    # 7-DAY TABLE
+    # -------------------------------
+    section("7-Day Forecast", (50, 50, 50))
+
+    pdf.set_font("DejaVu", "B", 10)
+    pdf.set_fill_color(235, 235, 235)
+    pdf.cell(30, 8, "Date", 1, 0, "C", True)
+    pdf.cell(65, 8, "Condition", 1, 0, "C", True)
+    pdf.cell(25, 8, "Min°", 1, 0, "C", True)
+    pdf.cell(25, 8, "Max°", 1, 0, "C", True)
+    pdf.cell(25, 8, "Rain%", 1, 1, "C", True)
+
+    pdf.set_font("DejaVu", "", 10)
+
+    for d in forecast:
+        day = d["day"]
+        pdf.cell(30, 8, d["date"], 1)
+        pdf.cell(65, 8, day["condition"]["text"][:30], 1)
+        pdf.cell(25, 8, str(day["mintemp_c"]), 1)
+        pdf.cell(25, 8, str(day["maxtemp_c"]), 1)
+        pdf.cell(25, 8, str(day["daily_chance_of_rain"]), 1)
+        pdf.ln()
+
+    # -------------------------------
+    # INSERT CHARTS
+    # -------------------------------
+    def insert_chart(img, title):
+        if img is None:
+            return
+
+        # --- If space is low, add new page + border ---
+        if pdf.get_y() > 180:   # 200 is too late, 180 is safer
+            pdf.add_page()
+            draw_page_border()
+
+        # --- Section Title ---
+        pdf.set_font("DejaVu", "B", 14)
+        pdf.cell(0, 8, title, ln=True)
+
+        img_w, img_h = 170, 90
+        x = (210 - img_w) / 2
+        y = pdf.get_y() + 3
+
+        # Chart border box
+        pdf.set_draw_color(120, 120, 120)
+        pdf.rect(x - 2, y - 2, img_w + 4, img_h + 4)
+
+        pdf.image(img, x=x, y=y, w=img_w, h=img_h)
+
+        # Move down BELOW chart
+        pdf.ln(img_h + 16)
+
+        # If auto-page-break occurred during chart insert, the cursor is at
+        # the top of a new page, which still needs its border.
+        if pdf.get_y() < 20:
+            draw_page_border()
+
+    insert_chart(charts["temp"], "7-Day Temperature Trend")
+    insert_chart(charts["rain"], "7-Day Rain Probability")
+
+    def add_footer():
+        # Always disable auto-page break during footer creation
+        auto_break = pdf.auto_page_break
+        pdf.set_auto_page_break(False)
+
+        # Move cursor to safe bottom position INSIDE border
+        pdf.set_y(265)   # ~275 is too close; 265 is safer
+
+        # Draw footer text as a single block
+        pdf.set_font("DejaVu", "I", 10)
+        pdf.set_text_color(90, 90, 90)
+        pdf.cell(0, 6, '"Preparedness today ensures safety tomorrow."', ln=True, align="C")
+
+        pdf.set_font("DejaVu", "B", 11)
+        pdf.set_text_color(60, 60, 60)
+        pdf.cell(0, 6, "— Team EarthPulse", ln=True, align="C")
+
+        # Restore page-break setting
+        pdf.set_auto_page_break(auto_break, margin=12)
+
+    # -------------------------------
+    # ACTION PLAN
+    # -------------------------------
+    pdf.add_page()
+    draw_page_border()
+    section("Preparedness & Action Plan", (30, 144, 255))
+    pdf.set_font("DejaVu", "", 11)
+    pdf.multi_cell(0, 6,
+        "• Prepare emergency kit: water, flashlight, medicines.\n"
+        "• Avoid low-lying areas during heavy rainfall.\n"
+        "• Keep communication devices charged.\n"
+        "• Follow official alerts from authorities.\n"
+        "• Avoid dry vegetation during wildfire warnings."
+    )
+    add_footer()
+
+    return bytes(pdf.output())
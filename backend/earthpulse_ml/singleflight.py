@@ -0,0 +1,95 @@
+"""
+Single-flight call coalescing.
+
+Concurrent callers that ask for the same key while a computation is already
+running wait for that computation and share its result (or exception) instead
+of starting their own. Nothing is cached once the call completes; pair it with
+a cache for that.
+"""
+from __future__ import annotations
+import threading
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Tuple
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self, name: str = ""):
+        self.name = name
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.shared = 0
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def claim(self, keys: Iterable[Hashable]) -> Tuple[List[Hashable], Dict[Hashable, _Call]]:
+        """
+        Lead the flights for several keys at once (for callers that fetch in bulk).
+
+        Returns (claimed keys, {key: call} already in flight elsewhere). Every
+        claimed key must be settled with `finish`; the other calls are read
+        with `wait`.
+        """
+        claimed, joined = [], {}
+        with self._lock:
+            for key in keys:
+                call = self._calls.get(key)
+                if call is None:
+                    self._calls[key] = _Call()
+                    self.executed += 1
+                    claimed.append(key)
+                else:
+                    self.shared += 1
+                    joined[key] = call
+        return claimed, joined
+
+    def finish(self, key: Hashable, result: Any = None, error: BaseException = None):
+        """Settle a claimed key, waking its waiters."""
+        with self._lock:
+            call = self._calls.pop(key)
+        call.result, call.error = result, error
+        call.done.set()
+
+    @staticmethod
+    def wait(call: _Call) -> Any:
+        call.done.wait()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"in_flight": len(self._calls), "executed": self.executed, "shared": self.shared}
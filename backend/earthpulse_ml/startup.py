@@ -0,0 +1,83 @@
+"""
+Startup-phase timings and memory baseline for the Flask service.
+
+`STARTUP` is created on first import, which `app.py` does before anything
+heavy, so phase timings are measured from (close to) process start. Budgets
+come from the environment and are reported alongside the measurements:
+
+  STARTUP_BUDGET_MS      total import + model load + warmup time
+  STARTUP_RSS_BUDGET_MB  resident memory once the service is ready
+"""
+from __future__ import annotations
+import os
+import resource
+import sys
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Optional
+
+STARTUP_BUDGET_MS = float(os.environ.get("STARTUP_BUDGET_MS", "5000"))
+STARTUP_RSS_BUDGET_MB = float(os.environ.get("STARTUP_RSS_BUDGET_MB", "512"))
+
+
+def rss_mb() -> float:
+    """Current resident set size in MiB (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    return peak / (1024.0 * 1024.0) if sys.platform == "darwin" else peak / 1024.0
+
+
+class StartupProfile:
+    """Named, ordered phase timings plus the RSS baseline at readiness."""
+
+    def __init__(self):
+        self._t0 = self._last = time.perf_counter()
+        self.phases: "OrderedDict[str, float]" = OrderedDict()
+        self.ready_ms: Optional[float] = None
+        self.baseline_rss_mb: Optional[float] = None
+
+    def checkpoint(self, name: str):
+        """Record the time since the previous checkpoint (or process start) as a phase."""
+        now = time.perf_counter()
+        self.phases[name] = round((now - self._last) * 1000.0, 1)
+        self._last = now
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = round((time.perf_counter() - start) * 1000.0, 1)
+
+    def mark_ready(self):
+        """Record total startup time and the baseline RSS; safe to call repeatedly."""
+        if self.ready_ms is None:
+            self.ready_ms = round((time.perf_counter() - self._t0) * 1000.0, 1)
+            self.baseline_rss_mb = round(rss_mb(), 1)
+
+    def snapshot(self) -> dict:
+        return {
+            "phases_ms": dict(self.phases),
+            "ready_ms": self.ready_ms,
+            "baseline_rss_mb": self.baseline_rss_mb,
+            "current_rss_mb": round(rss_mb(), 1),
+            "budget": {
+                "ready_ms": STARTUP_BUDGET_MS,
+                "rss_mb": STARTUP_RSS_BUDGET_MB,
+                "ready_within_budget": self.ready_ms is not None and self.ready_ms <= STARTUP_BUDGET_MS,
+                "rss_within_budget": self.baseline_rss_mb is not None
+                                     and self.baseline_rss_mb <= STARTUP_RSS_BUDGET_MB,
+            },
+        }
+
+
+STARTUP = StartupProfile()
@@ -0,0 +1,150 @@
+"""
+XYZ (Web Mercator) risk raster tiles.
+
+A tile is rendered from a lattice of grid cells: at high zoom the lattice is
+the weather grid itself, at low zoom a coarser multiple of it so a tile never
+needs more than ~TILE_MAX_SAMPLES² cells. Below TILE_COARSE_ZOOM the per-edge
+budget halves with every zoom level (down to TILE_MIN_SAMPLES), so a whole
+low-zoom viewport stays within a few hundred upstream weather cells. Lattice
+points are global (multiples of the sampling resolution), so neighbouring
+tiles resolve to the same cells and share weather frames and cached
+probabilities.
+
+Rendered PNGs are kept on disk under one directory per (hour, model version);
+directories from previous hours are removed when a new one is created.
+
+Env:
+  TILE_CACHE_DIR     root directory for rendered tiles
+  TILE_MAX_SAMPLES   lattice points per tile edge from TILE_COARSE_ZOOM up
+  TILE_COARSE_ZOOM   below this zoom the per-edge budget halves per level
+  TILE_MIN_SAMPLES   smallest per-edge budget
+"""
+from __future__ import annotations
+import io
+import math
+import os
+import shutil
+import tempfile
+import threading
+from typing import Optional, Tuple
+
+import numpy as np
+
+TILE_CACHE_DIR = os.environ.get("TILE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "earthpulse_tiles"))
+TILE_MAX_SAMPLES = int(os.environ.get("TILE_MAX_SAMPLES", "16"))
+TILE_COARSE_ZOOM = int(os.environ.get("TILE_COARSE_ZOOM", "7"))
+TILE_MIN_SAMPLES = int(os.environ.get("TILE_MIN_SAMPLES", "4"))
+TILE_SIZE = 256
+
+# (low-risk colour, high-risk colour) per hazard
+HAZARD_COLORS = {
+    "flood": ((198, 219, 239), (8, 48, 107)),
+    "wildfire": ((254, 230, 206), (166, 54, 3)),
+}
+
+
+def tile_bounds(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """(west, south, east, north) in degrees."""
+    n = 2 ** z
+    west = x / n * 360.0 - 180.0
+    east = (x + 1) / n * 360.0 - 180.0
+    north = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / n))))
+    south = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * (y + 1) / n))))
+    return west, south, east, north
+
+
+def tile_samples(z: int) -> int:
+    """Lattice points per tile edge at zoom z."""
+    return max(TILE_MIN_SAMPLES, TILE_MAX_SAMPLES >> max(0, TILE_COARSE_ZOOM - z))
+
+
+def sample_res(z: int, grid_deg: float) -> float:
+    """Lattice spacing for zoom z: a multiple of grid_deg, ~tile_samples(z) points per tile edge."""
+    tile_deg = 360.0 / 2 ** z
+    return grid_deg * max(1, math.ceil(tile_deg / tile_samples(z) / grid_deg))
+
+
+def pixel_lattice(z: int, x: int, y: int, res: float):
+    """
+    Lattice indices for every pixel row / column of a tile.
+
+    Returns (lat_idx, lon_idx): integer arrays of length TILE_SIZE where the
+    lattice point is (idx * res). Pixel centres are projected with Web Mercator.
+    """
+    n = 2 ** z
+    px = (np.arange(TILE_SIZE) + 0.5) / TILE_SIZE
+    lons = (x + px) / n * 360.0 - 180.0
+    lats = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * (y + px) / n))))
+    return np.round(lats / res).astype(int), np.round(lons / res).astype(int)
+
+
+def colorize(probs: np.ndarray, hazard: str) -> np.ndarray:
+    """RGBA uint8 image for a probability grid; NaN becomes transparent."""
+    low, high = (np.array(c, dtype="float32") for c in HAZARD_COLORS[hazard])
+    p = np.clip(np.nan_to_num(probs, nan=0.0), 0.0, 1.0)[..., None]
+    rgb = low + (high - low) * p
+    alpha = np.where(np.isnan(probs), 0.0, 60.0 + 170.0 * p[..., 0])
+    return np.dstack([rgb, alpha]).astype("uint8")
+
+
+def render_png(probs: np.ndarray, hazard: str) -> bytes:
+    from PIL import Image  # heavy; only the tile route needs it
+
+    buf = io.BytesIO()
+    Image.fromarray(colorize(probs, hazard), mode="RGBA").save(buf, format="PNG", optimize=True)
+    return buf.getvalue()
+
+
+class TileDiskCache:
+    """PNG bytes on disk under <root>/<generation>/<hazard>/<z>/<x>/<y>.png."""
+
+    def __init__(self, root: str = TILE_CACHE_DIR):
+        self.root = root
+        self._generation: Optional[str] = None
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.writes = 0
+
+    def _path(self, generation: str, hazard: str, z: int, x: int, y: int) -> str:
+        return os.path.join(self.root, generation, hazard, str(z), str(x), f"{y}.png")
+
+    def _rotate(self, generation: str):
+        """Drop tiles from previous hours / model versions once a new generation starts."""
+        with self._lock:
+            if self._generation == generation:
+                return
+            self._generation = generation
+        if os.path.isdir(self.root):
+            for name in os.listdir(self.root):
+                if name != generation:
+                    shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+
+    def get(self, generation: str, hazard: str, z: int, x: int, y: int) -> Optional[bytes]:
+        self._rotate(generation)
+        try:
+            with open(self._path(generation, hazard, z, x, y), "rb") as f:
+                data = f.read()
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return data
+
+    def put(self, generation: str, hazard: str, z: int, x: int, y: int, data: bytes):
+        path = self._path(generation, hazard, z, x, y)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # write-then-rename so concurrent readers never see a partial PNG
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+            self.writes += 1
+        except OSError as e:
+            print("⚠ Tile cache write failed:", e)
+
+    def stats(self) -> dict:
+        return {"root": self.root, "generation": self._generation,
+                "hits": self.hits, "misses": self.misses, "writes": self.writes}
+
+
+TILE_CACHE = TileDiskCache()
@@ -77,6 +77,10 @@ def train_model(parquet_path: str, out_path: str):
         f.write("\n".join(feat_cols))
     print(f"📝 Feature list saved at: {feat_file}")
 
+    # Lightweight serving artifact (NumPy backend) kept in sync with the .keras file
+    from earthpulse_ml.export_lite import export_npz
+    export_npz(out_path)
+
 if __name__ == "__main__":
     import argparse
     ap = argparse.ArgumentParser()
@@ -0,0 +1,247 @@
+"""
+Persistent, tile-keyed cache of OSM waterway geometry from Overpass.
+
+Waterways are fetched per fixed WATERWAY_TILE_DEG tile and stored in SQLite
+(ways deduplicated by OSM id, tile membership kept separately), so repeat map
+views never reach Overpass until a tile is older than WATERWAY_MAX_AGE_DAYS.
+Tiles are small (0.25°) so each Overpass query stays light; the several tiles
+a view covers are fetched concurrently. Tile keys include the tile size, so
+changing WATERWAY_TILE_DEG never reuses tiles of another size.
+Geometry is served simplified with Douglas-Peucker at a tolerance of about
+half a screen pixel for the requested zoom.
+
+Env:
+  WATERWAY_DB_PATH       SQLite file (falls back to an in-memory database)
+  WATERWAY_TILE_DEG      fetch tile size, degrees
+  WATERWAY_MAX_AGE_DAYS  tiles older than this are refreshed
+  WATERWAY_FETCH_WORKERS concurrent Overpass tile fetches per request
+"""
+from __future__ import annotations
+import math
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from earthpulse_ml.http_transport import HTTP
+from earthpulse_ml.singleflight import SingleFlight
+from earthpulse_ml.ttl_cache import TTLCache
+
+OVERPASS_URL = "https://overpass-api.de/api/interpreter"
+WATERWAY_DB_PATH = os.environ.get("WATERWAY_DB_PATH", os.path.join(tempfile.gettempdir(), "earthpulse_waterways.sqlite"))
+WATERWAY_TILE_DEG = float(os.environ.get("WATERWAY_TILE_DEG", "0.25"))
+WATERWAY_MAX_AGE_DAYS = float(os.environ.get("WATERWAY_MAX_AGE_DAYS", "30"))
+# Overpass allows few parallel slots per client IP
+WATERWAY_FETCH_WORKERS = int(os.environ.get("WATERWAY_FETCH_WORKERS", "2"))
+SIMPLIFY_PX = 0.5
+
+# Relations were dropped: `out geom` gives them no top-level geometry, so the
+# parser never used them. way["waterway"] already covers river/stream/canal/...
+OVERPASS_QUERY = """
+[out:json][timeout:25][bbox:{south},{west},{north},{east}];
+(
+  way["waterway"];
+  way["natural"="water"];
+  way["landuse"="reservoir"];
+);
+out geom;
+"""
+
+
+def simplify(coords: np.ndarray, tolerance: float) -> np.ndarray:
+    """Douglas-Peucker on an (n, 2) array; tolerance in coordinate units."""
+    n = len(coords)
+    if n < 3 or tolerance <= 0:
+        return coords
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        s, e = stack.pop()
+        if e - s < 2:
+            continue
+        seg = coords[e] - coords[s]
+        pts = coords[s + 1:e] - coords[s]
+        length = math.hypot(seg[0], seg[1])
+        if length == 0:
+            d = np.hypot(pts[:, 0], pts[:, 1])
+        else:
+            d = np.abs(seg[0] * pts[:, 1] - seg[1] * pts[:, 0]) / length
+        i = int(np.argmax(d))
+        if d[i] > tolerance:
+            k = s + 1 + i
+            keep[k] = True
+            stack.append((s, k))
+            stack.append((k, e))
+    return coords[keep]
+
+
+def tolerance_for_zoom(zoom: int) -> float:
+    """Degrees covered by SIMPLIFY_PX pixels of a 256px Web Mercator tile at this zoom."""
+    return 360.0 / (256 * 2 ** zoom) * SIMPLIFY_PX
+
+
+class WaterwayStore:
+    def __init__(self, db_path: str = WATERWAY_DB_PATH, tile_deg: float = WATERWAY_TILE_DEG,
+                 max_age_days: float = WATERWAY_MAX_AGE_DAYS, fetch_workers: int = WATERWAY_FETCH_WORKERS):
+        self.tile_deg = tile_deg
+        self.max_age = max_age_days * 86400.0
+        self._fetch_pool = ThreadPoolExecutor(max_workers=max(1, fetch_workers), thread_name_prefix="overpass")
+        self._lock = threading.Lock()
+        self._flights = SingleFlight("waterways")
+        # simplified coordinates per (osm_id, zoom)
+        self._simplified = TTLCache(max_entries=50000, ttl=86400.0)
+        self.tile_hits = self.tile_fetches = self.tile_failures = 0
+
+        try:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._init_schema()
+        except sqlite3.Error as e:
+            print("⚠ Waterway store unavailable, using memory only:", e)
+            self._db = sqlite3.connect(":memory:", check_same_thread=False)
+            self._init_schema()
+
+    def _init_schema(self):
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS tiles (tile TEXT PRIMARY KEY, fetched_at REAL);
+            CREATE TABLE IF NOT EXISTS ways (
+                osm_id INTEGER PRIMARY KEY, kind TEXT,
+                minlat REAL, minlon REAL, maxlat REAL, maxlon REAL, coords BLOB);
+            CREATE TABLE IF NOT EXISTS tile_ways (tile TEXT, osm_id INTEGER, PRIMARY KEY (tile, osm_id));
+        """)
+        self._db.commit()
+
+    def _tiles_for(self, south: float, west: float, north: float, east: float) -> List[Tuple[int, int]]:
+        d = self.tile_deg
+        return [(i, j)
+                for i in range(math.floor(south / d), math.floor(north / d) + 1)
+                for j in range(math.floor(west / d), math.floor(east / d) + 1)]
+
+    def tile_key(self, tile: Tuple[int, int]) -> str:
+        return f"{self.tile_deg:g}:{tile[0]}:{tile[1]}"
+
+    def _fetch_tile(self, tile: Tuple[int, int]):
+        # another flight may have refreshed it while we waited
+        if self._is_fresh(tile):
+            return
+        key = self.tile_key(tile)
+
+        d = self.tile_deg
+        query = OVERPASS_QUERY.format(south=tile[0] * d, west=tile[1] * d,
+                                      north=(tile[0] + 1) * d, east=(tile[1] + 1) * d)
+        r = HTTP.post(OVERPASS_URL, data={"data": query}, timeout=(3.05, 30))
+        r.raise_for_status()
+        elements = r.json().get("elements", [])
+
+        ways = {}
+        for el in elements:
+            if el.get("type") != "way" or not el.get("geometry"):
+                continue
+            coords = np.array([[p["lon"], p["lat"]] for p in el["geometry"]], dtype="float64")
+            ways[el["id"]] = (el["id"], el.get("tags", {}).get("waterway"),
+                              float(coords[:, 1].min()), float(coords[:, 0].min()),
+                              float(coords[:, 1].max()), float(coords[:, 0].max()),
+                              coords.tobytes())
+
+        with self._lock:
+            self._db.execute("DELETE FROM tile_ways WHERE tile = ?", (key,))
+            self._db.executemany("INSERT OR REPLACE INTO ways VALUES (?, ?, ?, ?, ?, ?, ?)", ways.values())
+            self._db.executemany("INSERT OR IGNORE INTO tile_ways VALUES (?, ?)", [(key, i) for i in ways])
+            self._db.execute("INSERT OR REPLACE INTO tiles VALUES (?, ?)", (key, time.time()))
+            self._db.commit()
+        self.tile_fetches += 1
+
+    def tile_fetched_at(self, tile: Tuple[int, int]) -> Optional[float]:
+        """When a tile was last fetched from Overpass (None if never)."""
+        with self._lock:
+            row = self._db.execute("SELECT fetched_at FROM tiles WHERE tile = ?",
+                                   (self.tile_key(tile),)).fetchone()
+        return row[0] if row else None
+
+    def _is_fresh(self, tile: Tuple[int, int]) -> bool:
+        fetched_at = self.tile_fetched_at(tile)
+        return fetched_at is not None and time.time() - fetched_at < self.max_age
+
+    def _refresh(self, tiles: List[Tuple[int, int]]) -> int:
+        """Fetch the missing or expired tiles concurrently; returns how many failed."""
+        stale = [t for t in tiles if not self._is_fresh(t)]
+        self.tile_hits += len(tiles) - len(stale)
+        fetches = [self._fetch_pool.submit(self._flights.do, t, self._fetch_tile, t) for t in stale]
+        failed = 0
+        for fut in fetches:
+            try:
+                fut.result()
+            except Exception as e:
+                # a stale copy of the tile (if any) keeps serving
+                failed += 1
+                self.tile_failures += 1
+                print("⚠ Overpass waterway fetch failed:", e)
+        return failed
+
+    def prefetch(self, south: float, west: float, north: float, east: float):
+        """Bring every tile covering the box up to date (concurrently), without reading ways."""
+        self._refresh(self._tiles_for(south, west, north, east))
+
+    def ways_in_bbox(self, south: float, west: float, north: float, east: float,
+                     zoom: int = 12) -> List[Tuple[int, str, list]]:
+        """(osm_id, kind, simplified [[lon, lat], ...]) for stored ways intersecting the box.
+
+        Missing or expired tiles are fetched first; raises when none of the
+        covering tiles could be loaded at all.
+        """
+        tiles = self._tiles_for(south, west, north, east)
+        failed = self._refresh(tiles)
+        if tiles and failed == len(tiles) and not any(self._has_tile(t) for t in tiles):
+            raise RuntimeError("waterway_service_unavailable")
+
+        keys = [self.tile_key(t) for t in tiles]
+        with self._lock:
+            rows = self._db.execute(
+                f"""SELECT DISTINCT w.osm_id, w.kind, w.coords FROM ways w
+                    JOIN tile_ways t ON t.osm_id = w.osm_id
+                    WHERE t.tile IN ({",".join("?" * len(keys))})
+                      AND w.maxlat >= ? AND w.minlat <= ? AND w.maxlon >= ? AND w.minlon <= ?""",
+                (*keys, south, north, west, east)).fetchall()
+
+        tolerance = tolerance_for_zoom(zoom)
+        out = []
+        for osm_id, kind, blob in rows:
+            coords = self._simplified.get((osm_id, zoom))
+            if coords is None:
+                simplified = simplify(np.frombuffer(blob, dtype="float64").reshape(-1, 2), tolerance)
+                coords = np.round(simplified, 5).tolist()
+                self._simplified.set((osm_id, zoom), coords)
+            out.append((osm_id, kind, coords))
+        return out
+
+    def features(self, lat: float, lon: float, radius_km: float = 15.0, zoom: int = 12) -> dict:
+        """GeoJSON FeatureCollection of waterways intersecting the box around (lat, lon)."""
+        dlat = radius_km / 111.0
+        dlon = radius_km / (111.0 * max(math.cos(math.radians(lat)), 1e-6))
+        ways = self.ways_in_bbox(lat - dlat, lon - dlon, lat + dlat, lon + dlon, zoom)
+        return {"type": "FeatureCollection", "features": [{
+            "type": "Feature",
+            "geometry": {"type": "LineString", "coordinates": coords},
+            "properties": {"id": osm_id, "type": kind}
+        } for osm_id, kind, coords in ways]}
+
+    def _has_tile(self, tile: Tuple[int, int]) -> bool:
+        with self._lock:
+            return self._db.execute("SELECT 1 FROM tiles WHERE tile = ?",
+                                    (self.tile_key(tile),)).fetchone() is not None
+
+    def stats(self) -> dict:
+        with self._lock:
+            tiles = self._db.execute("SELECT COUNT(*) FROM tiles").fetchone()[0]
+            ways = self._db.execute("SELECT COUNT(*) FROM ways").fetchone()[0]
+        return {"tiles": tiles, "ways": ways, "tile_hits": self.tile_hits,
+                "tile_fetches": self.tile_fetches, "tile_failures": self.tile_failures,
+                "simplified_cache": self._simplified.stats()}
+
+
+WATERWAYS = WaterwayStore()
@@ -0,0 +1,192 @@
+"""
+Process-wide cache of Open-Meteo realtime frames.
+
+Every caller that needs the hourly weather frame for a location should go
+through `fetch_realtime_cached` instead of `fetch_realtime`. Coordinates are
+snapped to the forecast model grid so that nearby points share one upstream
+request, and entries expire on the next hourly boundary, which is when
+Open-Meteo publishes new values.
+
+The returned DataFrame is shared between all consumers: treat it as read-only
+(`add_lagged_aggregates` and `select_features` already work on copies).
+"""
+from __future__ import annotations
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, List, Tuple
+
+import pandas as pd
+
+from earthpulse_ml.openmeteo_client import fetch_realtime, fetch_realtime_many, DEFAULT_HOURLY
+from earthpulse_ml.singleflight import SingleFlight
+
+# Open-Meteo's global models run at 0.1°-0.25°; 0.1° never merges points the
+# upstream API would resolve to different cells.
+GRID_DEG = float(os.environ.get("WEATHER_GRID_DEG", "0.1"))
+MAX_ENTRIES = int(os.environ.get("WEATHER_CACHE_MAX_ENTRIES", "2048"))
+# grid cells per multi-location Open-Meteo request (keeps the URL well under 8 KB)
+BULK_CHUNK = int(os.environ.get("WEATHER_BULK_CHUNK", "100"))
+
+
+def snap_to_grid(lat: float, lon: float, step: float = GRID_DEG) -> Tuple[float, float]:
+    """Snap a coordinate pair to the centre of its model grid cell."""
+    return (round(round(lat / step) * step, 4), round(round(lon / step) * step, 4))
+
+
+def hour_bucket(now: Optional[float] = None) -> int:
+    """Hours since epoch (UTC); changes exactly when cached frames expire."""
+    return int((time.time() if now is None else now) // 3600)
+
+
+def next_hour_boundary(now: Optional[float] = None) -> float:
+    """Epoch seconds of the next top of the hour (UTC)."""
+    now = time.time() if now is None else now
+    return (int(now) // 3600 + 1) * 3600.0
+
+
+class WeatherFrameCache:
+    """Bounded LRU of realtime frames keyed by grid cell, variables and timezone."""
+
+    def __init__(self, fetcher: Callable[..., pd.DataFrame] = fetch_realtime,
+                 grid_deg: float = GRID_DEG, max_entries: int = MAX_ENTRIES,
+                 bulk_fetcher: Callable[..., List[pd.DataFrame]] = fetch_realtime_many):
+        self._fetcher = fetcher
+        self._bulk_fetcher = bulk_fetcher
+        self.grid_deg = grid_deg
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, tuple[float, pd.DataFrame]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # concurrent misses for one cell share a single upstream request
+        self._flights = SingleFlight("weather")
+        self.hits = 0
+        self.misses = 0
+        self.bulk_requests = 0
+
+    def key(self, lat: float, lon: float, hourly: Optional[List[str]] = None,
+            timezone_name: str = "UTC", forecast_days: int = 1) -> tuple:
+        # fetch_realtime treats "auto" as UTC, so both share one entry
+        if timezone_name == "auto":
+            timezone_name = "UTC"
+        cell = snap_to_grid(lat, lon, self.grid_deg)
+        return (cell, tuple(hourly or DEFAULT_HOURLY), timezone_name, forecast_days)
+
+    def get(self, lat: float, lon: float, hourly: Optional[List[str]] = None,
+            timezone_name: str = "UTC", forecast_days: int = 1) -> pd.DataFrame:
+        key = self.key(lat, lon, hourly, timezone_name, forecast_days)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        return self._flights.do(key, self._fill, key, now)
+
+    def _fill(self, key: tuple, now: float) -> pd.DataFrame:
+        with self._lock:
+            # a flight that finished just before ours started may already have filled it
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                return entry[1]
+        (cell_lat, cell_lon), variables, tz, forecast_days = key
+        frame = self._fetcher(cell_lat, cell_lon, hourly=list(variables), timezone_name=tz,
+                              forecast_days=forecast_days)
+        self._store(key, frame, now)
+        return frame
+
+    def _store(self, key: tuple, frame: pd.DataFrame, now: float):
+        with self._lock:
+            self._entries[key] = (next_hour_boundary(now), frame)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_many(self, coords: List[Tuple[float, float]], hourly: Optional[List[str]] = None,
+                 timezone_name: str = "UTC", forecast_days: int = 1) -> List[Optional[pd.DataFrame]]:
+        """
+        Frames for many points, in input order. Cache misses are deduplicated by
+        grid cell, claimed through the single-flight table (cells another caller
+        is already fetching are waited for) and fetched with multi-location
+        requests of up to BULK_CHUNK cells; points whose fetch failed come back
+        as None.
+        """
+        keys = [self.key(lat, lon, hourly, timezone_name, forecast_days) for lat, lon in coords]
+        now = time.time()
+        found = {}
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] > now:
+                    self._entries.move_to_end(key)
+                    found[key] = entry[1]
+            self.hits += sum(1 for k in keys if k in found)
+            self.misses += sum(1 for k in keys if k not in found)
+
+        # claim the missing cells so concurrent get / get_many callers share our fetch
+        claimed, joined = self._flights.claim(k for k in dict.fromkeys(keys) if k not in found)
+        with self._lock:
+            # a flight that finished just before the claim may already have filled some
+            for key in claimed:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] > now:
+                    found[key] = entry[1]
+        for key in [k for k in claimed if k in found]:
+            self._flights.finish(key, found[key])
+        missing = [k for k in claimed if k not in found]
+        chunks = [missing[i:i + BULK_CHUNK] for i in range(0, len(missing), BULK_CHUNK)]
+
+        def fetch_chunk(chunk):
+            _, variables, tz, days = chunk[0]
+            try:
+                frames = self._bulk_fetcher([k[0] for k in chunk], hourly=list(variables),
+                                            timezone_name=tz, forecast_days=days)
+                if len(frames) != len(chunk):
+                    raise ValueError(f"expected {len(chunk)} frames, got {len(frames)}")
+            except Exception as e:
+                print("⚠ Bulk weather chunk failed:", e)
+                for key in chunk:
+                    self._flights.finish(key, error=e)
+                return
+            for key, frame in zip(chunk, frames):
+                self._store(key, frame, now)
+                found[key] = frame
+                self._flights.finish(key, frame)
+
+        if chunks:
+            with self._lock:
+                self.bulk_requests += len(chunks)
+            with ThreadPoolExecutor(max_workers=min(4, len(chunks))) as pool:
+                list(pool.map(fetch_chunk, chunks))
+
+        for key, call in joined.items():
+            try:
+                found[key] = self._flights.wait(call)
+            except Exception:
+                pass
+
+        return [found.get(k) for k in keys]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses,
+                    "bulk_requests": self.bulk_requests, "grid_deg": self.grid_deg,
+                    "coalesced": self._flights.stats()}
+
+
+WEATHER_CACHE = WeatherFrameCache()
+
+
+def fetch_realtime_cached(lat: float, lon: float, hourly=None, timezone_name="UTC",
+                          forecast_days: int = 1) -> pd.DataFrame:
+    """Drop-in replacement for `fetch_realtime` backed by the shared cache."""
+    return WEATHER_CACHE.get(lat, lon, hourly=hourly, timezone_name=timezone_name,
+                             forecast_days=forecast_days)
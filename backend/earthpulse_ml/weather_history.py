@@ -0,0 +1,312 @@
+"""
+Persistent per-city store of daily weather summaries (weatherapi.com history).
+
+A finished day never changes, so each day is fetched from weatherapi.com at
+most once and kept in a Parquet file per city. A range request reads the
+city's file (cached in memory), fetches only the past days it does not hold
+yet, appends them and serves the whole range locally. Today and future dates
+are never requested or stored, and neither are days older than the
+provider's history window. A day the provider has no data for (or failed
+on) is recorded with a retry-after time in <key>.missing, so repeat requests
+do not ask for it again until then. `start_daily` runs `append_yesterday` on a
+background thread shortly after each UTC midnight, so tracked cities are
+already complete when asked for.
+
+Env:
+  WEATHER_API_KEY_HISTORY   weatherapi.com key (only needed for missing days)
+  WEATHER_HISTORY_DIR       directory holding one <key>.parquet (+ <key>.name) per city
+  WEATHER_HISTORY_MAX_DAYS  longest range served by one request
+  WEATHER_HISTORY_DAILY_AT_MINUTES  minutes after UTC midnight of the daily append
+  WEATHER_HISTORY_PROVIDER_DAYS     how far back the provider serves history
+                                    (weatherapi.com free plan: 7; raise for paid plans)
+  WEATHER_HISTORY_RETRY_EMPTY_S     retry delay for a day the provider had no data for
+  WEATHER_HISTORY_RETRY_ERROR_S     retry delay for a day whose fetch failed
+"""
+from __future__ import annotations
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from earthpulse_ml.http_transport import HTTP
+
+HISTORY_URL = "http://api.weatherapi.com/v1/history.json"
+WEATHER_HISTORY_DIR = os.environ.get("WEATHER_HISTORY_DIR", os.path.join(tempfile.gettempdir(), "earthpulse_history"))
+WEATHER_HISTORY_MAX_DAYS = int(os.environ.get("WEATHER_HISTORY_MAX_DAYS", "366"))
+WEATHER_HISTORY_DAILY_AT_MINUTES = int(os.environ.get("WEATHER_HISTORY_DAILY_AT_MINUTES", "30"))
+WEATHER_HISTORY_PROVIDER_DAYS = int(os.environ.get("WEATHER_HISTORY_PROVIDER_DAYS", "7"))
+WEATHER_HISTORY_RETRY_EMPTY_S = float(os.environ.get("WEATHER_HISTORY_RETRY_EMPTY_S", str(86400)))
+WEATHER_HISTORY_RETRY_ERROR_S = float(os.environ.get("WEATHER_HISTORY_RETRY_ERROR_S", "900"))
+
+COLUMNS = ["date", "maxTemp", "minTemp", "humidity", "precipitation", "windSpeed"]
+
+
+def normalize_city(city: str) -> str:
+    return " ".join(city.split()).casefold()
+
+
+def city_key(city: str) -> str:
+    """File name and lock key: a hash of the normalized (Unicode) name."""
+    return hashlib.sha1(normalize_city(city).encode("utf-8")).hexdigest()[:20]
+
+
+def _fetch_day(city: str, day: date) -> Optional[dict]:
+    """One day's summary from weatherapi.com, or None when it has no data for that day."""
+    api_key = os.environ.get("WEATHER_API_KEY_HISTORY", "")
+    if not api_key:
+        raise RuntimeError("WEATHER_API_KEY_HISTORY not set")
+    r = HTTP.get(HISTORY_URL, params={"key": api_key, "q": city, "dt": day.isoformat()}, timeout=10)
+    r.raise_for_status()
+    data = r.json()
+    if "forecast" not in data or not data["forecast"]["forecastday"]:
+        return None
+    day_data = data["forecast"]["forecastday"][0]["day"]
+    return {
+        "date": day.isoformat(),
+        "maxTemp": day_data.get("maxtemp_c"),
+        "minTemp": day_data.get("mintemp_c"),
+        "humidity": day_data.get("avghumidity"),
+        "precipitation": day_data.get("totalprecip_mm"),
+        "windSpeed": day_data.get("maxwind_kph"),
+    }
+
+
+class WeatherHistoryStore:
+    def __init__(self, root: str = WEATHER_HISTORY_DIR,
+                 fetcher: Callable[[str, date], Optional[dict]] = _fetch_day,
+                 max_days: int = WEATHER_HISTORY_MAX_DAYS, max_cities: int = 256, workers: int = 4,
+                 provider_days: int = WEATHER_HISTORY_PROVIDER_DAYS):
+        self.root = root
+        self._fetcher = fetcher
+        self.max_days = max_days
+        self.provider_days = provider_days
+        self.max_cities = max_cities
+        self.workers = workers
+        self._frames: "OrderedDict[str, pd.DataFrame]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._city_locks: Dict[str, threading.Lock] = {}
+        self._names: Dict[str, str] = {}   # key -> display name (also in <key>.name)
+        self._missing: Dict[str, Dict[str, float]] = {}   # key -> {date: retry after}
+        self._worker = None
+        self._start_lock = threading.Lock()
+        self.hits = self.days_fetched = self.fetch_failures = self.days_empty = 0
+
+        try:
+            os.makedirs(root, exist_ok=True)
+        except OSError as e:
+            print("⚠ Weather history directory unavailable, using memory only:", e)
+            self.root = None
+
+    def _path(self, key: str, ext: str = "parquet") -> Optional[str]:
+        return os.path.join(self.root, f"{key}.{ext}") if self.root else None
+
+    def _remember_name(self, key: str, city: str):
+        """Keep the first display name seen for a key, so the scheduler can query it later."""
+        with self._lock:
+            if key in self._names:
+                return
+            self._names[key] = " ".join(city.split())
+        path = self._path(key, "name")
+        if path and not os.path.exists(path):
+            try:
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(" ".join(city.split()))
+            except OSError as e:
+                print(f"⚠ Weather history name write failed for {path}:", e)
+
+    def _missing_days(self, key: str) -> Dict[str, float]:
+        """Days not to request again before their retry time (called under the city lock)."""
+        marks = self._missing.get(key)
+        if marks is None:
+            marks = {}
+            path = self._path(key, "missing")
+            if path and os.path.exists(path):
+                try:
+                    with open(path, encoding="utf-8") as f:
+                        marks = {d: float(t) for d, t in json.load(f).items()}
+                except (OSError, ValueError) as e:
+                    print(f"⚠ Unreadable weather history marks {path}:", e)
+            self._missing[key] = marks
+        return marks
+
+    def _mark_missing(self, key: str, marks: Dict[str, float], updates: Dict[str, float]):
+        now = time.time()
+        marks.update(updates)
+        for d in [d for d, t in marks.items() if t <= now]:
+            del marks[d]
+        path = self._path(key, "missing")
+        if path:
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(marks, f)
+                os.replace(tmp, path)
+            except OSError as e:
+                print(f"⚠ Weather history marks write failed for {path}:", e)
+
+    def _city_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._city_locks.setdefault(key, threading.Lock())
+
+    def _frame(self, key: str) -> pd.DataFrame:
+        with self._lock:
+            df = self._frames.get(key)
+            if df is not None:
+                self._frames.move_to_end(key)
+                return df
+        path = self._path(key)
+        df = None
+        if path and os.path.exists(path):
+            try:
+                df = pd.read_parquet(path)
+            except Exception as e:
+                print(f"⚠ Unreadable weather history file {path}:", e)
+        if df is None:
+            df = pd.DataFrame(columns=COLUMNS)
+        self._remember(key, df)
+        return df
+
+    def _remember(self, key: str, df: pd.DataFrame):
+        with self._lock:
+            self._frames[key] = df
+            self._frames.move_to_end(key)
+            while len(self._frames) > self.max_cities:
+                self._frames.popitem(last=False)
+
+    def _append(self, key: str, df: pd.DataFrame, rows: List[dict]) -> pd.DataFrame:
+        new = pd.DataFrame(rows, columns=COLUMNS)
+        df = new if df.empty else pd.concat([df, new], ignore_index=True)
+        df = df.drop_duplicates("date", keep="first").sort_values("date", ignore_index=True)
+        path = self._path(key)
+        if path:
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                df.to_parquet(tmp, index=False)
+                os.replace(tmp, path)
+            except Exception as e:
+                print(f"⚠ Weather history write failed for {path}:", e)
+        self._remember(key, df)
+        return df
+
+    def _fill(self, city: str, key: str, days: List[date]) -> pd.DataFrame:
+        """Fetch the given days not yet stored, append them and return the city frame."""
+        with self._city_lock(key):
+            df = self._frame(key)
+            have = set(df["date"])
+            marks = self._missing_days(key)
+            now = time.time()
+            oldest = datetime.now(timezone.utc).date() - timedelta(days=self.provider_days)
+            missing = [d for d in days if d.isoformat() not in have and d >= oldest
+                       and marks.get(d.isoformat(), 0.0) <= now]
+            if not missing:
+                self.hits += 1
+                return df
+
+            def fetch(d):
+                try:
+                    return self._fetcher(city, d)
+                except Exception as e:
+                    return e
+
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(missing))) as pool:
+                results = list(pool.map(fetch, missing))
+
+            rows = [r for r in results if isinstance(r, dict)]
+            errors = [r for r in results if isinstance(r, Exception)]
+            retry = {d.isoformat(): now + (WEATHER_HISTORY_RETRY_ERROR_S if isinstance(r, Exception)
+                                           else WEATHER_HISTORY_RETRY_EMPTY_S)
+                     for d, r in zip(missing, results) if not isinstance(r, dict)}
+            if retry:
+                self._mark_missing(key, marks, retry)
+            self.days_fetched += len(rows)
+            self.fetch_failures += len(errors)
+            self.days_empty += len(results) - len(rows) - len(errors)
+            if errors:
+                print(f"⚠ Weather history fetch failed for {city} ({len(errors)} days):", errors[0])
+            if rows:
+                self._remember_name(key, city)
+                df = self._append(key, df, rows)
+            elif errors and not have.intersection(d.isoformat() for d in days):
+                # nothing stored for this range and nothing could be fetched
+                raise errors[0]
+            return df
+
+    def get_range(self, city: str, start: date, end: date) -> List[dict]:
+        """Daily summaries for start..end (inclusive); days from today on are left out."""
+        end = min(end, datetime.now(timezone.utc).date() - timedelta(days=1))
+        if end < start:
+            return []
+        if (end - start).days + 1 > self.max_days:
+            raise ValueError(f"date range longer than {self.max_days} days")
+        days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+        df = self._fill(city, city_key(city), days)
+        window = df[(df["date"] >= start.isoformat()) & (df["date"] <= end.isoformat())]
+        window = window.astype(object).where(window.notna(), None)
+        return window.to_dict(orient="records")
+
+    def cities(self) -> List[str]:
+        """Display names of every city with stored history."""
+        with self._lock:
+            names = dict(self._names)
+        if self.root:
+            for f in os.listdir(self.root):
+                key = f[:-len(".name")]
+                if f.endswith(".name") and key not in names:
+                    try:
+                        with open(os.path.join(self.root, f), encoding="utf-8") as fh:
+                            names[key] = fh.read().strip()
+                    except OSError:
+                        continue
+        return sorted(n for n in names.values() if n)
+
+    def append_yesterday(self, cities: Iterable[str] = ()):
+        """Scheduler job: store yesterday for the given cities and every city already on disk."""
+        yesterday = datetime.now(timezone.utc).date() - timedelta(days=1)
+        seen = set()
+        names = list(cities) + self.cities()
+        for name in names:
+            key = city_key(name)
+            if key in seen:
+                continue
+            seen.add(key)
+            try:
+                self._fill(name, key, [yesterday])
+            except Exception as e:
+                print(f"⚠ Weather history append failed for {name}:", e)
+
+    def _run_daily(self, cities: List[str], at_minutes: int):
+        while True:
+            now = datetime.now(timezone.utc)
+            due = datetime(now.year, now.month, now.day, tzinfo=timezone.utc) + timedelta(minutes=at_minutes)
+            if due <= now:
+                due += timedelta(days=1)
+            time.sleep((due - now).total_seconds())
+            self.append_yesterday(cities)
+
+    def start_daily(self, cities: Iterable[str] = (), at_minutes: int = WEATHER_HISTORY_DAILY_AT_MINUTES):
+        """Run append_yesterday(cities) every day, at_minutes after UTC midnight."""
+        if self._worker is None:
+            with self._start_lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run_daily, args=(list(cities), at_minutes),
+                                                    name="weather-history-daily", daemon=True)
+                    self._worker.start()
+
+    def stats(self) -> dict:
+        with self._lock:
+            cached = len(self._frames)
+        return {"cities_in_memory": cached, "hits": self.hits,
+                "days_fetched": self.days_fetched, "fetch_failures": self.fetch_failures,
+                "days_empty": self.days_empty,
+                "daily_running": self._worker is not None}
+
+
+WEATHER_HISTORY = WeatherHistoryStore()
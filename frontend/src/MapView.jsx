@@ -6,18 +6,54 @@ import {
   Marker,
   Popup,
   Tooltip,
-  GeoJSON,
   useMap,
   ZoomControl,
 } from "react-leaflet";
 import "leaflet/dist/leaflet.css";
 import L from "leaflet";
 import axios from "axios";
-import "leaflet.heat";
+import { VectorTileGrid } from "./vectorTiles";
 
 
 const BACKEND = import.meta.env.VITE_BACKEND_URL || "https://earthpulse-backend-48598371636.asia-south1.run.app";
 
+// Overlays drawn from the backend's vector tiles; minZoom matches the
+// backend's per-layer MVT_MIN_ZOOM (coarser tiles come back empty).
+const MVT_LAYERS = {
+  hotspots: {
+    minZoom: 3,
+    style: (p) => ({ color: "#ef4444", radius: 4, fillOpacity: 0.3 + 0.6 * ((p.confidence ?? 50) / 100) }),
+  },
+  flood_zones: {
+    minZoom: 4,
+    style: { color: "#3b82f6", weight: 3, opacity: 0.7, fillOpacity: 0.2 },
+  },
+  waterways: {
+    minZoom: 10,
+    style: { color: "#0ea5e9", weight: 2, opacity: 0.8 },
+  },
+};
+
+// Adds /mvt/<layer>/{z}/{x}/{y}.pbf to the map while mounted
+function VectorTileOverlay({ layer }) {
+  const map = useMap();
+
+  useEffect(() => {
+    const { minZoom, style } = MVT_LAYERS[layer];
+    const grid = new VectorTileGrid({
+      url: `${BACKEND}/mvt/${layer}/{z}/{x}/{y}.pbf`,
+      layer,
+      minZoom,
+      style,
+    }).addTo(map);
+    return () => {
+      map.removeLayer(grid);
+    };
+  }, [map, layer]);
+
+  return null;
+}
+
 // Fix default marker icons
 delete L.Icon.Default.prototype._getIconUrl;
 L.Icon.Default.mergeOptions({
@@ -94,13 +130,9 @@ function MapView({ result, isMapExpanded }) {
   const [coords, setCoords] = useState([20.59, 78.96]);
   const [ngos, setNgos] = useState([]);
   const [showNgos, setShowNgos] = useState(true);
-  const [hotspots, setHotspots] = useState([]);
   const [showHotspots, setShowHotspots] = useState(true);
-  const [floodZones, setFloodZones] = useState(null);
   const [showFloodZones, setShowFloodZones] = useState(true);
-  const [waterways, setWaterways] = useState(null);
   const [showWaterways, setShowWaterways] = useState(true);
-  const heatLayerRef = useRef(null);
   
   const [chatOpen, setChatOpen] = useState(false);
   const [chatNgo, setChatNgo] = useState(null);
@@ -298,136 +330,6 @@ console.log("DETAILS R:", r);
     fetchCoords();
   }, [result]);
 
-  // Fetch Hotspots
-  useEffect(() => {
-    if (!coords) return;
-
-    const fetchHotspots = async () => {
-      try {
-        const resp = await axios.get(
-  `${BACKEND}/api/hotspots?lat=${coords[0]}&lon=${coords[1]}&radius_km=200`
-);
-
-
-        const data = resp.data;
-
-        if (!Array.isArray(data)) {
-          console.warn("Hotspot API returned non-array:", data);
-          setHotspots([]);
-          return;
-        }
-
-        const points = data.map((h) => [
-          h.lat,
-          h.lon,
-          (h.confidence ?? 50) / 100,
-        ]);
-
-        setHotspots(points);
-      } catch (e) {
-        console.error("Hotspot fetch failed:", e);
-        setHotspots([]);
-      }
-    };
-
-    fetchHotspots();
-  }, [coords]);
-
-  // Render Heatmap
-  const HeatLayer = ({ points }) => {
-    const map = useMap();
-
-    useEffect(() => {
-      if (heatLayerRef.current) {
-        try {
-          map.removeLayer(heatLayerRef.current);
-        } catch {}
-        heatLayerRef.current = null;
-      }
-
-      if (showHotspots && points.length > 0) {
-        const layer = L.heatLayer(points, {
-          radius: 25,
-          blur: 40,
-          maxZoom: 10,
-          max: 1.0,
-        }).addTo(map);
-
-        heatLayerRef.current = layer;
-      }
-
-      return () => {
-        if (heatLayerRef.current) {
-          try {
-            map.removeLayer(heatLayerRef.current);
-          } catch {}
-          heatLayerRef.current = null;
-        }
-      };
-    }, [points, showHotspots]);
-
-    return null;
-  };
-
-  // Fetch Flood Zones
-  useEffect(() => {
-    if (!coords) return;
-
-    const fetchFlood = async () => {
-      try {
-        const res = await axios.get(
-  `${BACKEND}/api/flood_zones?lat=${coords[0]}&lon=${coords[1]}`
-);
-
-        if (res.data?.type === "FeatureCollection") {
-          setFloodZones(res.data);
-        } else {
-          console.warn("Invalid flood zone GeoJSON:", res.data);
-          setFloodZones(null);
-        }
-      } catch (e) {
-        console.error("Flood zone fetch error:", e);
-        setFloodZones(null);
-      }
-    };
-
-    fetchFlood();
-  }, [coords]);
-
-  // Fetch Waterways
-  useEffect(() => {
-    if (!coords) return;
-    const fetchWaterways = async () => {
-      try {
-        const res = await axios.get(
-  `${BACKEND}/api/waterways?lat=${coords[0]}&lon=${coords[1]}`
-);
-
-
-        const data = res.data;
-        if (!data || data.type !== "FeatureCollection") {
-          console.log("Waterways sample:", data.features?.slice(0,3));
-          setWaterways(null);
-          return;
-        }
-
-        const count = (data.features || []).length;
-        console.log("Waterways fetched, feature count:", count);
-        if (count === 0) {
-          setWaterways(null);
-          return;
-        }
-
-        setWaterways(data);
-      } catch (e) {
-        console.error("Waterways fetch error:", e);
-        setWaterways(null);
-      }
-    };
-
-    fetchWaterways();
-  }, [coords]);
-
  // Fetch NGOs
 useEffect(() => {
   if (!coords) return;
@@ -836,9 +738,20 @@ for (const osm of osmNgos) {
         <ZoomControl position="bottomleft" />
         <FitBounds coords={coords} ngos={ngos} />
         <TileLayer url="https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png" />
+
+        {/* Flood risk heatmap tiles (rendered and cached by the backend) */}
+        {showFloodZones && (
+          <TileLayer
+            url={`${BACKEND}/tiles/flood/{z}/{x}/{y}.png`}
+            minZoom={4}
+            opacity={0.55}
+          />
+        )}
         
-        {/* Hotspot Heatmap */}
-        <HeatLayer points={hotspots} />
+        {/* Hotspots, flood zones and waterways (vector tiles) */}
+        {showHotspots && <VectorTileOverlay layer="hotspots" />}
+        {showFloodZones && <VectorTileOverlay layer="flood_zones" />}
+        {showWaterways && <VectorTileOverlay layer="waterways" />}
 
         {/* City Marker */}
         <Marker position={coords} icon={CityIcon}>
@@ -857,31 +770,6 @@ for (const osm of osmNgos) {
           </Popup>
         </Marker>
 
-        {/* Flood Zones */}
-        {showFloodZones && floodZones && floodZones.type === "FeatureCollection" && (
-          <GeoJSON
-            data={floodZones}
-            style={{
-              color: "#3b82f6",
-              weight: 3,
-              opacity: 0.7,
-              fillOpacity: 0.2
-            }}
-          />
-        )}
-
-        {/* Waterways */}
-        {showWaterways && waterways && (
-          <GeoJSON
-            data={waterways}
-            style={{
-              color: "#0ea5e9",
-              weight: 2,
-              opacity: 0.8,
-            }}
-          />
-        )}
-
         {/* NGOs */}
         {showNgos && ngos.map((ngo) => (
           <Marker
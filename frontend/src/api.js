@@ -16,6 +16,24 @@ export async function fetchPredictionByCoords({ lat, lon }) {
   return r.data;
 }
 
+// locations: ["Delhi", { city: "Mumbai" }, { lat, lon }, ...]
+export async function fetchPredictionBatch(locations) {
+  const r = await axios.post(`${BACKEND}/predict/batch`, { locations });
+  return r.data;
+}
+
+// hourly risk curve: { time: [...], flood: [...], wildfire: [...] }
+export async function fetchPredictionTimeline({ city, lat, lon, hours = 48 }) {
+  const params = { hours };
+  if (city) params.city = city;
+  if (typeof lat === "number" && typeof lon === "number") {
+    params.lat = lat;
+    params.lon = lon;
+  }
+  const r = await axios.get(`${BACKEND}/predict/timeline`, { params });
+  return r.data;
+}
+
 // ---------------------------
 // WEATHER
 // ---------------------------
@@ -30,8 +48,12 @@ export async function fetchWeather({ city, lat, lon }) {
   return r.data;
 }
 
-export async function fetchWeatherHistory(city) {
-  const res = await fetch(`${BACKEND}/weather/history?city=${encodeURIComponent(city)}`);
+// start / end: optional YYYY-MM-DD (default: the last two days)
+export async function fetchWeatherHistory(city, { start, end } = {}) {
+  const params = new URLSearchParams({ city });
+  if (start) params.set("start", start);
+  if (end) params.set("end", end);
+  const res = await fetch(`${BACKEND}/weather/history?${params}`);
   if (!res.ok) throw new Error("History API failed");
   return await res.json();
 }
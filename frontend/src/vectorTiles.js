@@ -0,0 +1,210 @@
+// Leaflet layer for the backend's Mapbox Vector Tiles (/mvt/<layer>/{z}/{x}/{y}.pbf).
+// Tiles are small binary protobufs, fetched only for the visible tiles and
+// drawn on a canvas per tile. The decoder covers the subset of the MVT spec the
+// backend writes (points, lines, polygons, scalar properties).
+import L from "leaflet";
+
+// --- protobuf reading ---
+function reader(bytes) {
+  return { bytes, pos: 0, view: new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength) };
+}
+
+function varint(r) {
+  // arithmetic, not bit ops: OSM ids exceed 32 bits
+  let result = 0;
+  let scale = 1;
+  for (;;) {
+    const b = r.bytes[r.pos++];
+    result += (b & 0x7f) * scale;
+    if (b < 0x80) return result;
+    scale *= 128;
+  }
+}
+
+function zigzag(n) {
+  return n % 2 === 1 ? -(n + 1) / 2 : n / 2;
+}
+
+// calls onField(field, wire, r) for each field of the message in bytes[start, end)
+function fields(r, end, onField) {
+  while (r.pos < end) {
+    const key = varint(r);
+    const field = Math.floor(key / 8);
+    const wire = key & 7;
+    const before = r.pos;
+    onField(field, wire, r);
+    if (r.pos === before) skip(r, wire);
+  }
+}
+
+function skip(r, wire) {
+  if (wire === 0) varint(r);
+  else if (wire === 1) r.pos += 8;
+  else if (wire === 2) r.pos += varint(r);
+  else if (wire === 5) r.pos += 4;
+  else throw new Error(`Unsupported protobuf wire type ${wire}`);
+}
+
+function string(r) {
+  const len = varint(r);
+  const s = new TextDecoder().decode(r.bytes.subarray(r.pos, r.pos + len));
+  r.pos += len;
+  return s;
+}
+
+function packed(r) {
+  const end = varint(r) + r.pos;
+  const out = [];
+  while (r.pos < end) out.push(varint(r));
+  return out;
+}
+
+function value(r) {
+  const end = varint(r) + r.pos;
+  let v = null;
+  fields(r, end, (field, wire) => {
+    if (field === 1) v = string(r);
+    else if (field === 2) { v = r.view.getFloat32(r.pos, true); r.pos += 4; }
+    else if (field === 3) { v = r.view.getFloat64(r.pos, true); r.pos += 8; }
+    else if (field === 4 || field === 5) v = varint(r);
+    else if (field === 6) v = zigzag(varint(r));
+    else if (field === 7) v = varint(r) !== 0;
+    else skip(r, wire);
+  });
+  return v;
+}
+
+// geometry commands -> list of parts, each a list of [x, y] in tile units
+function geometry(cmds) {
+  const parts = [];
+  let part = null;
+  let x = 0;
+  let y = 0;
+  let i = 0;
+  while (i < cmds.length) {
+    const id = cmds[i] & 7;
+    const count = Math.floor(cmds[i] / 8);
+    i++;
+    if (id === 7) {
+      if (part) part.push(part[0]);
+      continue;
+    }
+    for (let k = 0; k < count; k++) {
+      x += zigzag(cmds[i++]);
+      y += zigzag(cmds[i++]);
+      if (id === 1) {
+        part = [];
+        parts.push(part);
+      }
+      part.push([x, y]);
+    }
+  }
+  return parts;
+}
+
+function layer(r) {
+  const end = varint(r) + r.pos;
+  const out = { name: "", extent: 4096, features: [] };
+  const keys = [];
+  const values = [];
+  const raw = [];
+  fields(r, end, (field, wire) => {
+    if (field === 1) out.name = string(r);
+    else if (field === 2) {
+      const fend = varint(r) + r.pos;
+      const f = { id: null, type: 0, tags: [], cmds: [] };
+      fields(r, fend, (ff, fw) => {
+        if (ff === 1) f.id = varint(r);
+        else if (ff === 2) f.tags = packed(r);
+        else if (ff === 3) f.type = varint(r);
+        else if (ff === 4) f.cmds = packed(r);
+        else skip(r, fw);
+      });
+      raw.push(f);
+    } else if (field === 3) keys.push(string(r));
+    else if (field === 4) values.push(value(r));
+    else if (field === 5) out.extent = varint(r);
+    else skip(r, wire);
+  });
+  for (const f of raw) {
+    const properties = {};
+    for (let t = 0; t + 1 < f.tags.length; t += 2) properties[keys[f.tags[t]]] = values[f.tags[t + 1]];
+    out.features.push({ id: f.id, type: f.type, properties, parts: geometry(f.cmds) });
+  }
+  return out;
+}
+
+// ArrayBuffer -> { layerName: { extent, features: [{ id, type, properties, parts }] } }
+export function decodeTile(buffer) {
+  const r = reader(new Uint8Array(buffer));
+  const layers = {};
+  fields(r, r.bytes.length, (field) => {
+    if (field === 3) {
+      const l = layer(r);
+      layers[l.name] = l;
+    }
+  });
+  return layers;
+}
+
+// --- drawing ---
+const POINT = 1;
+const POLYGON = 3;
+
+function drawFeature(ctx, f, scale, style) {
+  const s = typeof style === "function" ? style(f.properties) : style;
+  if (f.type === POINT) {
+    for (const part of f.parts) {
+      for (const [x, y] of part) {
+        ctx.beginPath();
+        ctx.arc(x * scale, y * scale, s.radius || 3, 0, 2 * Math.PI);
+        ctx.fillStyle = s.fillColor || s.color;
+        ctx.globalAlpha = s.fillOpacity ?? 0.8;
+        ctx.fill();
+      }
+    }
+    return;
+  }
+  ctx.beginPath();
+  for (const part of f.parts) {
+    part.forEach(([x, y], i) => (i ? ctx.lineTo(x * scale, y * scale) : ctx.moveTo(x * scale, y * scale)));
+  }
+  if (f.type === POLYGON) {
+    ctx.fillStyle = s.fillColor || s.color;
+    ctx.globalAlpha = s.fillOpacity ?? 0.2;
+    ctx.fill("evenodd");
+  }
+  ctx.strokeStyle = s.color;
+  ctx.lineWidth = s.weight ?? 1;
+  ctx.globalAlpha = s.opacity ?? 1;
+  ctx.stroke();
+}
+
+// options: url (with {z}/{x}/{y}), layer (name inside the tile), style (object or fn(properties))
+export const VectorTileGrid = L.GridLayer.extend({
+  createTile(coords, done) {
+    const size = this.getTileSize();
+    const tile = L.DomUtil.create("canvas", "leaflet-tile");
+    const ratio = window.devicePixelRatio || 1;
+    tile.width = size.x * ratio;
+    tile.height = size.y * ratio;
+    tile.style.width = `${size.x}px`;
+    tile.style.height = `${size.y}px`;
+
+    const url = L.Util.template(this.options.url, coords);
+    fetch(url)
+      .then((res) => (res.ok ? res.arrayBuffer() : Promise.reject(new Error(`HTTP ${res.status}`))))
+      .then((buf) => {
+        const data = buf.byteLength ? decodeTile(buf)[this.options.layer] : null;
+        if (data) {
+          const ctx = tile.getContext("2d");
+          ctx.scale(ratio, ratio);
+          const scale = size.x / data.extent;
+          for (const f of data.features) drawFeature(ctx, f, scale, this.options.style);
+        }
+        done(null, tile);
+      })
+      .catch((e) => done(e, tile));
+    return tile;
+  },
+});